@@ -0,0 +1,57 @@
+"""Export encoding throughput (rows/s and MB/s) for NDJSON and CSV.
+
+Rows are fed to the same stream_export() generator the /exports routes
+use, in EXPORT_BATCH_SIZE partitions, so the numbers exclude only the
+database cursor itself.
+
+Usage (from backend/):
+    python -m benchmarks.bench_export [--rows 100000]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, AsyncIterator
+
+from benchmarks.common import make_order_rows
+from config import settings
+from services.export import stream_export
+
+
+async def _partitions(rows: list[dict], size: int) -> AsyncIterator[list[Any]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def _drain(rows: list[dict], fmt: str, flatten_items: bool) -> tuple[float, int]:
+    columns = list(rows[0])
+    started = time.perf_counter()
+    total = 0
+    async for chunk in stream_export(
+        _partitions(rows, settings.EXPORT_BATCH_SIZE),
+        fmt=fmt,
+        columns=columns,
+        flatten_items=flatten_items,
+    ):
+        total += len(chunk)
+    return time.perf_counter() - started, total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = make_order_rows(args.rows)
+    print(f"{'format':<8} {'flatten':<8} {'rows/s':>12} {'MB/s':>8} {'MB':>8}")
+    for fmt in ("ndjson", "csv"):
+        for flatten in (False, True):
+            elapsed, size = asyncio.run(_drain(rows, fmt, flatten))
+            print(
+                f"{fmt:<8} {str(flatten):<8} {args.rows / elapsed:>12,.0f}"
+                f" {size / elapsed / 1e6:>8.1f} {size / 1e6:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
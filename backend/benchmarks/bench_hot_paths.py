@@ -0,0 +1,326 @@
+"""Time and peak memory of the CPU-bound order and analytics paths, vs a baseline.
+
+Cases (synthetic inputs, no network):
+
+    resolve_items   catalog map + resolve_items() from the order pipeline's
+                    resolution stage (pricing, unknown-SKU, low-stock and
+                    high-quantity warnings), for orders of 1-500 lines
+                    against catalogs of 100-100k SKUs
+    demand_fold     the per-(day, customer, SKU) fold behind the product
+                    demand rollups, over 10k-100k orders
+    summary         routers.analytics._compute_summary over an orders
+                    table of 10k-100k rows in SQLite (file-backed, in a temp
+                    directory), unfiltered and for one customer
+
+Orders come from benchmarks.common.make_order_rows. ``--max-orders 1000000``
+adds the 1M-order cases; the demand fold alone then peaks at over 1 GB.
+
+Each case is run until ``--min-time`` seconds have passed (at least 3
+times). The fastest run is compared, as the figure least disturbed by
+other load on the machine; p50 and p99 are reported alongside. Peak
+memory is traced with tracemalloc in a separate untimed run, so it
+covers Python allocations only.
+
+Results are compared against ``--baseline`` (default
+benchmarks/hot_paths_baseline.json, not committed); a case whose fastest
+run is more than ``--time-tolerance`` slower, or whose peak memory is more
+than ``--memory-tolerance`` larger, is reported and the script exits 1.
+Timings only compare across runs on the same machine: record a baseline
+there first with ``--save-baseline``. A baseline recorded on a different
+Python, CPU or OS is reported and the comparison skipped.
+
+Usage (from backend/):
+    python -m benchmarks.bench_hot_paths [--only resolve_items] [--max-orders 100000] [--save-baseline]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks.common import make_order_rows, summarize
+from models import Base, Order
+from routers.analytics import _compute_summary
+from services.demand_rollup import _collect
+from services.order_processor import resolve_items
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "hot_paths_baseline.json"
+
+LINE_COUNTS = (1, 10, 100, 500)
+CATALOG_SIZES = (100, 10_000, 100_000)
+ORDER_COUNTS = (10_000, 100_000, 1_000_000)
+DEFAULT_MAX_ORDERS = 100_000
+FILL_BATCH = 50_000
+
+# Lightweight stand-in for Order rows as _collect reads them
+_OrderRow = namedtuple("_OrderRow", "order_date customer_id items")
+
+
+# ---------------------------------------------------------------------------
+# Synthetic inputs
+# ---------------------------------------------------------------------------
+
+def make_catalog(size: int) -> list[SimpleNamespace]:
+    rng = random.Random(size)
+    return [
+        SimpleNamespace(
+            sku=f"SKU-{i:06d}",
+            product_name=f"Product {i}",
+            unit_price=Decimal(rng.randrange(50, 50_000)) / 100,
+            quantity_available=rng.randrange(0, 5000),
+        )
+        for i in range(size)
+    ]
+
+
+def make_extracted_items(lines: int, catalog: list[SimpleNamespace]) -> list[dict[str, Any]]:
+    """Extraction output: mostly catalog SKUs, some unknown, some very large quantities."""
+    rng = random.Random(lines)
+    items = []
+    for _ in range(lines):
+        if rng.random() < 0.05:
+            items.append({"sku": "UNKNOWN", "product_name": "Mystery part", "quantity": 1})
+            continue
+        inv = rng.choice(catalog)
+        quantity = rng.randrange(1, 2000) if rng.random() < 0.1 else rng.randrange(1, 300)
+        items.append({"sku": inv.sku, "product_name": inv.product_name, "quantity": quantity})
+    return items
+
+
+def make_fold_rows(count: int) -> list[_OrderRow]:
+    return [
+        _OrderRow(row["order_date"], row["customer_id"], row["items"])
+        for row in make_order_rows(count)
+    ]
+
+
+class _SyncSession:
+    """Serves the ``await session.execute()`` calls of a compute function from a sync session."""
+
+    def __init__(self, session: Session) -> None:
+        self._session = session
+
+    async def execute(self, statement: Any, params: Any = None) -> Any:
+        return self._session.execute(statement, params)
+
+
+def _fill_orders(session: Session, start: int, stop: int) -> None:
+    for batch_start in range(start, stop, FILL_BATCH):
+        batch = min(FILL_BATCH, stop - batch_start)
+        session.execute(Order.__table__.insert(), make_order_rows(batch, start=batch_start))
+    session.commit()
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def measure(fn: Callable[[], Any], min_time: float) -> dict[str, float]:
+    samples: list[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < 3 or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    stats = summarize(samples)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples) * 1000, 4),
+        "p50_ms": round(stats["p50_ms"], 4),
+        "p99_ms": round(stats["p99_ms"], 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_cases(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+
+    def record(name: str, fn: Callable[[], Any]) -> None:
+        results[name] = measure(fn, args.min_time)
+        r = results[name]
+        print(
+            f"{name:<40} {r['min_ms']:>11.3f} {r['p50_ms']:>11.3f} {r['p99_ms']:>11.3f}"
+            f" {r['peak_kib']:>12.1f} {r['runs']:>6}"
+        )
+
+    print(f"{'case':<40} {'min ms':>11} {'p50 ms':>11} {'p99 ms':>11} {'peak KiB':>12} {'runs':>6}")
+
+    if "resolve_items" in args.only:
+        for size in CATALOG_SIZES:
+            if size > args.max_catalog:
+                continue
+            catalog = make_catalog(size)
+            for lines in LINE_COUNTS:
+                extracted = make_extracted_items(lines, catalog)
+
+                def resolve(catalog=catalog, extracted=extracted):
+                    inv_map = {item.sku: item for item in catalog}
+                    return resolve_items(extracted, inv_map)
+
+                record(f"resolve_items[lines={lines},catalog={size}]", resolve)
+
+    if "demand_fold" in args.only:
+        for count in ORDER_COUNTS:
+            if count > args.max_orders:
+                continue
+            orders = make_fold_rows(count)
+
+            def fold(orders=orders):
+                daily: dict = {}
+                for order in orders:
+                    _collect(daily, order, 1)
+                return daily
+
+            record(f"demand_fold[orders={count}]", fold)
+            del orders
+
+    if "summary" in args.only:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{tmp}/orders.db")
+            Base.metadata.create_all(engine, tables=[Order.__table__])
+            loop = asyncio.new_event_loop()
+            with Session(engine) as session:
+                adapter = _SyncSession(session)
+                filled = 0
+                for count in ORDER_COUNTS:
+                    if count > args.max_orders:
+                        continue
+                    _fill_orders(session, filled, count)
+                    filled = count
+                    for label, customer_id in (("all", None), ("customer", 7)):
+                        record(
+                            f"summary[orders={count},{label}]",
+                            lambda customer_id=customer_id: loop.run_until_complete(
+                                _compute_summary(adapter, customer_id)
+                            ),
+                        )
+            loop.close()
+            engine.dispose()
+
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, Any],
+    time_tolerance: float,
+    memory_tolerance: float,
+) -> list[str]:
+    regressions: list[str] = []
+    for name, r in results.items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            continue
+        # Absolute floors keep sub-0.05 ms and sub-64 KiB noise from failing the run.
+        if r["min_ms"] > base["min_ms"] * (1 + time_tolerance) and r["min_ms"] - base["min_ms"] > 0.05:
+            regressions.append(
+                f"{name}: fastest run {base['min_ms']:.3f} -> {r['min_ms']:.3f} ms "
+                f"({(r['min_ms'] / base['min_ms'] - 1) * 100:+.0f}%)"
+            )
+        if r["peak_kib"] > base["peak_kib"] * (1 + memory_tolerance) and r["peak_kib"] - base["peak_kib"] > 64:
+            regressions.append(
+                f"{name}: peak memory {base['peak_kib']:.0f} -> {r['peak_kib']:.0f} KiB "
+                f"({(r['peak_kib'] / max(base['peak_kib'], 1) - 1) * 100:+.0f}%)"
+            )
+    return regressions
+
+
+def _cpu_model() -> str:
+    # platform.processor() is empty on most Linux systems
+    try:
+        with open("/proc/cpuinfo") as fh:
+            for line in fh:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def _environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "processor": _cpu_model(),
+        "cpus": str(os.cpu_count()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--only", nargs="+", choices=("resolve_items", "demand_fold", "summary"),
+        default=["resolve_items", "demand_fold", "summary"],
+    )
+    parser.add_argument("--max-catalog", type=int, default=max(CATALOG_SIZES))
+    parser.add_argument("--max-orders", type=int, default=DEFAULT_MAX_ORDERS)
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds of timed runs per case")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to --baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.5)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = run_cases(args)
+
+    if args.save_baseline:
+        baseline = {"environment": _environment(), "cases": results}
+        if args.baseline.exists():
+            # keep cases that were not run this time
+            previous = json.loads(args.baseline.read_text())
+            baseline["cases"] = {**previous.get("cases", {}), **results}
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nno baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("environment") != _environment():
+        print(
+            f"\nbaseline was recorded on {baseline.get('environment')}, not "
+            f"{_environment()}; skipping the comparison. Re-record it here "
+            "with --save-baseline."
+        )
+        return
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print(f"\nno regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Fan-out cost per order event on the in-process change-feed bus.
+
+Registers ``--subscribers`` stream clients (a share unfiltered, the rest
+filtered to one of ``--customers`` customers) and times deliver(): SSE
+encoding once plus one buffer append per matching subscriber. Buffers are
+drained outside the timed section, as the stream tasks would.
+
+Usage (from backend/):
+    python -m benchmarks.bench_order_events [--subscribers 1000] [--unfiltered 0.1]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import summarize
+from config import settings
+from services.order_events import OrderEventBus
+
+
+async def run(subscribers: int, unfiltered: float, customers: int, events: int) -> dict:
+    bus = OrderEventBus()
+    rng = random.Random(subscribers)
+    subs = [
+        bus.subscribe(None if rng.random() < unfiltered else rng.randrange(customers))
+        for _ in range(subscribers)
+    ]
+    batch = settings.ORDER_EVENTS_CLIENT_BUFFER
+    samples: list[float] = []
+    for start in range(0, events, batch):
+        for i in range(start, min(start + batch, events)):
+            payload = {
+                "type": "order.created",
+                "order_id": i,
+                "order_number": f"ORD-{i:08d}",
+                "customer_id": rng.randrange(customers),
+                "status": "pending",
+                "previous_status": None,
+                "total_amount": "123.45",
+                "has_warnings": False,
+                "occurred_at": "2025-01-01T00:00:00",
+            }
+            started = time.perf_counter()
+            bus.deliver(payload)
+            samples.append(time.perf_counter() - started)
+        for sub in subs:
+            while sub._buffer:
+                await sub.next()
+    assert not any(sub.overflowed for sub in subs)
+    return summarize(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--unfiltered", type=float, default=0.1)
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--events", type=int, default=5000)
+    args = parser.parse_args()
+
+    for unfiltered in sorted({args.unfiltered, 1.0}):
+        stats = asyncio.run(run(args.subscribers, unfiltered, args.customers, args.events))
+        print(
+            f"{args.subscribers} subscribers ({unfiltered:.0%} unfiltered): "
+            f"p50 {stats['p50_ms'] * 1000:.1f} us  p99 {stats['p99_ms'] * 1000:.1f} us per event"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Check that GET /orders pages are served from the composite indexes at 1M rows.
+
+Fills a temporary orders_new table (it shadows the real one for this
+connection only and is dropped on disconnect) with ``--rows`` synthetic
+orders, creates the indexes declared on Order, and runs EXPLAIN ANALYZE
+on the statements GET /orders builds: first and deep keyset pages, for
+no filter, a customer, a status and both. A page that sorts or scans the
+whole table fails the check (exit 1). An OFFSET page of the same depth
+is reported for comparison and is not checked.
+
+Needs Postgres (DATABASE_URL from the environment or backend/.env); the
+real tables are not read or written. Run migrate_schema.py to build the
+same indexes on the real table.
+
+Usage (from backend/):
+    python -m benchmarks.bench_order_pagination [--rows 1000000]
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from typing import Any, Iterator
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from database import engine
+from models import Order
+from routers.orders import _list_serializer, _list_statement
+
+PAGE_SIZE = 50
+STATUSES = ("pending", "completed", "review_needed", "cancelled", "error")
+
+_FILL_SQL = text(
+    "INSERT INTO orders_new (order_number, customer_id, customer_company_name,"
+    " order_date, status, items, subtotal, total_amount) "
+    "SELECT 'ORD-' || lpad(g::text, 8, '0'), 1 + g % 200, 'Acme Manufacturing',"
+    " timestamp '2024-01-01' + g * interval '30 seconds',"
+    f" (ARRAY[{', '.join(repr(s) for s in STATUSES)}])[1 + g % {len(STATUSES)}],"
+    " '[]'::json, 100, 100 "
+    "FROM generate_series(1, :rows) AS g"
+)
+
+# Key of the row half way down the newest-first list, for the deep pages
+_MIDPOINT_SQL = text(
+    "SELECT order_date, order_id FROM orders_new "
+    "ORDER BY order_date DESC, order_id DESC OFFSET :offset LIMIT 1"
+)
+
+
+async def _create_scratch_table(conn: AsyncConnection, rows: int) -> None:
+    table = Order.__table__
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect))
+    await conn.exec_driver_sql(ddl.replace("CREATE TABLE", "CREATE TEMPORARY TABLE", 1))
+    await conn.execute(_FILL_SQL, {"rows": rows})
+    for index in table.indexes:
+        await conn.exec_driver_sql(str(CreateIndex(index).compile(dialect=conn.dialect)))
+    await conn.exec_driver_sql("ANALYZE orders_new")
+
+
+async def _explain(conn: AsyncConnection, stmt: Any) -> dict[str, Any]:
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    result = await conn.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {compiled}", params
+    )
+    return result.scalar()[0]
+
+
+def _nodes(plan: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+
+def _problems(plan: dict[str, Any]) -> list[str]:
+    problems = []
+    for node in _nodes(plan):
+        if node["Node Type"] in ("Sort", "Incremental Sort"):
+            problems.append("sorts")
+        elif node["Node Type"] == "Seq Scan":
+            problems.append("scans the whole table")
+    return problems
+
+
+async def main(rows: int) -> None:
+    if engine.dialect.name != "postgresql":
+        sys.exit(f"needs Postgres, DATABASE_URL uses {engine.dialect.name}")
+
+    async with engine.connect() as conn:
+        print(f"filling a temporary orders_new with {rows:,} rows ...")
+        await _create_scratch_table(conn, rows)
+        midpoint = (await conn.execute(_MIDPOINT_SQL, {"offset": rows // 2})).one()
+        deep_key: tuple[datetime, int] = (midpoint.order_date, midpoint.order_id)
+
+        filters = {
+            "all": (None, None),
+            "customer": (7, None),
+            "status": (None, "review_needed"),
+            "customer+status": (7, "review_needed"),
+        }
+        cases = []
+        for label, (customer_id, status_filter) in filters.items():
+            for page, after_key in (("first", None), ("deep", deep_key)):
+                cases.append((f"{label} {page} page", customer_id, status_filter, after_key, 0, True))
+        cases.append((f"all OFFSET {rows // 2:,}", None, None, None, rows // 2, False))
+
+        print(f"\n{'case':<32} {'ms':>9} {'rows read':>10} {'index':<40}")
+        failures = []
+        for name, customer_id, status_filter, after_key, offset, checked in cases:
+            stmt = _list_statement(
+                _list_serializer.columns, customer_id, status_filter, after_key, offset, PAGE_SIZE
+            )
+            explained = await _explain(conn, stmt)
+            scans = [n for n in _nodes(explained["Plan"]) if "Relation Name" in n]
+            index = ", ".join(n.get("Index Name", n["Node Type"]) for n in scans)
+            rows_read = sum(n["Actual Rows"] * n.get("Actual Loops", 1) for n in scans)
+            print(f"{name:<32} {explained['Execution Time']:>9.2f} {rows_read:>10,} {index:<40}")
+            problems = _problems(explained["Plan"])
+            if checked and problems:
+                failures.append(f"{name}: {', '.join(sorted(set(problems)))}")
+
+    await engine.dispose()
+    if failures:
+        print(f"\n{len(failures)} page(s) not served from an index:", file=sys.stderr)
+        for line in failures:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print("\nevery keyset page is an index scan with no sort")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
@@ -0,0 +1,127 @@
+"""Per-request CPU of rebuilding hot statements vs the prebuilt registry.
+
+"rebuilt" constructs the statement on every call, as the handlers used to;
+SQLAlchemy then has to walk it to compute a cache key before it can reuse
+the compiled SQL. "registry" executes the statement from queries.py with
+bind parameters, so the cache key is computed once.
+
+Lookups run end to end against in-memory SQLite (the query itself costs
+microseconds, so the difference is mostly statement overhead). The status
+transition is Postgres-only; for it the benchmark times what is paid before
+the driver is reached: building the statement and computing its cache key.
+It also counts the distinct SQL texts asyncpg would prepare for 1..N ids
+with IN vs ``= ANY(:array)``.
+
+Usage (from backend/):
+    python -m benchmarks.bench_query_registry [--iterations 5000]
+"""
+
+import argparse
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, undefer_group
+
+from benchmarks.common import summarize, time_calls
+from models import Base, Customer, Order
+from queries import CUSTOMER_BY_ID, ORDER_DETAIL, ORDER_STATUSES, order_transition
+from services.order_status import allowed_sources
+
+
+def _seed(session: Session) -> None:
+    session.add(Customer(customer_id=1, company_name="Acme Manufacturing"))
+    session.add(Order(
+        order_id=1,
+        order_number="ORD-00000001",
+        customer_id=1,
+        customer_company_name="Acme Manufacturing",
+        order_date=datetime(2025, 1, 1),
+        status="pending",
+        items=[{"sku": "SKU-0001", "quantity": 3}],
+        subtotal=Decimal("10.00"),
+        total_amount=Decimal("10.00"),
+    ))
+    session.commit()
+
+
+def _rebuilt_transition(status: str, reviewed_by: str, expected_version: int):
+    criteria = [Order.order_id == 1, Order.status.in_(allowed_sources(status))]
+    criteria.append(Order.version == expected_version)
+    locked = (
+        select(Order.order_id, Order.status.label("previous_status"))
+        .where(*criteria)
+        .with_for_update()
+        .subquery("prev")
+    )
+    now = datetime.now()
+    return (
+        update(Order)
+        .where(Order.order_id == locked.c.order_id)
+        .values(status=status, updated_at=now, version=Order.version + 1,
+                reviewed_by=reviewed_by, reviewed_at=now)
+        .returning(*Order.__table__.columns, locked.c.previous_status)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--max-ids", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Customer.__table__, Order.__table__])
+    session = Session(engine)
+    _seed(session)
+
+    cases = {
+        "customer lookup": (
+            lambda: session.execute(
+                select(Customer).where(Customer.customer_id == 1)
+            ).scalar_one(),
+            lambda: session.execute(CUSTOMER_BY_ID, {"customer_id": 1}).scalar_one(),
+        ),
+        "order detail": (
+            lambda: session.execute(
+                select(Order).where(Order.order_id == 1).options(undefer_group("detail"))
+            ).scalar_one(),
+            lambda: session.execute(ORDER_DETAIL, {"order_id": 1}).scalar_one(),
+        ),
+        # Cache key generation is what SQLAlchemy does first on every execute.
+        "status transition": (
+            lambda: _rebuilt_transition("completed", "reviewer", 3)._generate_cache_key(),
+            lambda: order_transition(True, True)._generate_cache_key(),
+        ),
+    }
+
+    print(f"{'statement':<18} {'path':<9} {'p50 us':>9} {'mean us':>9}")
+    for name, (rebuilt, registry) in cases.items():
+        means = {}
+        for path, fn in (("rebuilt", rebuilt), ("registry", registry)):
+            stats = summarize(time_calls(fn, args.iterations, warmup=50))
+            means[path] = stats["mean_ms"]
+            print(f"{name:<18} {path:<9} {stats['p50_ms'] * 1000:>9.1f} {stats['mean_ms'] * 1000:>9.1f}")
+        print(f"{'':<18} saved     {(means['rebuilt'] - means['registry']) * 1000:>19.1f} us/request")
+        session.expunge_all()
+
+    dialect = postgresql.dialect()
+    sizes = range(1, args.max_ids + 1)
+    in_texts = {
+        str(
+            select(Order.order_id, Order.status)
+            .where(Order.order_id.in_(list(range(n))))
+            .compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+        )
+        for n in sizes
+    }
+    any_texts = {str(ORDER_STATUSES.compile(dialect=dialect)) for _ in sizes}
+    print(
+        f"\ndistinct SQL for 1..{args.max_ids} ids: IN={len(in_texts)} ANY={len(any_texts)}"
+        " (each distinct text is a separate asyncpg prepared statement)"
+    )
+
+
+if __name__ == "__main__":
+    main()
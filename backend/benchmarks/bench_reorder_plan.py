@@ -0,0 +1,104 @@
+"""Reorder-plan computation time on a synthetic catalog.
+
+Builds a sparse demand history (each SKU sells on ``--density`` of days)
+and times compute_plan() plus selecting the due SKUs. Database loading is
+excluded. Before timing, a catalog of near-zero-demand SKUs (single sales
+hundreds of days ago) is planned and every row materialized, as
+``include_all=true`` does; their dates must stay within the planning
+horizon.
+
+Usage (from backend/):
+    python -m benchmarks.bench_reorder_plan [--skus 100000] [--days 730] [--density 0.1]
+"""
+
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmarks.common import summarize, time_calls
+from services.reorder_planner import DemandHistory, StockArrays, compute_plan
+
+
+def make_catalog(skus: int, days: int, density: float) -> tuple[StockArrays, DemandHistory]:
+    rng = np.random.default_rng(skus)
+    stock = StockArrays(
+        inventory_id=np.arange(1, skus + 1, dtype=np.int64),
+        sku=[f"SKU-{i:06d}" for i in range(skus)],
+        product_name=["Widget"] * skus,
+        available=rng.integers(0, 5000, skus),
+        reorder_point=np.full(skus, 100, dtype=np.int64),
+        reorder_quantity=np.full(skus, 500, dtype=np.int64),
+        lead_time_days=rng.integers(3, 30, skus),
+    )
+    entries = int(skus * days * density)
+    history = DemandHistory(
+        sku_index=rng.integers(0, skus, entries),
+        day=rng.integers(0, days, entries),
+        qty=rng.integers(1, 200, entries).astype(np.float64),
+        days=days,
+    )
+    return stock, history
+
+
+def check_slow_movers(horizon_days: int) -> None:
+    """Plan SKUs whose only sale was long ago; dates past the horizon must be None."""
+    days = 730
+    sale_ages = (400, 200, 100)
+    n = len(sale_ages)
+    stock = StockArrays(
+        inventory_id=np.arange(1, n + 1, dtype=np.int64),
+        sku=[f"SLOW-{age}" for age in sale_ages],
+        product_name=["Widget"] * n,
+        available=np.full(n, 2000, dtype=np.int64),
+        reorder_point=np.full(n, 10, dtype=np.int64),
+        reorder_quantity=np.full(n, 50, dtype=np.int64),
+        lead_time_days=np.full(n, 7, dtype=np.int64),
+    )
+    history = DemandHistory(
+        sku_index=np.arange(n),
+        day=np.array([days - age for age in sale_ages], dtype=np.int64),
+        qty=np.ones(n),
+        days=days,
+    )
+    as_of = date.today()
+    plan = compute_plan(
+        stock, history, as_of, halflife_days=28.0, safety_z=1.65, review_days=30,
+        plan_horizon_days=horizon_days,
+    )
+    latest = as_of + timedelta(days=horizon_days)
+    for row in plan.to_rows(plan.select()):
+        for field in ("stockout_date", "reorder_date"):
+            assert row[field] is None or row[field] <= latest, (row["sku"], field, row[field])
+        assert row["status"] == "no_demand", (row["sku"], row["status"])
+    print(f"slow movers: {n} SKUs with a single sale 100-400 days ago planned as no_demand")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skus", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--density", type=float, default=0.1)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    check_slow_movers(horizon_days=365)
+    stock, history = make_catalog(args.skus, args.days, args.density)
+    as_of = date.today()
+
+    def run() -> None:
+        plan = compute_plan(
+            stock, history, as_of, halflife_days=28.0, safety_z=1.65, review_days=30,
+            plan_horizon_days=365,
+        )
+        plan.to_rows(plan.select(horizon_days=30, limit=500))
+
+    stats = summarize(time_calls(run, args.iterations, warmup=1))
+    print(
+        f"{args.skus} SKUs x {args.days} days, {len(history.qty)} demand entries: "
+        f"p50 {stats['p50_ms']:.1f} ms  p99 {stats['p99_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
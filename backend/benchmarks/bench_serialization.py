@@ -0,0 +1,57 @@
+"""Compare list-endpoint serialization paths.
+
+"pydantic" is FastAPI's response_model path: validate ORM objects into
+OrderRead, dump in JSON mode, encode with the stdlib json module.
+"rows" is the RowSerializer path used by the list endpoints.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--iterations 200]
+"""
+
+import argparse
+import gzip
+import json
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter
+
+from benchmarks.common import make_order_rows, summarize, time_calls
+from models import Order
+from schemas import OrderRead
+from serialization import row_serializer
+
+SIZES = (50, 500, 5000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(list[OrderRead])
+    serializer = row_serializer(OrderRead, Order)
+
+    print(f"{'rows':>6}  {'path':<9} {'p50 ms':>9} {'p99 ms':>9} {'bytes':>10} {'gzip':>9}")
+    for size in SIZES:
+        rows = make_order_rows(size)
+        objects = [SimpleNamespace(**row) for row in rows]
+
+        def pydantic_path() -> bytes:
+            models = adapter.validate_python(objects, from_attributes=True)
+            return json.dumps(adapter.dump_python(models, mode="json")).encode()
+
+        def rows_path() -> bytes:
+            return serializer.dumps(rows)
+
+        iterations = max(10, args.iterations * 50 // size)
+        for name, fn in (("pydantic", pydantic_path), ("rows", rows_path)):
+            stats = summarize(time_calls(fn, iterations))
+            body = fn()
+            print(
+                f"{size:>6}  {name:<9} {stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f}"
+                f" {len(body):>10} {len(gzip.compress(body)):>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
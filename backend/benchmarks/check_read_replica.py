@@ -0,0 +1,127 @@
+"""Check read-replica routing against two local Postgres instances.
+
+DATABASE_URL is the primary and DATABASE_REPLICA_URL the replica. The
+replica may be a streaming replica of the primary or an independent
+instance; the latter never receives the primary's writes, the worst case
+of replication lag. orders_new is created on either instance where it is
+missing. One order under a negative customer id is written to the
+primary and deleted again at the end.
+
+Checks, in order:
+
+    replica         a healthy replica serves reads
+    sticky          with REPLICA_STICKY_SECONDS, a caller's own write pins
+                    that caller (only) to the primary
+    invalidation    an analytics summary cached from the replica is
+                    recomputed on the primary right after an order write
+                    invalidates it, so the new entry includes the write
+    lagging         a replica over REPLICA_MAX_LAG_SECONDS is bypassed
+    down            a replica marked down is bypassed
+
+Exits 1 if any check fails.
+
+Usage (from backend/):
+    DATABASE_REPLICA_URL=postgresql+asyncpg://... python -m benchmarks.check_read_replica
+"""
+
+import asyncio
+import sys
+import time
+from decimal import Decimal
+
+from sqlalchemy import delete, text
+
+from config import settings
+from database import Base, async_session_factory, engine, replica_engine
+from models import Order
+from read_routing import read_router
+from routers.analytics import get_summary
+from services.analytics_cache import analytics_cache
+
+failures: list[str] = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    print(f"{'ok  ' if ok else 'FAIL'}  {name:<14} {detail}")
+    if not ok:
+        failures.append(name)
+
+
+async def _ensure_orders_table() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[Order.__table__])
+    async with replica_engine.begin() as conn:
+        if not await conn.scalar(text("SELECT pg_is_in_recovery()")):
+            await conn.run_sync(Base.metadata.create_all, tables=[Order.__table__])
+
+
+async def main() -> None:
+    if replica_engine is None:
+        sys.exit("set DATABASE_REPLICA_URL to the second Postgres instance")
+
+    await _ensure_orders_table()
+    customer_id = -int(time.time())  # no real customer has a negative id
+    settings.REPLICA_HEALTH_CHECK_SECONDS = 0.0  # re-check on every routing decision
+
+    try:
+        factory = await read_router.session_factory()
+        check("replica", read_router.is_replica(factory), f"lag {read_router.stats()['lag_seconds']}s")
+
+        settings.REPLICA_STICKY_SECONDS = 30.0
+        read_router.mark_write("check-writer")
+        writer = await read_router.session_factory("check-writer")
+        reader = await read_router.session_factory("check-reader")
+        check(
+            "sticky",
+            not read_router.is_replica(writer) and read_router.is_replica(reader),
+            "writer on primary, other callers on replica",
+        )
+        settings.REPLICA_STICKY_SECONDS = 0.0
+
+        # Recompute invalidated entries in the foreground rather than
+        # serving the stale one first.
+        settings.ANALYTICS_CACHE_STALE_SECONDS = 0.0
+        before = await get_summary(customer_id)
+        async with async_session_factory() as session:
+            session.add(Order(
+                order_number=f"CHECK{customer_id}",
+                customer_id=customer_id,
+                customer_company_name="Replica check",
+                items=[],
+                subtotal=Decimal("10.00"),
+                total_amount=Decimal("10.00"),
+            ))
+            await session.commit()
+        analytics_cache.invalidate()
+        after = await get_summary(customer_id)
+        check(
+            "invalidation",
+            after["total_orders"] == before["total_orders"] + 1,
+            f"orders {before['total_orders']} -> {after['total_orders']}",
+        )
+
+        max_lag = settings.REPLICA_MAX_LAG_SECONDS
+        settings.REPLICA_MAX_LAG_SECONDS = -1.0  # any lag is too much
+        factory = await read_router.session_factory()
+        check("lagging", not read_router.is_replica(factory), f"lag {read_router.stats()['lag_seconds']}s")
+        settings.REPLICA_MAX_LAG_SECONDS = max_lag
+
+        await read_router.session_factory()  # healthy again
+        read_router.mark_unhealthy("check_read_replica")
+        settings.REPLICA_HEALTH_CHECK_SECONDS = 3600.0
+        factory = await read_router.session_factory()
+        check("down", not read_router.is_replica(factory), "reads fall back to primary")
+    finally:
+        async with async_session_factory() as session:
+            await session.execute(delete(Order).where(Order.customer_id == customer_id))
+            await session.commit()
+        await engine.dispose()
+        await replica_engine.dispose()
+
+    print(f"\nrouting stats: {read_router.stats()}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
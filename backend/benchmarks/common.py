@@ -0,0 +1,80 @@
+"""Shared helpers for the benchmark scripts."""
+
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """p50/p99/mean of a list of durations, in milliseconds."""
+    return {
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+    }
+
+
+def time_calls(fn: Callable[[], Any], iterations: int, warmup: int = 3) -> list[float]:
+    """Call ``fn`` repeatedly and return the wall time of each call, in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples: list[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def make_order_rows(n: int, start: int = 0) -> list[dict]:
+    """Synthetic orders_new rows with 1-5 JSON line items each.
+
+    Rows get order ids ``start + 1`` to ``start + n``, so a large table can
+    be filled in batches.
+    """
+    rng = random.Random(n if not start else f"{start}:{n}")
+    base = datetime(2025, 1, 1)
+    rows = []
+    for i in range(start, start + n):
+        items = [
+            {
+                "sku": f"SKU-{rng.randrange(1000):04d}",
+                "product_name": "Widget",
+                "quantity": qty,
+                "unit_price": 15.5,
+                "line_total": 15.5 * qty,
+            }
+            for qty in (rng.randrange(1, 500) for _ in range(rng.randrange(1, 6)))
+        ]
+        total = Decimal(sum(int(it["line_total"] * 100) for it in items)) / 100
+        created = base + timedelta(minutes=i)
+        rows.append({
+            "order_id": i + 1,
+            "order_number": f"ORD-{i + 1:08d}",
+            "customer_id": rng.randrange(1, 50),
+            "customer_company_name": "Acme Manufacturing",
+            "order_date": created,
+            "status": rng.choice(["pending", "completed", "review_needed"]),
+            "items": items,
+            "subtotal": total,
+            "tax": Decimal("0.00"),
+            "shipping_cost": Decimal("0.00"),
+            "discount": Decimal("0.00"),
+            "total_amount": total,
+            "order_source": "text_file",
+            "ai_confidence_score": Decimal("95.00"),
+            "has_warnings": False,
+            "created_at": created,
+        })
+    return rows
@@ -0,0 +1,423 @@
+"""End-to-end load test of the API against stubbed AI providers.
+
+Starts benchmarks.stub_providers and a uvicorn backend whose Anthropic,
+ElevenLabs and White Circle base URLs point at it, then sends an open-loop
+request mix at ``--rps`` for ``--duration`` seconds: each request is
+started on schedule whether or not earlier ones have finished, and its
+latency is measured from its scheduled start, so a backed-up server shows
+up as latency rather than as a lower request rate. /health/pool is polled
+throughout for pool saturation.
+
+The mix (``--mix name=weight,...``) draws from:
+
+    process        POST /orders/process (customer and message vary)
+    orders         GET /orders?summary=true
+    order_detail   GET /orders/{order_id}
+    summary        GET /analytics/summary
+    timeseries     GET /analytics/timeseries
+    top_products   GET /analytics/top-products
+    inventory      GET /inventory
+    customers      GET /customers
+
+The backend uses DATABASE_URL from the environment or backend/.env, which
+must be seeded (python seed.py) and will receive the orders created; use a
+scratch database. Rate limiting is disabled in the spawned backend unless
+``--keep-rate-limits`` is given. With ``--target`` an already running
+backend is used instead (start it with the *_BASE_URL settings pointing at
+a stub). /health/pool reports one process, so pool figures only cover
+the whole server with ``--workers 1``.
+
+Results are written as JSON (``--output``) together with the commit they
+were measured on; ``--compare`` prints per-endpoint deltas against an
+earlier result file.
+
+Usage (from backend/):
+    python -m benchmarks.load_test [--rps 10] [--duration 60] [--mix process=1,orders=4] \\
+        [--latency anthropic=1500:0.35] [--errors anthropic=0.02] \\
+        [--output load.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.common import percentile
+from benchmarks.stub_providers import add_profile_arguments, parse_profiles
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_MIX = "process=1,orders=3,order_detail=2,summary=2,timeseries=1,top_products=1,inventory=1,customers=1"
+
+MESSAGES = [
+    "Hi, we need 200 steel brackets and 50 boxes of M8 bolts, express shipping please.",
+    "Please send the usual: 500 blue widgets, 100 gadget pros. Thanks!",
+    "Following up on my voicemail - 12 pallets of copper pipe and 40 pipe clamps.",
+    "Can you add 75 safety helmets and 75 hi-vis vests to this week's order?",
+    "Reorder of last month's fasteners, same quantities as before, plus 30 hinges.",
+]
+
+
+# ---------------------------------------------------------------------------
+# Processes
+# ---------------------------------------------------------------------------
+
+def _spawn(args: list[str], env: dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=None,
+    )
+
+
+async def _wait_ready(client: httpx.AsyncClient, url: str, proc: subprocess.Popen | None) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise SystemExit(f"{url}: process exited with status {proc.returncode}")
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.25)
+    raise SystemExit(f"{url} did not become ready within 30s")
+
+
+def _backend_env(args: argparse.Namespace, stub_url: str) -> dict[str, str]:
+    env = {
+        **os.environ,
+        "ANTHROPIC_BASE_URL": stub_url,
+        "ELEVENLABS_BASE_URL": stub_url,
+        "WHITE_CIRCLE_BASE_URL": stub_url,
+        "LOG_LEVEL": "WARNING",
+    }
+    for key in ("ANTHROPIC_API_KEY", "ELEVENLABS_API_KEY", "WHITE_CIRCLE_API_KEY"):
+        env.setdefault(key, "stub-key")
+    if not args.keep_rate_limits:
+        env["RATE_LIMIT_ENABLED"] = "false"
+    return env
+
+
+def _git_commit() -> dict[str, Any]:
+    def git(*cmd: str) -> str:
+        return subprocess.run(
+            ["git", *cmd], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain"))}
+
+
+# ---------------------------------------------------------------------------
+# Request mix
+# ---------------------------------------------------------------------------
+
+def _request(name: str, rng: random.Random, ctx: dict[str, list[int]]) -> tuple[str, str, Any]:
+    if name == "process":
+        return "POST", "/orders/process", {
+            "customer_id": rng.choice(ctx["customers"]),
+            "source_type": rng.choice(["text_file", "voice_message"]),
+            "original_message": rng.choice(MESSAGES),
+        }
+    if name == "order_detail":
+        return "GET", f"/orders/{rng.choice(ctx['orders'])}", None
+    paths = {
+        "orders": "/orders?summary=true&limit=50",
+        "summary": "/analytics/summary",
+        "timeseries": "/analytics/timeseries?granularity=day",
+        "top_products": "/analytics/top-products",
+        "inventory": "/inventory",
+        "customers": "/customers",
+    }
+    return "GET", paths[name], None
+
+
+def _parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def _context(client: httpx.AsyncClient, mix: dict[str, float]) -> dict[str, list[int]]:
+    resp = await client.get("/customers")
+    if resp.status_code != 200:
+        raise SystemExit(f"GET /customers returned {resp.status_code}; is the database reachable?")
+    customers = [c["customer_id"] for c in resp.json()]
+    orders = [o["order_id"] for o in (await client.get("/orders?summary=true&limit=200")).json()]
+    if not customers:
+        raise SystemExit("No customers in the database; run python seed.py first")
+    if mix.get("order_detail") and not orders:
+        raise SystemExit("No orders to fetch for order_detail; drop it from --mix or create some first")
+    return {"customers": customers, "orders": orders}
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+async def _poll_pool(client: httpx.AsyncClient, interval: float, samples: list[dict], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            samples.append((await client.get("/health/pool")).json()["primary"])
+        except (httpx.HTTPError, KeyError, ValueError):
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _wait_quantile(buckets: dict[str, int], start: dict[str, int], q: float) -> str | None:
+    """Upper bound (ms) of the wait bucket holding quantile ``q`` of new checkouts."""
+    deltas = [(bound, buckets[bound] - start.get(bound, 0)) for bound in buckets]
+    total = deltas[-1][1] if deltas else 0
+    if total <= 0:
+        return None
+    for bound, cumulative in deltas:
+        if cumulative >= q * total:
+            return bound
+    return deltas[-1][0]
+
+
+def _pool_report(samples: list[dict]) -> dict[str, Any]:
+    if len(samples) < 2:
+        return {}
+    first, last = samples[0], samples[-1]
+    checked_out = [s["checked_out"] for s in samples]
+    return {
+        "samples": len(samples),
+        "size": last["size"],
+        "checked_out_max": max(checked_out),
+        "checked_out_mean": round(statistics.fmean(checked_out), 2),
+        "overflow_max": max(s["overflow"] for s in samples),
+        "overflow_sample_fraction": round(sum(s["overflow"] > 0 for s in samples) / len(samples), 3),
+        "checkouts": last["checkouts"] - first["checkouts"],
+        "timeouts": last["timeouts"] - first["timeouts"],
+        "wait_ms_p50_bucket": _wait_quantile(last["wait_ms_buckets"], first["wait_ms_buckets"], 0.5),
+        "wait_ms_p99_bucket": _wait_quantile(last["wait_ms_buckets"], first["wait_ms_buckets"], 0.99),
+        "wait_seconds_total": round(last["wait_seconds_total"] - first["wait_seconds_total"], 6),
+    }
+
+
+def _latency_report(latencies: list[float], statuses: Counter, duration: float) -> dict[str, Any]:
+    errors = sum(n for status, n in statuses.items() if status == "error" or int(status) >= 400)
+    return {
+        "requests": sum(statuses.values()),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 3),
+        "status": dict(sorted(statuses.items())),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+async def run_load(args: argparse.Namespace, client: httpx.AsyncClient) -> dict[str, Any]:
+    mix = _parse_mix(args.mix)
+    ctx = await _context(client, mix)
+    rng = random.Random(args.seed)
+    names, weights = list(mix), list(mix.values())
+
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    statuses: dict[str, Counter] = {name: Counter() for name in names}
+
+    async def fire(name: str, scheduled: float) -> None:
+        method, path, body = _request(name, rng, ctx)
+        try:
+            resp = await client.request(method, path, json=body)
+            status = str(resp.status_code)
+        except httpx.HTTPError as e:
+            status = "error"
+            if args.verbose:
+                print(f"{name}: {type(e).__name__}: {e}", file=sys.stderr)
+        # from the scheduled start, so time queued behind a slow server counts
+        latencies[name].append(time.perf_counter() - scheduled)
+        statuses[name][status] += 1
+
+    pool_samples: list[dict] = []
+    stop = asyncio.Event()
+    poller = asyncio.create_task(_poll_pool(client, args.pool_interval, pool_samples, stop))
+
+    total = int(args.rps * args.duration)
+    tasks = []
+    started = time.perf_counter()
+    for i in range(total):
+        scheduled = started + i / args.rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name = rng.choices(names, weights)[0]
+        tasks.append(asyncio.create_task(fire(name, scheduled)))
+    sent = time.perf_counter() - started
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await poller
+
+    all_latencies = [s for samples in latencies.values() for s in samples]
+    all_statuses = sum(statuses.values(), Counter())
+    return {
+        "duration_s": round(elapsed, 3),
+        "send_duration_s": round(sent, 3),
+        "overall": _latency_report(all_latencies, all_statuses, elapsed),
+        "endpoints": {
+            name: _latency_report(latencies[name], statuses[name], elapsed)
+            for name in names
+            if statuses[name]
+        },
+        "pool": _pool_report(pool_samples),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def _print_results(results: dict[str, Any]) -> None:
+    overall = results["overall"]
+    print(
+        f"\n{overall['requests']} requests in {results['duration_s']:.1f}s "
+        f"({overall['throughput_rps']:.2f} rps achieved, {results['config']['rps']} target), "
+        f"{overall['errors']} errors"
+    )
+    print(f"{'endpoint':<14} {'reqs':>6} {'err':>5} {'rps':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, r in [*results["endpoints"].items(), ("ALL", overall)]:
+        print(
+            f"{name:<14} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>7.2f} "
+            f"{r['p50_ms']:>9.1f} {r['p90_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f}"
+        )
+    pool = results["pool"]
+    if pool:
+        print(
+            f"\npool: size {pool['size']}, checked out max {pool['checked_out_max']} "
+            f"(mean {pool['checked_out_mean']}), overflow max {pool['overflow_max']}, "
+            f"timeouts {pool['timeouts']}, checkout wait p50 <= {pool['wait_ms_p50_bucket']} ms, "
+            f"p99 <= {pool['wait_ms_p99_bucket']} ms"
+        )
+    for name, s in results.get("providers", {}).items():
+        print(f"stub {name}: {s['requests']} requests, {s['errors']} injected errors")
+
+
+def _print_comparison(results: dict[str, Any], baseline: dict[str, Any]) -> None:
+    print(f"\nvs {baseline.get('git', {}).get('commit') or 'baseline'}:")
+    print(f"{'endpoint':<14} {'rps':>16} {'p50 ms':>20} {'p99 ms':>20}")
+    rows = [*results["endpoints"].items(), ("ALL", results["overall"])]
+    for name, r in rows:
+        old = baseline["overall"] if name == "ALL" else baseline.get("endpoints", {}).get(name)
+        if old is None:
+            continue
+        cells = []
+        for key in ("throughput_rps", "p50_ms", "p99_ms"):
+            change = (r[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            cells.append(f"{old[key]:.1f}->{r[key]:.1f} ({change:+.0f}%)")
+        print(f"{name:<14} {cells[0]:>16} {cells[1]:>20} {cells[2]:>20}")
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    profiles = parse_profiles(args.latency, args.errors)
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    procs: list[subprocess.Popen] = []
+    try:
+        stub_args = ["-m", "benchmarks.stub_providers", "--port", str(args.stub_port)]
+        for spec in args.latency:
+            stub_args += ["--latency", spec]
+        for spec in args.errors:
+            stub_args += ["--errors", spec]
+        if args.seed is not None:
+            stub_args += ["--seed", str(args.seed)]
+        stub = _spawn(stub_args, dict(os.environ))
+        procs.append(stub)
+
+        target = args.target
+        backend = None
+        if target is None:
+            target = f"http://127.0.0.1:{args.port}"
+            backend = _spawn(
+                ["-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+                 "--workers", str(args.workers), "--log-level", "warning"],
+                _backend_env(args, stub_url),
+            )
+            procs.append(backend)
+
+        limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+        async with httpx.AsyncClient(base_url=target, timeout=args.timeout, limits=limits) as client:
+            await _wait_ready(client, f"{stub_url}/stats", stub)
+            await _wait_ready(client, f"{target}/health", backend)
+            results = await run_load(args, client)
+            results["providers"] = {
+                name: {"requests": s["requests"], "errors": s["errors"]}
+                for name, s in (await client.get(f"{stub_url}/stats")).json().items()
+            }
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    return {
+        "version": 1,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git": _git_commit(),
+        "config": {
+            "rps": args.rps,
+            "duration": args.duration,
+            "mix": _parse_mix(args.mix),
+            "workers": args.workers if args.target is None else None,
+            "target": args.target,
+            "rate_limits": None if args.target else args.keep_rate_limits,
+            "seed": args.seed,
+            "provider_profiles": {name: asdict(p) for name, p in profiles.items()},
+        },
+        **results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rps", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="name=weight,... (see module docstring)")
+    parser.add_argument("--target", default=None, help="URL of a running backend (default: spawn one)")
+    parser.add_argument("--port", type=int, default=8100, help="port for the spawned backend")
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the spawned backend")
+    parser.add_argument("--keep-rate-limits", action="store_true")
+    parser.add_argument("--max-connections", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout (s)")
+    parser.add_argument("--pool-interval", type=float, default=0.5, help="seconds between /health/pool polls")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=None, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, default=None, help="earlier results JSON to diff against")
+    parser.add_argument("--verbose", action="store_true", help="print transport errors")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    _print_results(results)
+    if args.compare is not None:
+        _print_comparison(results, json.loads(args.compare.read_text()))
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Local stand-ins for the Anthropic, ElevenLabs and White Circle APIs.
+
+One server answers all three, so the backend can be pointed at it with
+ANTHROPIC_BASE_URL, ELEVENLABS_BASE_URL and WHITE_CIRCLE_BASE_URL set to
+the same URL:
+
+    POST /v1/messages          Anthropic messages; returns a JSON array of
+                               order items picked from the catalog in the
+                               system prompt, with token usage
+    POST /v1/speech-to-text    ElevenLabs speech-to-text
+    POST /policies/verify      White Circle policy verification ("allow")
+    GET  /stats                requests and injected errors per provider
+
+Each provider answers after a log-normal delay (median and sigma, so p99 is
+about median * exp(2.33 * sigma)) and fails a given fraction of requests
+with the status its real API uses when overloaded. The Anthropic SDK
+retries 529s, so injected Anthropic errors show up as extra latency before
+they show up as failed orders.
+
+Usage (from backend/):
+    python -m benchmarks.stub_providers [--port 9100] [--latency anthropic=1500:0.35] [--errors anthropic=0.02]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# "SKU | Product Name | $price" lines of the order extraction prompt
+_CATALOG_LINE = re.compile(r"^(\S+) \| (.+?) \| \$", re.MULTILINE)
+
+_TRANSCRIPT = (
+    "Hi, this is Sarah from BuildCo. We need two hundred of the steel brackets "
+    "and fifty boxes of the M8 bolts, shipped express please."
+)
+
+
+@dataclass
+class ProviderProfile:
+    """Latency distribution and error rate of one stubbed provider."""
+
+    median_ms: float
+    sigma: float = 0.3
+    error_rate: float = 0.0
+    error_status: int = 503
+
+    def delay(self, rng: random.Random) -> float:
+        if self.sigma <= 0:
+            return self.median_ms / 1000
+        return rng.lognormvariate(0.0, self.sigma) * self.median_ms / 1000
+
+
+DEFAULT_PROFILES = {
+    "anthropic": ProviderProfile(median_ms=1500, sigma=0.35, error_status=529),
+    "elevenlabs": ProviderProfile(median_ms=800, sigma=0.3),
+    "white_circle": ProviderProfile(median_ms=120, sigma=0.3),
+}
+
+
+def parse_profiles(latency: list[str], errors: list[str]) -> dict[str, ProviderProfile]:
+    """Apply ``provider=median_ms[:sigma]`` and ``provider=rate`` overrides to the defaults."""
+    profiles = {name: ProviderProfile(**asdict(p)) for name, p in DEFAULT_PROFILES.items()}
+    for spec in latency:
+        name, _, value = spec.partition("=")
+        median, _, sigma = value.partition(":")
+        profiles[name].median_ms = float(median)
+        if sigma:
+            profiles[name].sigma = float(sigma)
+    for spec in errors:
+        name, _, rate = spec.partition("=")
+        profiles[name].error_rate = float(rate)
+    return profiles
+
+
+# ---------------------------------------------------------------------------
+# Provider responses
+# ---------------------------------------------------------------------------
+
+def _anthropic_response(body: dict[str, Any], rng: random.Random) -> dict[str, Any]:
+    system = body.get("system") or ""
+    if isinstance(system, list):
+        system = "".join(block.get("text", "") for block in system)
+    user = "".join(
+        m["content"] if isinstance(m["content"], str) else json.dumps(m["content"])
+        for m in body.get("messages", [])
+    )
+    catalog = _CATALOG_LINE.findall(system)
+    if catalog:
+        # OrderProcessor's prompt: catalog SKUs, occasionally one it can't match
+        picks = rng.sample(catalog, min(len(catalog), rng.randint(1, 5)))
+        items = [
+            {"sku": sku, "product_name": name, "quantity": rng.randint(1, 300)}
+            for sku, name in picks
+        ]
+        if rng.random() < 0.05:
+            items.append({"sku": "UNKNOWN", "product_name": "Mystery part", "quantity": 1})
+    else:
+        # AIService's transcript extraction prompt
+        items = [
+            {"sku": f"SKU-{rng.randrange(10000):04d}", "qty": rng.randint(1, 300), "color": "default"}
+            for _ in range(rng.randint(1, 5))
+        ]
+    text = json.dumps(items)
+    return {
+        "id": f"msg_stub_{rng.getrandbits(48):012x}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "claude-stub"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            # roughly four characters per token
+            "input_tokens": (len(system) + len(user)) // 4,
+            "output_tokens": len(text) // 4,
+        },
+    }
+
+
+def _error_body(provider: str, status: int) -> dict[str, Any]:
+    if provider == "anthropic":
+        return {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded (stub)"}}
+    return {"detail": f"{provider} stub error ({status})"}
+
+
+def create_app(profiles: dict[str, ProviderProfile], seed: int | None = None) -> Starlette:
+    rng = random.Random(seed)
+    stats = {name: {"requests": 0, "errors": 0} for name in profiles}
+
+    async def respond(provider: str, request: Request) -> JSONResponse:
+        profile = profiles[provider]
+        stats[provider]["requests"] += 1
+        if request.headers.get("content-type", "").startswith("application/json"):
+            body = await request.json()
+        else:
+            await request.body()  # drain uploads (audio files)
+            body = {}
+        await asyncio.sleep(profile.delay(rng))
+        if rng.random() < profile.error_rate:
+            stats[provider]["errors"] += 1
+            return JSONResponse(_error_body(provider, profile.error_status), status_code=profile.error_status)
+        if provider == "anthropic":
+            return JSONResponse(_anthropic_response(body, rng))
+        if provider == "elevenlabs":
+            return JSONResponse({"text": _TRANSCRIPT, "language_code": "en"})
+        return JSONResponse({"decision": "allow", "actions": [], "reason": "stub"})
+
+    async def messages(request: Request) -> JSONResponse:
+        return await respond("anthropic", request)
+
+    async def speech_to_text(request: Request) -> JSONResponse:
+        return await respond("elevenlabs", request)
+
+    async def verify(request: Request) -> JSONResponse:
+        return await respond("white_circle", request)
+
+    async def get_stats(request: Request) -> JSONResponse:
+        return JSONResponse({
+            name: {**stats[name], "profile": asdict(profiles[name])} for name in profiles
+        })
+
+    return Starlette(routes=[
+        Route("/v1/messages", messages, methods=["POST"]),
+        Route("/v1/speech-to-text", speech_to_text, methods=["POST"]),
+        Route("/policies/verify", verify, methods=["POST"]),
+        Route("/stats", get_stats),
+    ])
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--latency", action="append", default=[], metavar="PROVIDER=MEDIAN_MS[:SIGMA]",
+        help="provider latency (providers: anthropic, elevenlabs, white_circle)",
+    )
+    parser.add_argument(
+        "--errors", action="append", default=[], metavar="PROVIDER=RATE",
+        help="fraction of provider requests to fail",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--seed", type=int, default=None)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    app = create_app(parse_profiles(args.latency, args.errors), args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import logging
 import sys
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -19,8 +20,105 @@ class Settings(BaseSettings):
     WHITE_CIRCLE_API_KEY: str = ""
     ELEVENLABS_API_KEY: str = ""
     OPENAI_API_KEY: str = ""
+    # Provider endpoints; override to point at local stubs (see
+    # benchmarks/load_test.py). "" keeps the Anthropic SDK default.
+    ANTHROPIC_BASE_URL: str = ""
+    ELEVENLABS_BASE_URL: str = "https://api.elevenlabs.io"
+    WHITE_CIRCLE_BASE_URL: str = "https://api.whitecircle.ai"
     SAFETY_MODE: str = "log"
     LOG_LEVEL: str = "INFO"
+    GZIP_MINIMUM_SIZE: int = 1024
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Database connection pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # -1 disables recycling
+    # "pre_ping" (ping on every checkout), "idle_ping" (ping only connections
+    # idle longer than DB_POOL_IDLE_PING_SECONDS) or "none" (rely on recycle).
+    DB_POOL_LIVENESS: str = "pre_ping"
+    DB_POOL_IDLE_PING_SECONDS: float = 60.0
+    # asyncpg prepared statement caches; set to 0 behind PgBouncer in
+    # transaction mode (e.g. Neon's pooled endpoint).
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Checkouts held longer than this are reported (with their route) by /health/pool.
+    DB_POOL_HOLD_WARN_SECONDS: float = 5.0
+
+    # Prometheus metrics on /metrics (per-route and per-stage latency, tokens)
+    METRICS_ENABLED: bool = True
+
+    # Request tracing: span trees of requests slower than TRACE_SLOW_REQUEST_MS
+    # are kept for /admin/traces and optionally appended to TRACE_EXPORT_PATH
+    # as OTLP/JSON lines.
+    TRACING_ENABLED: bool = True
+    TRACE_SLOW_REQUEST_MS: float = 2000.0
+    TRACE_BUFFER_SIZE: int = 100
+    TRACE_MAX_SPANS: int = 5000
+    TRACE_EXPORT_PATH: str = ""
+
+    # Request profiling (statistical stack sampling), off by default. With it
+    # on, PROFILING_SAMPLE_RATE of requests are profiled, plus any request
+    # sent with X-Profile and a valid X-Admin-Token. See /admin/profiles.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_MAX_PER_ROUTE: int = 20
+
+    # X-Admin-Token value for /admin endpoints ("" disables them)
+    ADMIN_TOKEN: str = ""
+
+    # Read replica for analytics, list and export reads ("" = primary only)
+    DATABASE_REPLICA_URL: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_HEALTH_CHECK_SECONDS: float = 5.0
+    # After a caller's own write, route their reads to the primary for this
+    # long (0 disables read-your-writes stickiness).
+    REPLICA_STICKY_SECONDS: float = 0.0
+
+    # Rate limiting for /orders/process (token buckets, refill in units/second)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per-process) or "postgres" (shared)
+    RATE_LIMIT_CUSTOMER_CAPACITY: float = 20.0
+    RATE_LIMIT_CUSTOMER_REFILL_RATE: float = 0.2
+    RATE_LIMIT_CALLER_CAPACITY: float = 40.0
+    RATE_LIMIT_CALLER_REFILL_RATE: float = 0.5
+    RATE_LIMIT_CHARS_PER_UNIT: int = 2000
+
+    # Idempotency-Key handling for /orders/process
+    IDEMPOTENCY_RETENTION_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 120
+
+    # Analytics response cache (invalidated by order writes)
+    ANALYTICS_CACHE_ENABLED: bool = True
+    ANALYTICS_CACHE_TTL_SECONDS: float = 300.0
+    ANALYTICS_CACHE_STALE_SECONDS: float = 30.0
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 1024
+
+    # LLM models, usage accounting and daily budgets (USD; 0 = unlimited).
+    # Once a budget is spent, LLM_BUDGET_ACTION "downgrade" switches order
+    # extraction to LLM_FALLBACK_MODEL and "defer" rejects it with 429
+    # until the next day.
+    LLM_EXTRACTION_MODEL: str = "claude-sonnet-4-5-20250929"
+    LLM_FALLBACK_MODEL: str = "claude-haiku-4-5-20251001"
+    LLM_DAILY_BUDGET_USD: float = 0.0
+    LLM_CUSTOMER_DAILY_BUDGET_USD: float = 0.0
+    LLM_CUSTOMER_BUDGETS_USD: dict[int, float] = {}  # per-customer overrides, JSON
+    LLM_BUDGET_ACTION: Literal["downgrade", "defer"] = "downgrade"
+
+    # Reorder planning
+    REORDER_HISTORY_DAYS: int = 730
+    REORDER_DEMAND_HALFLIFE_DAYS: float = 28.0
+    REORDER_SAFETY_Z: float = 1.65
+    REORDER_REVIEW_DAYS: int = 30
+    # Stockout and reorder dates further out than this are not projected
+    REORDER_PLAN_HORIZON_DAYS: int = 365
+
+    # Order change feed (/orders/stream)
+    ORDER_EVENTS_BACKEND: str = "memory"  # "memory" (single node) or "postgres" (LISTEN/NOTIFY)
+    ORDER_EVENTS_REPLAY_SIZE: int = 1000
+    ORDER_EVENTS_CLIENT_BUFFER: int = 256
+    ORDER_EVENTS_HEARTBEAT_SECONDS: float = 15.0
 
     # Blaxel
     BL_WORKSPACE: str = ""
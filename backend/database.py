@@ -1,12 +1,61 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import Any
+
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
 
 from config import settings
+from pool_metrics import (
+    InstrumentedQueuePool,
+    PoolMetrics,
+    install_idle_ping,
+    pool_metrics,
+    replica_pool_metrics,
+)
+from tracing import instrument_engine
+
+
+def _engine_options(url: str) -> dict[str, Any]:
+    options: dict[str, Any] = {
+        "echo": False,
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_LIVENESS == "pre_ping",
+    }
+    if make_url(url).get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            # SQLAlchemy's prepared statement cache and asyncpg's own.
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+def _create_engine(url: str, role: str, metrics: PoolMetrics) -> AsyncEngine:
+    new_engine = create_async_engine(url, **_engine_options(url))
+    if settings.DB_POOL_LIVENESS == "idle_ping":
+        install_idle_ping(new_engine.sync_engine, settings.DB_POOL_IDLE_PING_SECONDS)
+    metrics.attach(new_engine.sync_engine)
+    if settings.TRACING_ENABLED:
+        instrument_engine(new_engine.sync_engine, role)
+    return new_engine
+
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True,
+engine = _create_engine(settings.DATABASE_URL, "primary", pool_metrics)
+
+# Optional read replica; see read_routing.py for when it is used.
+replica_engine: AsyncEngine | None = (
+    _create_engine(settings.DATABASE_REPLICA_URL, "replica", replica_pool_metrics)
+    if settings.DATABASE_REPLICA_URL
+    else None
 )
 
 async_session_factory = async_sessionmaker(
@@ -15,6 +64,25 @@ async_session_factory = async_sessionmaker(
     expire_on_commit=False,
 )
 
+replica_session_factory: async_sessionmaker[AsyncSession] | None = (
+    async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    if replica_engine is not None
+    else None
+)
+
 
 class Base(DeclarativeBase):
     pass
+
+
+async def init_models() -> None:
+    """Create any tables declared on ``Base`` that do not exist yet.
+
+    Existing tables are left untouched (``create_all`` is checkfirst). Only
+    migrate_schema.py calls this, after creating the extensions the indexes
+    need and under its advisory lock; the API workers never create tables.
+    """
+    import models  # noqa: F401  — register all mappers on Base.metadata
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
@@ -1,14 +1,56 @@
+import hmac
 from typing import Annotated, AsyncGenerator
 
-from fastapi import Depends
+from fastapi import Depends, Header, HTTPException, Request, status
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import settings
 from database import async_session_factory
+from read_routing import CALLER_KEY, read_router
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+def get_caller_id(request: Request) -> str:
+    """Identify the caller by client address.
+
+    The API has no authentication, and client-supplied headers cannot
+    identify anyone: a new value per request would get a fresh rate-limit
+    bucket each time. Behind a reverse proxy, run uvicorn with
+    ``--proxy-headers --forwarded-allow-ips=<proxy>`` so the address is
+    taken from the trusted proxy's X-Forwarded-For.
+    """
+    return request.client.host if request.client else "unknown"
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     async with async_session_factory() as session:
+        # Commits record the caller for read-your-writes routing.
+        session.info[CALLER_KEY] = get_caller_id(request)
         yield session
 
 
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes: the replica when usable, else the primary."""
+    factory = await read_router.session_factory(get_caller_id(request))
+    async with factory() as session:
+        try:
+            yield session
+        except (OperationalError, InterfaceError, OSError) as e:
+            # Replica unreachable or failing: send reads to the primary
+            # until the next health check.
+            if read_router.is_replica(factory):
+                read_router.mark_unhealthy(str(e))
+            raise
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """Allow /admin endpoints only with the configured X-Admin-Token."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Admin endpoints are disabled")
+    if not hmac.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
 DBSession = Annotated[AsyncSession, Depends(get_db)]
+ReadOnlyDBSession = Annotated[AsyncSession, Depends(get_read_db)]
+CallerID = Annotated[str, Depends(get_caller_id)]
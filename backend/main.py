@@ -1,11 +1,22 @@
 import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from sqlalchemy import inspect
 
 from config import settings, validate_settings
-from routers import analytics, customers, inventory, orders
+from metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from pagination import NEXT_CURSOR_HEADER
+from pool_metrics import RouteContextMiddleware, pool_metrics, replica_pool_metrics
+from profiling import ProfilingMiddleware
+from read_routing import read_router
+from serialization import FastJSONResponse
+from routers import admin, analytics, customers, exports, inventory, orders
+from services.order_events import order_events
+from tracing import TracingMiddleware
 
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
@@ -14,10 +25,21 @@ logging.basicConfig(
 
 validate_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # The schema is created by migrate_schema.py, not by each worker.
+    await order_events.start()
+    yield
+    await order_events.stop()
+
+
 app = FastAPI(
     title="OrderFlow AI",
     version="0.2.0",
     description="AI-driven order entry from voice and text interactions.",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # ---------------------------------------------------------------------------
@@ -29,8 +51,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Compress large list/export payloads; small responses are sent as-is.
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
+# Tag DB checkouts with the route holding them (see /health/pool).
+app.add_middleware(RouteContextMiddleware)
+
+# Per-route latency histograms (see /metrics).
+app.add_middleware(MetricsMiddleware)
+
+# Span trees of slow requests (see /admin/traces).
+app.add_middleware(TracingMiddleware)
+
+# Opt-in request profiling (see /admin/profiles); not installed when disabled.
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # ---------------------------------------------------------------------------
 # Routers
 # ---------------------------------------------------------------------------
@@ -38,8 +77,28 @@ app.include_router(customers.router)
 app.include_router(orders.router)
 app.include_router(analytics.router)
 app.include_router(inventory.router)
+app.include_router(exports.router)
+app.include_router(admin.router)
 
 
 @app.get("/health")
 async def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/health/pool")
+async def pool_health() -> dict:
+    """Live connection pool state: checkouts, overflow, wait histogram, long holds."""
+    return {
+        "primary": pool_metrics.snapshot(),
+        "replica": replica_pool_metrics.snapshot() if read_router.stats()["configured"] else None,
+        "read_routing": read_router.stats(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,283 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from config import settings
+from pool_metrics import PoolMetrics, pool_metrics, replica_pool_metrics
+from tracing import span
+
+# Prometheus text exposition format, version 0.0.4.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds); the last bucket is +Inf. Stages range from
+# sub-millisecond lookups to multi-second provider calls.
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter, one series per label combination."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label combination.
+
+    An observation is one bisect and three additions under a lock; buckets
+    are only accumulated when rendering.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the duration of the ``with`` block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, "+Inf"), series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {_number(cumulative)}"
+                )
+            label_str = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {series[-1]!r}")
+            lines.append(f"{self.name}_count{label_str} {_number(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics exposed on /metrics, plus collectors that render live state."""
+
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[Callable[[], list[str]]] = []
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], list[str]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+PIPELINE_STAGE_SECONDS = registry.histogram(
+    "orderflow_pipeline_stage_seconds",
+    "Duration of order pipeline stages.",
+    ("stage",),
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "orderflow_http_request_duration_seconds",
+    "HTTP request duration by route template.",
+    ("method", "route", "status"),
+)
+LLM_TOKENS = registry.counter(
+    "orderflow_llm_tokens_total",
+    "LLM tokens by model and kind (input, output, cache_read, cache_creation).",
+    ("model", "kind"),
+)
+PROVIDER_ERRORS = registry.counter(
+    "orderflow_provider_errors_total",
+    "Failed calls to external providers by provider and error type.",
+    ("provider", "error"),
+)
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Time one pipeline stage into PIPELINE_STAGE_SECONDS and the request trace."""
+    with span(f"stage.{stage}"), PIPELINE_STAGE_SECONDS.time(stage):
+        yield
+
+
+def record_usage(model: str, usage: Any) -> None:
+    """Count the tokens reported in an Anthropic response's ``usage``."""
+    if usage is None:
+        return
+    for kind, attr in (
+        ("input", "input_tokens"),
+        ("output", "output_tokens"),
+        ("cache_read", "cache_read_input_tokens"),
+        ("cache_creation", "cache_creation_input_tokens"),
+    ):
+        tokens = getattr(usage, attr, None)
+        if tokens:
+            LLM_TOKENS.inc(model, kind, amount=tokens)
+
+
+def record_provider_error(provider: str, exc: BaseException) -> None:
+    PROVIDER_ERRORS.inc(provider, type(exc).__name__)
+
+
+# ---------------------------------------------------------------------------
+# Connection pool collector
+# ---------------------------------------------------------------------------
+
+def _pool_lines(pool: str, metrics: PoolMetrics) -> list[str]:
+    snap = metrics.snapshot()
+    label = f'pool="{pool}"'
+    lines = [
+        f"orderflow_db_pool_size{{{label}}} {snap['size']}",
+        f"orderflow_db_pool_checked_out{{{label}}} {snap['checked_out']}",
+        f"orderflow_db_pool_overflow{{{label}}} {snap['overflow']}",
+        f"orderflow_db_pool_timeouts_total{{{label}}} {snap['timeouts']}",
+        f"orderflow_db_pool_long_holds_total{{{label}}} {snap['long_holds']}",
+    ]
+    for bound, cumulative in snap["wait_ms_buckets"].items():
+        le = bound if bound == "+Inf" else str(int(bound) / 1000)
+        lines.append(
+            f'orderflow_db_pool_wait_seconds_bucket{{{label},le="{le}"}} {cumulative}'
+        )
+    lines.append(f"orderflow_db_pool_wait_seconds_sum{{{label}}} {snap['wait_seconds_total']}")
+    lines.append(f"orderflow_db_pool_wait_seconds_count{{{label}}} {snap['checkouts']}")
+    return lines
+
+
+def _collect_pools() -> list[str]:
+    lines = [
+        "# TYPE orderflow_db_pool_size gauge",
+        "# TYPE orderflow_db_pool_checked_out gauge",
+        "# TYPE orderflow_db_pool_overflow gauge",
+        "# TYPE orderflow_db_pool_timeouts_total counter",
+        "# TYPE orderflow_db_pool_long_holds_total counter",
+        "# TYPE orderflow_db_pool_wait_seconds histogram",
+    ]
+    lines.extend(_pool_lines("primary", pool_metrics))
+    if replica_pool_metrics.pool is not None:
+        lines.extend(_pool_lines("replica", replica_pool_metrics))
+    return lines
+
+
+registry.add_collector(_collect_pools)
+
+
+# ---------------------------------------------------------------------------
+# Per-route HTTP middleware
+# ---------------------------------------------------------------------------
+
+class MetricsMiddleware:
+    """Time every HTTP request into HTTP_REQUEST_SECONDS.
+
+    Requests are labelled with the matched route template (e.g.
+    ``/orders/{order_id}``), never the raw path, so series stay bounded;
+    unmatched paths share the ``unmatched`` label. Streaming responses are
+    timed until the stream ends.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", None) or "unmatched",
+                str(status_code),
+            )
@@ -0,0 +1,115 @@
+"""Create and update the database schema without blocking the application.
+
+This is the only place the schema is created: the API workers assume it
+exists. Run it once per deploy, before the new workers start. Extensions
+are created first, because the trigram indexes on inventory need pg_trgm,
+then init_models() creates any missing tables. Concurrent runs are
+serialized on a Postgres advisory lock.
+
+Columns are added with ADD COLUMN IF NOT EXISTS, only when missing, and
+under a short lock_timeout: the ALTER takes an ACCESS EXCLUSIVE lock, so it
+fails fast instead of queueing every query behind a long transaction.
+New columns must be nullable or have a constant server default, so no
+table rewrite is needed. Indexes are built with CREATE INDEX CONCURRENTLY,
+so writes to the table continue while they build. Every statement is
+idempotent and the script can be re-run; an index left invalid by an
+interrupted concurrent build is dropped and rebuilt.
+
+Usage:
+    python migrate_schema.py [--dry-run]
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from database import Base, engine, init_models
+
+_EXTENSIONS = ("pg_trgm",)  # trigram indexes for /inventory/search
+_LOCK_TIMEOUT = "5s"
+_ADVISORY_LOCK_ID = 0x4F524446  # "ORDF"; any constant shared by every run
+
+_INVALID_INDEX_SQL = text(
+    "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+    "WHERE c.relname = :name AND pg_table_is_visible(c.oid) AND NOT i.indisvalid"
+)
+
+
+def _existing_columns(sync_conn) -> dict[str, set[str]]:
+    inspector = inspect(sync_conn)
+    return {
+        table.name: {col["name"] for col in inspector.get_columns(table.name)}
+        for table in Base.metadata.sorted_tables
+        if inspector.has_table(table.name)
+    }
+
+
+async def main(dry_run: bool) -> None:
+    import models  # noqa: F401  — register all mappers on Base.metadata
+
+    if engine.dialect.name != "postgresql":
+        print(f"Creating missing tables on {engine.dialect.name}; there is nothing else to migrate.")
+        if not dry_run:
+            await init_models()
+        await engine.dispose()
+        return
+
+    async with engine.connect() as conn:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        preparer = conn.dialect.identifier_preparer
+        # Held for the whole connection, so two deploys cannot race on
+        # CREATE TABLE or build the same index twice.
+        await conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+
+        async def run(sql: str) -> None:
+            print(sql)
+            if not dry_run:
+                await conn.exec_driver_sql(sql)
+
+        for extension in _EXTENSIONS:
+            await run(f"CREATE EXTENSION IF NOT EXISTS {preparer.quote(extension)}")
+
+        if dry_run:
+            print("-- init_models(): create missing tables")
+        else:
+            await init_models()
+
+        existing = await conn.run_sync(_existing_columns)
+        compiler = conn.dialect.ddl_compiler(conn.dialect, None)
+        await run(f"SET lock_timeout = '{_LOCK_TIMEOUT}'")
+        for table in Base.metadata.sorted_tables:
+            columns = existing.get(table.name)
+            if columns is None:
+                continue  # not created yet (--dry-run); init_models() adds it whole
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                spec = compiler.get_column_specification(column)
+                spec = spec.removeprefix(preparer.format_column(column))
+                await run(
+                    f"ALTER TABLE {preparer.quote_identifier(table.name)} "
+                    f"ADD COLUMN IF NOT EXISTS {preparer.quote_identifier(column.name)}{spec}"
+                )
+        await run("RESET lock_timeout")
+
+        for table in Base.metadata.sorted_tables:
+            for index in sorted(table.indexes, key=lambda ix: ix.name):
+                invalid = await conn.scalar(_INVALID_INDEX_SQL, {"name": index.name})
+                if invalid:
+                    await run(f"DROP INDEX CONCURRENTLY IF EXISTS {preparer.quote(index.name)}")
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+                await run(ddl.replace("INDEX", "INDEX CONCURRENTLY", 1))
+
+        await conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _ADVISORY_LOCK_ID})
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="print the statements only")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run))
@@ -4,12 +4,16 @@ from typing import Optional
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     Computed,
     Date,
     DateTime,
+    Float,
+    Index,
     Integer,
     Numeric,
+    Sequence,
     String,
     Text,
     func,
@@ -39,6 +43,23 @@ class Customer(Base):
 
 class Inventory(Base):
     __tablename__ = "inventory_new"
+    # Trigram GIN indexes back /inventory/search: ILIKE prefix/substring
+    # matches on sku and fuzzy (similarity) matches on product_name.
+    __table_args__ = (
+        Index(
+            "ix_inventory_new_sku_trgm",
+            "sku",
+            postgresql_using="gin",
+            postgresql_ops={"sku": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_inventory_new_product_name_trgm",
+            "product_name",
+            postgresql_using="gin",
+            postgresql_ops={"product_name": "gin_trgm_ops"},
+        ),
+        Index("ix_inventory_new_category_sku", "category", "sku"),
+    )
 
     inventory_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     sku: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
@@ -65,6 +86,20 @@ class Inventory(Base):
 
 class Order(Base):
     __tablename__ = "orders_new"
+    # Composite indexes for the newest-first list views (GET /orders);
+    # order_id breaks ties on order_date for keyset pagination.
+    __table_args__ = (
+        Index("ix_orders_new_date_id", "order_date", "order_id"),
+        Index("ix_orders_new_customer_date_id", "customer_id", "order_date", "order_id"),
+        Index("ix_orders_new_status_date_id", "status", "order_date", "order_id"),
+        Index(
+            "ix_orders_new_customer_status_date_id",
+            "customer_id",
+            "status",
+            "order_date",
+            "order_id",
+        ),
+    )
 
     order_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     order_number: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
@@ -87,18 +122,181 @@ class Order(Base):
     shipping_method: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
 
     order_source: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
-    original_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Heavy columns only the detail view needs are deferred; load them
+    # with undefer_group("detail").
+    original_message: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_group="detail"
+    )
     ai_confidence_score: Mapped[Optional[Decimal]] = mapped_column(Numeric(5, 2), nullable=True)
 
-    quote_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    quote_text: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_group="detail"
+    )
     quote_audio_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     quote_sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     has_warnings: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="false")
-    warnings: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    warnings: Mapped[Optional[list]] = mapped_column(
+        JSON, nullable=True, deferred=True, deferred_group="detail"
+    )
     requires_human_review: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="false")
     reviewed_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     reviewed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+    # Bumped by every status transition; served as the detail ETag.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+
+
+class RateLimitBucket(Base):
+    """Shared token-bucket state for the Postgres rate-limit backend."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    bucket_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+
+
+class IdempotencyKey(Base):
+    """Stored outcome of a request sent with an Idempotency-Key header."""
+
+    __tablename__ = "idempotency_keys"
+
+    idempotency_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, server_default="in_progress")
+    response: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    locked_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+
+
+class ProductDemand(Base):
+    """All-time demand per SKU, maintained alongside order writes."""
+
+    __tablename__ = "product_demand"
+    __table_args__ = (
+        Index("ix_product_demand_total_qty", "total_qty"),
+    )
+
+    sku: Mapped[str] = mapped_column(String(100), primary_key=True)
+    product_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    total_qty: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    total_revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, server_default="0.00")
+
+
+class ProductDemandDaily(Base):
+    """Per-day, per-customer demand per SKU; serves filtered top-products queries.
+
+    Orders without a customer are bucketed under customer_id 0.
+    """
+
+    __tablename__ = "product_demand_daily"
+    __table_args__ = (
+        Index("ix_product_demand_daily_customer_date", "customer_id", "bucket_date"),
+    )
+
+    bucket_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    customer_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sku: Mapped[str] = mapped_column(String(100), primary_key=True)
+    product_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    total_qty: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    total_revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, server_default="0.00")
+
+
+class OrderStatsDaily(Base):
+    """Order count and revenue per day, customer and status.
+
+    Maintained alongside order writes; orders without a customer are
+    bucketed under customer_id 0.
+    """
+
+    __tablename__ = "order_stats_daily"
+    __table_args__ = (
+        Index("ix_order_stats_daily_customer_date", "customer_id", "bucket_date"),
+    )
+
+    bucket_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    customer_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, server_default="0.00")
+
+
+class OrderLine(Base):
+    """Normalized copy of ``Order.items``, one row per line item.
+
+    Written in the same transaction as the order; ``Order.items`` remains
+    the source for API responses.
+    """
+
+    __tablename__ = "order_lines"
+    __table_args__ = (
+        Index("ix_order_lines_sku_date", "sku", "order_date"),
+        Index("ix_order_lines_order_date", "order_date"),
+    )
+
+    order_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    line_number: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sku: Mapped[str] = mapped_column(String(100), nullable=False)
+    product_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    unit_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    line_total: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    customer_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    order_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class LlmUsage(Base):
+    """One LLM call: model, token counts, latency and estimated cost.
+
+    ``order_id`` is set for calls that produced an order and
+    ``interaction_id`` for calls made while processing an interaction.
+    """
+
+    __tablename__ = "llm_usage"
+    __table_args__ = (
+        Index("ix_llm_usage_order", "order_id"),
+        Index("ix_llm_usage_customer_created", "customer_id", "created_at"),
+    )
+
+    usage_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    order_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    interaction_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    customer_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    operation: Mapped[str] = mapped_column(String(50), nullable=False)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    input_tokens: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    output_tokens: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    cache_read_tokens: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    cache_creation_tokens: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    latency_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    cost_usd: Mapped[Decimal] = mapped_column(Numeric(12, 6), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+
+
+class LlmUsageDaily(Base):
+    """LLM calls, tokens and cost per day, customer and model.
+
+    Maintained alongside ``llm_usage`` inserts; calls without a customer
+    are bucketed under customer_id 0. Daily budgets are checked against it.
+    """
+
+    __tablename__ = "llm_usage_daily"
+
+    bucket_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    customer_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    model: Mapped[str] = mapped_column(String(100), primary_key=True)
+    request_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    input_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    output_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    cache_read_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    cache_creation_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    cost_usd: Mapped[Decimal] = mapped_column(Numeric(14, 6), nullable=False, server_default="0")
+
+
+# Ids for order change-feed events when ORDER_EVENTS_BACKEND=postgres, so
+# every node sees the same id for the same event.
+order_event_id_seq = Sequence("order_event_id_seq", metadata=Base.metadata)
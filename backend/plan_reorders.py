@@ -0,0 +1,40 @@
+"""Compute the reorder plan for the whole catalog and write it as CSV.
+
+Intended to run as a scheduled job (e.g. nightly cron) alongside the
+/inventory/reorder-plan endpoint, which serves the same plan on demand.
+
+Usage:
+    python plan_reorders.py [--output reorder_plan.csv] [--horizon-days 30] [--all]
+"""
+
+import argparse
+import asyncio
+import sys
+
+from database import async_session_factory
+from schemas import ReorderPlanItem
+from services.export import encode_csv
+from services.reorder_planner import build_reorder_plan
+
+
+async def main(output: str | None, horizon_days: int | None) -> None:
+    async with async_session_factory() as session:
+        plan = await build_reorder_plan(session)
+
+    rows = plan.to_rows(plan.select(horizon_days=horizon_days))
+    payload = encode_csv(rows, list(ReorderPlanItem.model_fields), header=True)
+    if output:
+        with open(output, "wb") as fh:
+            fh.write(payload)
+        print(f"Wrote {len(rows)} reorder recommendations to {output}.")
+    else:
+        sys.stdout.buffer.write(payload)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="CSV path (default: stdout)")
+    parser.add_argument("--horizon-days", type=int, default=30)
+    parser.add_argument("--all", action="store_true", help="include every SKU")
+    args = parser.parse_args()
+    asyncio.run(main(args.output, None if args.all else args.horizon_days))
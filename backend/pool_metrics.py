@@ -0,0 +1,152 @@
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# "METHOD /path" of the request being served, recorded against checkouts.
+current_route: ContextVar[str] = ContextVar("current_route", default="-")
+
+# Upper bounds (ms) of the checkout wait histogram; the last bucket is +Inf.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """Checkout wait times and long-held connections for one engine's pool."""
+
+    def __init__(self) -> None:
+        self.pool: Pool | None = None
+        self.wait_counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_seconds_total = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.long_holds = 0
+        # id(connection record) -> (checked out at, route)
+        self._held: dict[int, tuple[float, str]] = {}
+
+    def observe_wait(self, seconds: float) -> None:
+        self.wait_counts[bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+        self.wait_seconds_total += seconds
+
+    def attach(self, engine: Engine) -> None:
+        self.pool = engine.pool
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.metrics = self
+        event.listen(engine.pool, "checkout", self._on_checkout)
+        event.listen(engine.pool, "checkin", self._on_checkin)
+        event.listen(engine.pool, "invalidate", self._on_invalidate)
+
+    def _on_checkout(self, dbapi_connection: Any, record: Any, proxy: Any) -> None:
+        self.checkouts += 1
+        self._held[id(record)] = (time.monotonic(), current_route.get())
+
+    def _on_checkin(self, dbapi_connection: Any, record: Any) -> None:
+        held = self._held.pop(id(record), None)
+        if held is None:
+            return
+        duration = time.monotonic() - held[0]
+        if duration > settings.DB_POOL_HOLD_WARN_SECONDS:
+            self.long_holds += 1
+            logger.warning("Connection held %.1fs by %s", duration, held[1])
+
+    def _on_invalidate(self, dbapi_connection: Any, record: Any, exception: Any) -> None:
+        self._held.pop(id(record), None)
+
+    def snapshot(self) -> dict[str, Any]:
+        pool = self.pool
+        now = time.monotonic()
+        held_long = sorted(
+            (
+                {"route": route, "held_seconds": round(now - since, 3)}
+                for since, route in self._held.values()
+                if now - since > settings.DB_POOL_HOLD_WARN_SECONDS
+            ),
+            key=lambda h: -h["held_seconds"],
+        )
+        cumulative, buckets = 0, {}
+        for bound, count in zip((*WAIT_BUCKETS_MS, "+Inf"), self.wait_counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "size": pool.size() if pool is not None else 0,
+            "checked_out": pool.checkedout() if pool is not None else 0,
+            "checked_in": pool.checkedin() if pool is not None else 0,
+            "overflow": pool.overflow() if pool is not None else 0,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_buckets": buckets,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "long_holds": self.long_holds,
+            "held_longer_than_threshold": held_long,
+        }
+
+
+pool_metrics = PoolMetrics()
+replica_pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection."""
+
+    metrics: PoolMetrics | None = None
+
+    def connect(self) -> Any:
+        metrics = self.metrics
+        if metrics is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            metrics.observe_wait(time.perf_counter() - started)
+
+
+def install_idle_ping(engine: Engine, idle_seconds: float) -> None:
+    """Ping only connections that sat idle in the pool for ``idle_seconds``.
+
+    A cheaper alternative to ``pool_pre_ping``, which costs a round trip on
+    every checkout. Dead connections are replaced transparently.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _mark_idle(dbapi_connection: Any, record: Any) -> None:
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection: Any, record: Any, proxy: Any) -> None:
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            # The pool discards this connection and retries the checkout.
+            raise exc.DisconnectionError() from e
+
+
+class RouteContextMiddleware:
+    """Record the current request's method and path for pool diagnostics."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_route.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
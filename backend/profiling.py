@@ -0,0 +1,231 @@
+import asyncio
+import hmac
+import itertools
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from types import FrameType
+from typing import Any
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Request header asking for a profile; honoured only with a valid X-Admin-Token.
+PROFILE_HEADER = b"x-profile"
+_ADMIN_HEADER = b"x-admin-token"
+
+_MAX_ROUTES = 200
+
+
+class RequestProfile:
+    """Sampled call stacks of one request, in collapsed-stack form."""
+
+    __slots__ = ("profile_id", "method", "path", "route", "started_at", "duration_ms", "samples", "stacks")
+
+    def __init__(self, profile_id: int, method: str, path: str) -> None:
+        self.profile_id = profile_id
+        self.method = method
+        self.path = path
+        self.route = path
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "profile_id": self.profile_id,
+            "route": f"{self.method} {self.route}",
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": self.samples,
+        }
+
+
+def collapse(stacks: Counter[str]) -> str:
+    """``frame;frame;frame count`` lines, as read by flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+class StackSampler:
+    """Samples the event loop thread while profiled requests are running.
+
+    Every PROFILING_INTERVAL_MS a background thread reads the loop's
+    current task; if it belongs to a profiled request, the loop thread's
+    stack (from ProfilingMiddleware down) is counted against that request.
+    Other requests interleaved on the loop are therefore not attributed to
+    it, and time spent awaiting I/O is not sampled. Work the request hands
+    to other threads or tasks is not included. The thread only runs while
+    at least one request is being profiled.
+    """
+
+    def __init__(self) -> None:
+        self._active: dict[asyncio.Task, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id = 0
+
+    def begin(self, profile: RequestProfile) -> asyncio.Task | None:
+        task = asyncio.current_task()
+        if task is None:
+            return None
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread_id = threading.get_ident()
+            self._active[task] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+        return task
+
+    def end(self, task: asyncio.Task) -> None:
+        with self._lock:
+            self._active.pop(task, None)
+
+    def _run(self) -> None:
+        interval = settings.PROFILING_INTERVAL_MS / 1000
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                profile = self._active.get(asyncio.current_task(self._loop))
+            if profile is None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if self._active.get(asyncio.current_task(self._loop)) is not profile:
+                continue  # the loop switched tasks while we sampled
+            stack = self._stack(frame)
+            if stack:
+                profile.stacks[stack] += 1
+                profile.samples += 1
+
+    @staticmethod
+    def _stack(frame: FrameType | None) -> str:
+        names: list[str] = []
+        while frame is not None:
+            if frame.f_code is _MIDDLEWARE_CODE:
+                break
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+        else:
+            return ""  # not inside a request (e.g. between task steps)
+        names.reverse()
+        return ";".join(names)
+
+
+class ProfileStore:
+    """The last PROFILING_MAX_PER_ROUTE profiles of each route."""
+
+    def __init__(self) -> None:
+        self._ids = itertools.count(1)
+        self._by_route: OrderedDict[str, deque[RequestProfile]] = OrderedDict()
+
+    def new(self, method: str, path: str) -> RequestProfile:
+        return RequestProfile(next(self._ids), method, path)
+
+    def add(self, profile: RequestProfile) -> None:
+        key = f"{profile.method} {profile.route}"
+        profiles = self._by_route.get(key)
+        if profiles is None:
+            profiles = self._by_route[key] = deque(maxlen=settings.PROFILING_MAX_PER_ROUTE)
+        profiles.append(profile)
+        self._by_route.move_to_end(key)
+        while len(self._by_route) > _MAX_ROUTES:
+            self._by_route.popitem(last=False)
+
+    def routes(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "route": key,
+                "profiles": [p.summary() for p in reversed(profiles)],
+            }
+            for key, profiles in reversed(self._by_route.items())
+        ]
+
+    def get(self, profile_id: int) -> RequestProfile | None:
+        for profiles in self._by_route.values():
+            for profile in profiles:
+                if profile.profile_id == profile_id:
+                    return profile
+        return None
+
+    def route_stacks(self, route: str) -> Counter[str] | None:
+        """All stored samples for ``route`` ("METHOD /template") merged."""
+        profiles = self._by_route.get(route)
+        if profiles is None:
+            return None
+        merged: Counter[str] = Counter()
+        for profile in profiles:
+            merged.update(profile.stacks)
+        return merged
+
+
+profile_store = ProfileStore()
+sampler = StackSampler()
+
+
+def _wants_profile(scope: dict) -> bool:
+    if settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE:
+        return True
+    if not settings.ADMIN_TOKEN:
+        return False
+    headers = dict(scope["headers"])
+    token = headers.get(_ADMIN_HEADER)
+    return (
+        PROFILE_HEADER in headers
+        and token is not None
+        and hmac.compare_digest(token, settings.ADMIN_TOKEN.encode())
+    )
+
+
+class ProfilingMiddleware:
+    """Profile a sampled fraction of requests, or any request sent with X-Profile.
+
+    Only installed when PROFILING_ENABLED is set; unprofiled requests pay
+    a random() call and a header lookup. Results are kept per route template in
+    ``profile_store`` (see /admin/profiles).
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profile_store.new(scope["method"], scope["path"])
+        task = sampler.begin(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if task is not None:
+                sampler.end(task)
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            profile.route = getattr(route, "path", None) or "unmatched"
+            profile_store.add(profile)
+            logger.info(
+                "Profiled %s %s: %.0f ms, %d samples (profile %d)",
+                profile.method, profile.path, profile.duration_ms, profile.samples, profile.profile_id,
+            )
+
+
+_MIDDLEWARE_CODE = ProfilingMiddleware.__call__.__code__
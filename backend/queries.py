@@ -0,0 +1,94 @@
+from functools import cache
+from typing import Any, Iterable
+
+from sqlalchemy import ColumnElement, Update, any_, bindparam, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import undefer_group
+
+from models import Customer, Inventory, Order
+
+# Statements on the hot request paths, built once at import. Values go in as
+# named bind parameters at execute time, so SQLAlchemy computes each cache
+# key once and reuses the compiled SQL, and the identical SQL text lets
+# asyncpg reuse its prepared statement on every pooled connection
+# (DB_STATEMENT_CACHE_SIZE).
+
+
+def any_of(column: Any, values: Iterable[Any], name: str | None = None) -> ColumnElement[bool]:
+    """``column = ANY(:values)`` with the list bound as one array parameter.
+
+    Unlike ``IN``, the SQL text does not change with the number of values,
+    so one prepared statement and plan serves every list length. Postgres only.
+    """
+    return column == any_(bindparam(name, list(values), type_=ARRAY(column.type)))
+
+
+# ---------------------------------------------------------------------------
+# Order processing
+# ---------------------------------------------------------------------------
+
+# Params: customer_id
+CUSTOMER_BY_ID = select(Customer).where(Customer.customer_id == bindparam("customer_id"))
+
+INVENTORY_CATALOG = select(Inventory)
+
+ORDER_COUNT = text("SELECT COUNT(*) FROM orders_new")
+
+# ---------------------------------------------------------------------------
+# Orders
+# ---------------------------------------------------------------------------
+
+# One order with the deferred detail columns loaded. Params: order_id
+ORDER_DETAIL = (
+    select(Order)
+    .where(Order.order_id == bindparam("order_id"))
+    .options(undefer_group("detail"))
+)
+
+# Params: order_id
+ORDER_STATE = select(Order.status, Order.version).where(
+    Order.order_id == bindparam("order_id")
+)
+
+# Params: order_ids (list)
+ORDER_STATUSES = select(Order.order_id, Order.status).where(
+    any_of(Order.order_id, (), "order_ids")
+)
+
+
+@cache
+def order_transition(with_reviewer: bool, with_version: bool) -> Update:
+    """Single-order status transition (see ``services.order_status.transition_order``).
+
+    Params: target_id, sources (statuses allowed to move to the new
+    status), new_status, now, plus reviewer when ``with_reviewer`` and
+    expected_version when ``with_version``. None of them is named after a
+    column, which would add it to the SET clause. Returns every column
+    plus ``previous_status``.
+    """
+    criteria = [
+        Order.order_id == bindparam("target_id"),
+        any_of(Order.status, (), "sources"),
+    ]
+    if with_version:
+        criteria.append(Order.version == bindparam("expected_version"))
+    locked = (
+        select(Order.order_id, Order.status.label("previous_status"))
+        .where(*criteria)
+        .with_for_update()
+        .subquery("prev")
+    )
+    values: dict[str, Any] = {
+        "status": bindparam("new_status"),
+        "updated_at": bindparam("now"),
+        "version": Order.version + 1,
+    }
+    if with_reviewer:
+        values.update(reviewed_by=bindparam("reviewer"), reviewed_at=bindparam("now"))
+    return (
+        update(Order)
+        .where(Order.order_id == locked.c.order_id)
+        .values(**values)
+        .returning(*Order.__table__.columns, locked.c.previous_status)
+        .execution_options(synchronize_session=False)
+    )
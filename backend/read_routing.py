@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import async_session_factory, replica_engine, replica_session_factory
+
+logger = logging.getLogger(__name__)
+
+# Session.info key naming the caller, so commits can be tracked per caller.
+CALLER_KEY = "caller_id"
+
+_MAX_TRACKED_CALLERS = 10_000
+_HEALTH_CHECK_TIMEOUT_SECONDS = 1.0
+
+# Replication lag in seconds; 0 when fully replayed (an idle primary would
+# otherwise look increasingly "behind").
+_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReadRouter:
+    """Chooses between the read replica and the primary for read-only work.
+
+    The replica is used unless none is configured, its last health check
+    failed or showed more than REPLICA_MAX_LAG_SECONDS of lag, the caller
+    committed a write within REPLICA_STICKY_SECONDS, or the read must see
+    a write (``last_write_at``) made less than REPLICA_MAX_LAG_SECONDS
+    ago, which a replica within the lag limit may not have replayed yet.
+    Health is checked at most every REPLICA_HEALTH_CHECK_SECONDS; a
+    connection error on a replica session marks it down until the next
+    check.
+    """
+
+    def __init__(self) -> None:
+        self._healthy = replica_engine is not None
+        self._lag_seconds: float | None = None
+        self._checked_at = float("-inf")
+        self._check_lock = asyncio.Lock()
+        self._last_write: OrderedDict[str, float] = OrderedDict()
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    async def session_factory(
+        self, caller_id: str | None = None, last_write_at: float | None = None
+    ) -> async_sessionmaker[AsyncSession]:
+        if (
+            replica_session_factory is None
+            or self._is_sticky(caller_id)
+            or self._is_recent(last_write_at)
+        ):
+            self.primary_reads += 1
+            return async_session_factory
+        if time.monotonic() - self._checked_at >= settings.REPLICA_HEALTH_CHECK_SECONDS:
+            await self._check_health()
+        if not self._healthy:
+            self.primary_reads += 1
+            return async_session_factory
+        self.replica_reads += 1
+        return replica_session_factory
+
+    def is_replica(self, factory: async_sessionmaker[AsyncSession]) -> bool:
+        return factory is replica_session_factory
+
+    def mark_write(self, caller_id: str) -> None:
+        self._last_write[caller_id] = time.monotonic()
+        self._last_write.move_to_end(caller_id)
+        while len(self._last_write) > _MAX_TRACKED_CALLERS:
+            self._last_write.popitem(last=False)
+
+    def mark_unhealthy(self, reason: str) -> None:
+        if self._healthy:
+            logger.warning("Read replica marked unavailable: %s", reason)
+        self._healthy = False
+        self._checked_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "configured": replica_engine is not None,
+            "healthy": self._healthy,
+            "lag_seconds": self._lag_seconds,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+        }
+
+    def _is_sticky(self, caller_id: str | None) -> bool:
+        if caller_id is None or settings.REPLICA_STICKY_SECONDS <= 0:
+            return False
+        wrote_at = self._last_write.get(caller_id)
+        return wrote_at is not None and time.monotonic() - wrote_at < settings.REPLICA_STICKY_SECONDS
+
+    def _is_recent(self, last_write_at: float | None) -> bool:
+        return (
+            last_write_at is not None
+            and time.monotonic() - last_write_at < settings.REPLICA_MAX_LAG_SECONDS
+        )
+
+    async def _check_health(self) -> None:
+        async with self._check_lock:
+            if time.monotonic() - self._checked_at < settings.REPLICA_HEALTH_CHECK_SECONDS:
+                return  # another request just checked
+            try:
+                async with replica_engine.connect() as conn:
+                    lag = await asyncio.wait_for(
+                        conn.scalar(_LAG_SQL), _HEALTH_CHECK_TIMEOUT_SECONDS
+                    )
+            except Exception as e:
+                self.mark_unhealthy(f"health check failed: {e}")
+                return
+            finally:
+                self._checked_at = time.monotonic()
+
+            self._lag_seconds = float(lag or 0)
+            healthy = self._lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS
+            if healthy != self._healthy:
+                logger.warning(
+                    "Read replica %s (lag %.1fs)",
+                    "available" if healthy else "lagging; reading from primary",
+                    self._lag_seconds,
+                )
+            self._healthy = healthy
+
+
+read_router = ReadRouter()
+
+
+@event.listens_for(Session, "after_commit")
+def _track_caller_write(session: Session) -> None:
+    caller_id = session.info.get(CALLER_KEY)
+    if caller_id is not None:
+        read_router.mark_write(caller_id)
@@ -0,0 +1,26 @@
+"""Backfill order_lines and rebuild the analytics rollup tables from existing orders.
+
+Run migrate_schema.py first so the rollup tables exist.
+
+Usage:
+    python rebuild_rollups.py
+"""
+
+import asyncio
+
+from database import async_session_factory
+from services.demand_rollup import rebuild_demand_rollups
+from services.order_lines import backfill_order_lines
+from services.order_rollup import rebuild_order_rollups
+
+
+async def main() -> None:
+    async with async_session_factory() as session:
+        await backfill_order_lines(session)
+        await rebuild_demand_rollups(session)
+        await rebuild_order_rollups(session)
+    print("Backfilled order lines; rebuilt product demand and order stats rollups.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
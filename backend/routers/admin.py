@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from dependencies import require_admin
+from profiling import collapse, profile_store
+from tracing import slow_traces
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/traces")
+async def list_slow_traces() -> list[dict]:
+    """Recent requests slower than TRACE_SLOW_REQUEST_MS, newest first."""
+    return slow_traces.list()
+
+
+@router.get("/traces/{trace_id}")
+async def get_slow_trace(trace_id: str) -> dict:
+    """Full span tree of one slow request, including every SQL statement."""
+    trace = slow_traces.get(trace_id)
+    if trace is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trace not found (it may have left the buffer)",
+        )
+    return trace
+
+
+@router.get("/profiles")
+async def list_profiles() -> list[dict]:
+    """Stored request profiles grouped by route, most recently profiled first."""
+    return profile_store.routes()
+
+
+@router.get("/profiles/route", response_class=PlainTextResponse)
+async def get_route_profile(
+    route: str = Query(description='Route as listed, e.g. "POST /orders/process"'),
+) -> str:
+    """Collapsed stacks of every stored profile of one route, merged."""
+    stacks = profile_store.route_stacks(route)
+    if stacks is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No profiles stored for this route",
+        )
+    return collapse(stacks)
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: int) -> str:
+    """Collapsed stacks of one profiled request (flamegraph.pl / speedscope input)."""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found (it may have left the buffer)",
+        )
+    return collapse(profile.stacks)
@@ -1,75 +1,287 @@
-from collections import defaultdict
+from datetime import date
 from decimal import Decimal
+from typing import Any, Awaitable, Callable, Literal
 
 from fastapi import APIRouter
-from sqlalchemy import select
+from sqlalchemy import Date, cast, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from dependencies import DBSession
-from models import Order
-from schemas import AnalyticsSummary, TopProduct
+from models import LlmUsageDaily, Order, OrderStatsDaily, ProductDemand, ProductDemandDaily
+from read_routing import read_router
+from schemas import AnalyticsSummary, LlmUsageRollup, TimeseriesPoint, TopProduct
+from services.analytics_cache import analytics_cache
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
+async def _cached(
+    endpoint: str,
+    compute: Callable[..., Awaitable[Any]],
+    **params: Any,
+) -> Any:
+    """Serve ``compute(session, **params)`` through the analytics cache.
+
+    The computation opens its own session (on the read replica when
+    usable, and on the primary shortly after an order write) so that a
+    background revalidation can outlive the request that triggered it.
+    """
+
+    async def run() -> Any:
+        factory = await read_router.session_factory(
+            last_write_at=analytics_cache.invalidated_at
+        )
+        async with factory() as session:
+            return await compute(session, **params)
+
+    key = (endpoint, *sorted(params.items()))
+    return await analytics_cache.get_or_compute(key, run)
+
+
 @router.get("/summary", response_model=AnalyticsSummary)
-async def get_summary(
-    session: DBSession,
-    customer_id: int | None = None,
-) -> dict:
+async def get_summary(customer_id: int | None = None) -> dict:
     """Aggregated stats for dashboard cards. Pass customer_id for client view."""
-    stmt = select(Order)
+    return await _cached("summary", _compute_summary, customer_id=customer_id)
+
+
+async def _compute_summary(session: AsyncSession, customer_id: int | None) -> dict:
+    stmt = select(
+        Order.status,
+        func.count(Order.order_id),
+        func.coalesce(func.sum(Order.total_amount), 0),
+    ).group_by(Order.status)
     if customer_id is not None:
         stmt = stmt.where(Order.customer_id == customer_id)
 
     result = await session.execute(stmt)
-    orders = list(result.scalars().all())
 
-    total_orders = len(orders)
-    total_revenue = sum(o.total_amount for o in orders)
-    avg_order_value = total_revenue / total_orders if total_orders > 0 else Decimal("0")
+    status_counts: dict[str, int] = {}
+    total_orders = 0
+    total_revenue = Decimal("0")
+    for order_status, count, revenue in result.all():
+        status_counts[order_status] = count
+        total_orders += count
+        total_revenue += revenue
 
-    status_counts: dict[str, int] = defaultdict(int)
-    error_count = 0
-    for o in orders:
-        status_counts[o.status] += 1
-        if o.status == "error":
-            error_count += 1
+    avg_order_value = total_revenue / total_orders if total_orders > 0 else Decimal("0")
 
     return {
         "total_orders": total_orders,
         "total_revenue": total_revenue,
         "avg_order_value": avg_order_value,
-        "orders_by_status": dict(status_counts),
-        "error_count": error_count,
+        "orders_by_status": status_counts,
+        "error_count": status_counts.get("error", 0),
     }
 
 
 @router.get("/top-products", response_model=list[TopProduct])
 async def get_top_products(
-    session: DBSession,
     limit: int = 8,
+    customer_id: int | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
 ) -> list[dict]:
-    """Aggregate product demand across all orders' JSONB items."""
-    result = await session.execute(select(Order))
-    orders = list(result.scalars().all())
+    """Top products by quantity, served from the product demand rollups.
 
-    product_map: dict[str, dict] = {}
-    for order in orders:
-        if not order.items:
+    Unfiltered requests read the all-time rollup; customer or date-range
+    filters aggregate the daily buckets.
+    """
+    return await _cached(
+        "top-products",
+        _compute_top_products,
+        limit=limit,
+        customer_id=customer_id,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+async def _compute_top_products(
+    session: AsyncSession,
+    limit: int,
+    customer_id: int | None,
+    start_date: date | None,
+    end_date: date | None,
+) -> list[dict]:
+    if customer_id is None and start_date is None and end_date is None:
+        stmt = (
+            select(
+                ProductDemand.sku,
+                ProductDemand.product_name,
+                ProductDemand.total_qty,
+                ProductDemand.total_revenue,
+            )
+            .where(ProductDemand.total_qty > 0)
+            .order_by(ProductDemand.total_qty.desc())
+            .limit(limit)
+        )
+    else:
+        total_qty = func.sum(ProductDemandDaily.total_qty)
+        stmt = select(
+            ProductDemandDaily.sku,
+            func.max(ProductDemandDaily.product_name),
+            total_qty,
+            func.sum(ProductDemandDaily.total_revenue),
+        )
+        if customer_id is not None:
+            stmt = stmt.where(ProductDemandDaily.customer_id == customer_id)
+        if start_date is not None:
+            stmt = stmt.where(ProductDemandDaily.bucket_date >= start_date)
+        if end_date is not None:
+            stmt = stmt.where(ProductDemandDaily.bucket_date <= end_date)
+        stmt = (
+            stmt.group_by(ProductDemandDaily.sku)
+            .having(total_qty > 0)
+            .order_by(total_qty.desc())
+            .limit(limit)
+        )
+
+    result = await session.execute(stmt)
+    return [
+        {
+            "sku": sku,
+            "product_name": product_name,
+            "total_qty": qty,
+            "total_revenue": revenue,
+        }
+        for sku, product_name, qty, revenue in result.all()
+    ]
+
+
+@router.get("/timeseries", response_model=list[TimeseriesPoint])
+async def get_timeseries(
+    granularity: Literal["day", "week", "month"] = "month",
+    customer_id: int | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list[dict]:
+    """Order count, revenue and status breakdown per period.
+
+    Served from the daily order stats rollup, so the response size depends
+    only on the number of periods in the range, not on the number of orders.
+    """
+    return await _cached(
+        "timeseries",
+        _compute_timeseries,
+        granularity=granularity,
+        customer_id=customer_id,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+async def _compute_timeseries(
+    session: AsyncSession,
+    granularity: Literal["day", "week", "month"],
+    customer_id: int | None,
+    start_date: date | None,
+    end_date: date | None,
+) -> list[dict]:
+    # Inline the (validated) unit: a bound parameter would make the SELECT
+    # and GROUP BY expressions differ in Postgres' eyes.
+    unit = literal_column(f"'{granularity}'")
+    period = cast(func.date_trunc(unit, OrderStatsDaily.bucket_date), Date)
+    stmt = select(
+        period,
+        OrderStatsDaily.status,
+        func.sum(OrderStatsDaily.order_count),
+        func.sum(OrderStatsDaily.revenue),
+    )
+    if customer_id is not None:
+        stmt = stmt.where(OrderStatsDaily.customer_id == customer_id)
+    if start_date is not None:
+        stmt = stmt.where(OrderStatsDaily.bucket_date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(OrderStatsDaily.bucket_date <= end_date)
+    stmt = stmt.group_by(period, OrderStatsDaily.status).order_by(period)
+
+    result = await session.execute(stmt)
+
+    points: dict[date, dict] = {}
+    for period_start, order_status, count, revenue in result.all():
+        if not count:
             continue
-        for item in order.items:
-            sku = item.get("sku", "UNKNOWN")
-            if sku not in product_map:
-                product_map[sku] = {
-                    "sku": sku,
-                    "product_name": item.get("product_name", sku),
-                    "total_qty": 0,
-                    "total_revenue": Decimal("0"),
-                }
-            product_map[sku]["total_qty"] += item.get("quantity", 0)
-            product_map[sku]["total_revenue"] += Decimal(str(item.get("line_total", 0)))
-
-    sorted_products = sorted(
-        product_map.values(), key=lambda x: x["total_qty"], reverse=True
+        point = points.setdefault(
+            period_start,
+            {
+                "period_start": period_start,
+                "order_count": 0,
+                "revenue": Decimal("0"),
+                "orders_by_status": {},
+            },
+        )
+        point["order_count"] += count
+        point["revenue"] += revenue
+        point["orders_by_status"][order_status] = count
+    return list(points.values())
+
+
+@router.get("/llm-usage", response_model=list[LlmUsageRollup])
+async def get_llm_usage(
+    group_by: Literal["day", "customer"] = "day",
+    customer_id: int | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list[dict]:
+    """LLM calls, tokens and cost per day or per customer, split by model.
+
+    Served from the daily LLM usage rollup. Calls without a customer are
+    reported under customer_id 0.
+    """
+    return await _cached(
+        "llm-usage",
+        _compute_llm_usage,
+        group_by=group_by,
+        customer_id=customer_id,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+async def _compute_llm_usage(
+    session: AsyncSession,
+    group_by: Literal["day", "customer"],
+    customer_id: int | None,
+    start_date: date | None,
+    end_date: date | None,
+) -> list[dict]:
+    key = LlmUsageDaily.bucket_date if group_by == "day" else LlmUsageDaily.customer_id
+    stmt = select(
+        key,
+        LlmUsageDaily.model,
+        func.sum(LlmUsageDaily.request_count),
+        func.sum(LlmUsageDaily.input_tokens),
+        func.sum(LlmUsageDaily.output_tokens),
+        func.sum(LlmUsageDaily.cache_read_tokens),
+        func.sum(LlmUsageDaily.cache_creation_tokens),
+        func.sum(LlmUsageDaily.cost_usd),
     )
-    return sorted_products[:limit]
+    if customer_id is not None:
+        stmt = stmt.where(LlmUsageDaily.customer_id == customer_id)
+    if start_date is not None:
+        stmt = stmt.where(LlmUsageDaily.bucket_date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(LlmUsageDaily.bucket_date <= end_date)
+    stmt = stmt.group_by(key, LlmUsageDaily.model).order_by(key, LlmUsageDaily.model)
+
+    result = await session.execute(stmt)
+    key_name = "bucket_date" if group_by == "day" else "customer_id"
+    return [
+        {
+            key_name: key_value,
+            "model": model,
+            "request_count": requests,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cache_read_tokens": cache_read,
+            "cache_creation_tokens": cache_creation,
+            "cost_usd": cost,
+        }
+        for key_value, model, requests, input_tokens, output_tokens, cache_read, cache_creation, cost
+        in result.all()
+    ]
+
+
+@router.get("/cache-stats")
+async def get_cache_stats() -> dict[str, float]:
+    """Hit ratio and recompute timings of the analytics response cache."""
+    return analytics_cache.stats()
@@ -1,17 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from sqlalchemy import select
 
-from dependencies import DBSession
+from dependencies import ReadOnlyDBSession
 from models import Customer
 from schemas import CustomerRead
+from serialization import row_serializer
 
 router = APIRouter(prefix="/customers", tags=["customers"])
 
+_customer_serializer = row_serializer(CustomerRead, Customer)
+
 
 @router.get("", response_model=list[CustomerRead])
-async def list_customers(session: DBSession) -> list[Customer]:
+async def list_customers(session: ReadOnlyDBSession) -> Response:
     """List all customers."""
     result = await session.execute(
-        select(Customer).order_by(Customer.company_name)
+        select(*_customer_serializer.columns).order_by(Customer.company_name)
     )
-    return list(result.scalars().all())
+    return _customer_serializer.response(result.mappings().all())
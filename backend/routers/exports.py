@@ -0,0 +1,90 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, AsyncIterator, Literal
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+
+from config import settings
+from models import Customer, Inventory, Order
+from read_routing import read_router
+from services.export import stream_export
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+ExportFormat = Literal["ndjson", "csv"]
+
+_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+async def _partitions(stmt: Select) -> AsyncIterator[list[Any]]:
+    """Yield result batches from a server-side cursor.
+
+    The session is opened here rather than injected so that it lives as
+    long as the streamed response body, not just the endpoint call.
+    """
+    factory = await read_router.session_factory()
+    async with factory() as session:
+        result = await session.stream(
+            stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.mappings().partitions():
+            yield partition
+
+
+def _export_response(
+    stmt: Select,
+    *,
+    name: str,
+    fmt: ExportFormat,
+    flatten_items: bool = False,
+) -> StreamingResponse:
+    columns = [c.name for c in stmt.selected_columns]
+    body = stream_export(
+        _partitions(stmt), fmt=fmt, columns=columns, flatten_items=flatten_items
+    )
+    return StreamingResponse(
+        body,
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@router.get("/orders")
+async def export_orders(
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    customer_id: int | None = None,
+    flatten_items: bool = False,
+) -> StreamingResponse:
+    """Stream all orders (optionally one row per line item) as NDJSON or CSV."""
+    stmt = select(*Order.__table__.columns)
+    if customer_id is not None:
+        stmt = stmt.where(Order.customer_id == customer_id)
+    if start_date is not None:
+        stmt = stmt.where(Order.order_date >= datetime.combine(start_date, time.min))
+    if end_date is not None:
+        stmt = stmt.where(
+            Order.order_date < datetime.combine(end_date + timedelta(days=1), time.min)
+        )
+    stmt = stmt.order_by(Order.order_date, Order.order_id)
+    return _export_response(stmt, name="orders", fmt=fmt, flatten_items=flatten_items)
+
+
+@router.get("/inventory")
+async def export_inventory(
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+) -> StreamingResponse:
+    """Stream the full inventory catalog as NDJSON or CSV."""
+    stmt = select(*Inventory.__table__.columns).order_by(Inventory.inventory_id)
+    return _export_response(stmt, name="inventory", fmt=fmt)
+
+
+@router.get("/customers")
+async def export_customers(
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+) -> StreamingResponse:
+    """Stream all customers as NDJSON or CSV."""
+    stmt = select(*Customer.__table__.columns).order_by(Customer.customer_id)
+    return _export_response(stmt, name="customers", fmt=fmt)
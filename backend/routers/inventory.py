@@ -1,17 +1,103 @@
-from fastapi import APIRouter
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Response, status
 from sqlalchemy import select
 
-from dependencies import DBSession
+from dependencies import ReadOnlyDBSession
 from models import Inventory
-from schemas import InventoryRead
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from schemas import InventoryRead, ReorderPlanItem
+from read_routing import read_router
+from serialization import row_serializer
+from services.analytics_cache import analytics_cache
+from services.inventory_search import search_inventory
+from services.reorder_planner import ReorderPlan, build_reorder_plan
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
+_inventory_serializer = row_serializer(InventoryRead, Inventory)
+
 
 @router.get("", response_model=list[InventoryRead])
-async def list_inventory(session: DBSession) -> list[Inventory]:
+async def list_inventory(session: ReadOnlyDBSession) -> Response:
     """List all inventory items."""
     result = await session.execute(
-        select(Inventory).order_by(Inventory.product_name)
+        select(*_inventory_serializer.columns).order_by(Inventory.product_name)
+    )
+    return _inventory_serializer.response(result.mappings().all())
+
+
+@router.get("/search", response_model=list[InventoryRead])
+async def search_inventory_items(
+    session: ReadOnlyDBSession,
+    q: str | None = None,
+    category: str | None = None,
+    low_stock: bool = False,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> Response:
+    """Type-ahead search by SKU prefix or (fuzzy) product name.
+
+    Results are ranked best match first (SKU prefix matches first), then by
+    SKU. ``low_stock=true`` keeps only items at or below their reorder
+    point. Pass the X-Next-Cursor header of the previous page as ``cursor``.
+    """
+    q = q.strip() if q else None
+    if limit < 1 or limit > 200:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit must be between 1 and 200",
+        )
+
+    after = None
+    if cursor is not None:
+        after_score, after_sku = decode_cursor(cursor, 2)
+        try:
+            after = (float(after_score), str(after_sku))
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
+    page = await search_inventory(
+        session,
+        q=q,
+        category=category,
+        low_stock=low_stock,
+        limit=limit,
+        after=after,
     )
-    return list(result.scalars().all())
+    headers = {}
+    if page.next_key is not None:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(*page.next_key)
+    return _inventory_serializer.response(page.rows, headers=headers)
+
+
+@router.get("/reorder-plan", response_model=list[ReorderPlanItem])
+async def get_reorder_plan(
+    horizon_days: int = 30,
+    include_all: bool = False,
+    limit: int = 500,
+) -> list[dict]:
+    """SKUs due for reorder within ``horizon_days``, most urgent first.
+
+    Consumption rates come from the daily demand rollup. The plan for the
+    whole catalog is computed once and cached until the next order write;
+    ``include_all=true`` lists every SKU regardless of the horizon.
+    """
+    plan = await _cached_plan()
+    horizon = None if include_all else horizon_days
+    return plan.to_rows(plan.select(horizon_days=horizon, limit=limit))
+
+
+async def _cached_plan() -> ReorderPlan:
+    async def run() -> ReorderPlan:
+        factory = await read_router.session_factory(
+            last_write_at=analytics_cache.invalidated_at
+        )
+        async with factory() as session:
+            return await build_reorder_plan(session, as_of)
+
+    as_of = date.today()
+    return await analytics_cache.get_or_compute(("reorder_plan", as_of), run)
@@ -1,55 +1,213 @@
+import asyncio
+import math
 from datetime import datetime
+from typing import Any, AsyncIterator, Sequence
 
-from fastapi import APIRouter, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, cast, func, select, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
 
-from dependencies import DBSession
-from models import Order
+from config import settings
+from dependencies import CallerID, DBSession, ReadOnlyDBSession
+from models import LlmUsage, Order
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from queries import ORDER_DETAIL
+from serialization import row_serializer
 from schemas import (
+    BulkUpdateOrderStatusRequest,
+    BulkUpdateOrderStatusResponse,
+    LlmUsageRead,
     OrderDetailRead,
     OrderRead,
+    OrderSummaryRead,
     ProcessOrderRequest,
     ProcessOrderResponse,
     UpdateOrderStatusRequest,
 )
+from services.analytics_cache import analytics_cache
+from services.idempotency import (
+    IdempotencyInProgress,
+    IdempotencyKeyReused,
+    idempotency_store,
+    request_fingerprint,
+)
+from services.llm_usage import BudgetExceeded
+from services.order_events import order_events
 from services.order_processor import OrderProcessor
+from services.order_status import (
+    OrderNotFound,
+    TransitionConflict,
+    bulk_update_status,
+    transition_order,
+)
+from services.rate_limiter import (
+    CALLER_POLICY,
+    CUSTOMER_POLICY,
+    RateLimitExceeded,
+    rate_limiter,
+)
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 processor = OrderProcessor()
 
 
-@router.get("", response_model=list[OrderRead])
-async def list_orders(
-    session: DBSession,
-    customer_id: int | None = None,
-    status_filter: str | None = None,
-    limit: int = 50,
-    offset: int = 0,
-) -> list[Order]:
-    """List orders with optional filters."""
-    stmt = select(Order)
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _parse_if_match(value: str | None) -> int | None:
+    """Expected order version from an If-Match header (None for absent or ``*``)."""
+    if value is None or value.strip() == "*":
+        return None
+    tag = value.strip().removeprefix("W/").strip('"')
+    try:
+        return int(tag)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid If-Match header",
+        )
+
 
+# List views select plain columns and serialize rows directly (no ORM
+# hydration, no response_model validation). In summary mode items are
+# reduced to a count in SQL so the JSON never leaves the database.
+_list_serializer = row_serializer(OrderRead, Order)
+_summary_serializer = row_serializer(OrderSummaryRead, Order)
+# Order.items is declared JSON, but older databases store it as jsonb; the
+# cast makes the count work on either column type.
+_ITEM_COUNT = func.jsonb_array_length(cast(Order.items, JSONB)).label("item_count")
+
+
+def _list_statement(
+    columns: Sequence[Any],
+    customer_id: int | None,
+    status_filter: str | None,
+    after_key: tuple[datetime, int] | None,
+    offset: int,
+    limit: int,
+) -> Select:
+    """Newest-first page of orders, seeking past ``after_key`` when given."""
+    stmt = select(*columns)
     if customer_id is not None:
         stmt = stmt.where(Order.customer_id == customer_id)
     if status_filter is not None:
         stmt = stmt.where(Order.status == status_filter)
+    if after_key is not None:
+        stmt = stmt.where(tuple_(Order.order_date, Order.order_id) < after_key)
+    elif offset:
+        stmt = stmt.offset(offset)
+    return stmt.order_by(Order.order_date.desc(), Order.order_id.desc()).limit(limit)
 
-    stmt = stmt.order_by(Order.order_date.desc()).offset(offset).limit(limit)
+
+@router.get("", response_model=list[OrderRead] | list[OrderSummaryRead])
+async def list_orders(
+    session: ReadOnlyDBSession,
+    customer_id: int | None = None,
+    status_filter: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: str | None = None,
+    summary: bool = False,
+) -> Response:
+    """List orders newest first, with optional filters.
+
+    Pass the X-Next-Cursor header of the previous page as ``cursor`` for
+    keyset pagination; ``offset`` is kept for existing callers and is
+    ignored when a cursor is given. ``summary=true`` returns only the
+    columns the orders table renders, with an item count instead of items.
+    """
+    if summary:
+        serializer = _summary_serializer
+        columns = (*serializer.columns, _ITEM_COUNT)
+    else:
+        serializer = _list_serializer
+        columns = serializer.columns
+
+    after_key = None
+    if cursor is not None:
+        after_date, after_id = decode_cursor(cursor, 2)
+        try:
+            after_key = (datetime.fromisoformat(after_date), int(after_id))
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
+    stmt = _list_statement(columns, customer_id, status_filter, after_key, offset, limit)
     result = await session.execute(stmt)
-    orders = result.scalars().unique().all()
-    return list(orders)
+    rows = result.mappings().all()
+
+    headers = {}
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            last["order_date"].isoformat(), last["order_id"]
+        )
+    return serializer.response(rows, headers=headers)
+
+
+@router.get("/stream")
+async def stream_order_events(
+    customer_id: int | None = None,
+    last_event_id: int | None = None,
+    last_event_id_header: int | None = Header(default=None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """Server-sent events for order creation and status changes.
+
+    Filter with ``customer_id``. Reconnecting clients (EventSource sends
+    Last-Event-ID automatically, or pass ``last_event_id``) receive the
+    events they missed while those are still buffered; otherwise a
+    ``reset`` event asks them to refetch. A client that falls too far
+    behind receives ``overflow`` and the stream closes so it can resume.
+    """
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+    sub = order_events.subscribe(customer_id, resume_from)
+
+    async def frames() -> AsyncIterator[bytes]:
+        try:
+            yield b"retry: 2000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        sub.next(), settings.ORDER_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if event is not None:
+                    yield event.frame
+                elif sub.reset:
+                    yield b"event: reset\ndata: {}\n\n"
+                    sub.reset = False
+                else:
+                    yield b"event: overflow\ndata: {}\n\n"
+                    return
+        finally:
+            order_events.unsubscribe(sub)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{order_id}", response_model=OrderDetailRead)
 async def get_order_detail(
     order_id: int,
     session: DBSession,
+    response: Response,
 ) -> Order:
-    """Return a single order with full details."""
-    result = await session.execute(
-        select(Order).where(Order.order_id == order_id)
-    )
+    """Return a single order with full details.
+
+    The ETag carries the order's version; pass it as If-Match when
+    updating the status.
+    """
+    result = await session.execute(ORDER_DETAIL, {"order_id": order_id})
     order = result.scalar_one_or_none()
 
     if order is None:
@@ -57,60 +215,172 @@ async def get_order_detail(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found",
         )
+    response.headers["ETag"] = _etag(order.version)
     return order
 
 
+@router.get("/{order_id}/llm-usage", response_model=list[LlmUsageRead])
+async def get_order_llm_usage(order_id: int, session: ReadOnlyDBSession) -> list[LlmUsage]:
+    """LLM calls made for an order: model, tokens, latency and cost."""
+    result = await session.execute(
+        select(LlmUsage).where(LlmUsage.order_id == order_id).order_by(LlmUsage.usage_id)
+    )
+    return list(result.scalars().all())
+
+
 @router.post("/process", response_model=ProcessOrderResponse, status_code=201)
 async def process_order(
     body: ProcessOrderRequest,
     session: DBSession,
+    caller_id: CallerID,
+    response: Response,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
 ) -> dict:
-    """Send a transcript to be parsed by Claude and create an order."""
+    """Send a transcript to be parsed by Claude and create an order.
+
+    Requests carrying an Idempotency-Key header are processed at most once;
+    repeats within the retention window receive the original response.
+    """
+
+    async def run() -> dict:
+        if settings.RATE_LIMIT_ENABLED:
+            try:
+                await rate_limiter.acquire(
+                    [
+                        (f"customer:{body.customer_id}", CUSTOMER_POLICY),
+                        (f"caller:{caller_id}", CALLER_POLICY),
+                    ],
+                    cost=rate_limiter.cost_for_message(body.original_message),
+                )
+            except RateLimitExceeded as e:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many order requests, please retry later",
+                    headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+                )
+
+        try:
+            return await processor.process_order(
+                customer_id=body.customer_id,
+                source_type=body.source_type,
+                original_message=body.original_message,
+                session=session,
+            )
+        except BudgetExceeded as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"{e}; retry after the daily reset",
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Order processing failed: {str(e)}",
+            )
+
+    if not idempotency_key:
+        result = await run()
+        analytics_cache.invalidate()
+        return result
+
     try:
-        result = await processor.process_order(
-            customer_id=body.customer_id,
-            source_type=body.source_type,
-            original_message=body.original_message,
-            session=session,
+        result, replayed = await idempotency_store.run(
+            idempotency_key,
+            request_fingerprint(body.model_dump(mode="json")),
+            run,
         )
-        return result
-    except ValueError as e:
+    except IdempotencyKeyReused:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e),
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request body",
         )
-    except Exception as e:
+    except IdempotencyInProgress:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Order processing failed: {str(e)}",
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed",
         )
 
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    else:
+        analytics_cache.invalidate()
+    return result
+
+
+@router.patch("/status", response_model=BulkUpdateOrderStatusResponse)
+async def bulk_update_order_status(
+    body: BulkUpdateOrderStatusRequest,
+    session: DBSession,
+) -> dict:
+    """Apply one status transition to many orders (e.g. clear a review queue).
+
+    Select orders by ``order_ids`` (optionally only those in
+    ``from_status``) or by ``filter``. Each requested order is reported as
+    ``updated``, ``conflict`` (already in the target status, or not in
+    ``from_status``) or ``not_found``.
+    """
+    results = await bulk_update_status(
+        session,
+        status=body.status,
+        reviewed_by=body.reviewed_by,
+        order_ids=body.order_ids,
+        from_status=body.from_status,
+        order_filter=body.filter,
+    )
+    await session.commit()
+    analytics_cache.invalidate()
+
+    counts = {"updated": 0, "conflict": 0, "not_found": 0}
+    for r in results:
+        counts[r["outcome"]] += 1
+    return {
+        "updated": counts["updated"],
+        "conflicts": counts["conflict"],
+        "not_found": counts["not_found"],
+        "results": results,
+    }
+
 
 @router.patch("/{order_id}/status", response_model=OrderDetailRead)
 async def update_order_status(
     order_id: int,
     body: UpdateOrderStatusRequest,
     session: DBSession,
-) -> Order:
-    """Update an order's status (e.g. confirm, complete, cancel)."""
-    result = await session.execute(
-        select(Order).where(Order.order_id == order_id)
-    )
-    order = result.scalar_one_or_none()
+    response: Response,
+    if_match: str | None = Header(default=None),
+) -> dict:
+    """Update an order's status (e.g. confirm, complete, cancel).
 
-    if order is None:
+    Send the detail endpoint's ETag as If-Match to apply the change only if
+    nobody else has changed the order since; otherwise 409. Transitions
+    not allowed from the current status are also rejected with 409.
+    """
+    try:
+        row = await transition_order(
+            session,
+            order_id,
+            status=body.status,
+            reviewed_by=body.reviewed_by,
+            expected_version=_parse_if_match(if_match),
+        )
+    except OrderNotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found",
         )
-
-    order.status = body.status
-    if body.reviewed_by:
-        order.reviewed_by = body.reviewed_by
-        order.reviewed_at = datetime.now()
-    order.updated_at = datetime.now()
+    except TransitionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=e.reason,
+            headers={"ETag": _etag(e.version)},
+        )
 
     await session.commit()
-    await session.refresh(order)
-
-    return order
+    analytics_cache.invalidate()
+    response.headers["ETag"] = _etag(row.version)
+    return dict(row._mapping)
@@ -1,8 +1,8 @@
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 # ---------------------------------------------------------------------------
@@ -42,8 +42,23 @@ class InventoryRead(BaseModel):
     reorder_point: int = 100
 
 
+class ReorderPlanItem(BaseModel):
+    inventory_id: int
+    sku: str
+    product_name: str
+    quantity_available: int
+    lead_time_days: int
+    daily_consumption: float
+    days_of_cover: Optional[float] = None
+    stockout_date: Optional[date] = None
+    reorder_level: int
+    reorder_date: Optional[date] = None
+    recommended_quantity: int
+    status: str
+
+
 # ---------------------------------------------------------------------------
-# Order Items (JSONB shape)
+# Order Items (JSON shape)
 # ---------------------------------------------------------------------------
 
 class OrderItemSchema(BaseModel):
@@ -55,7 +70,7 @@ class OrderItemSchema(BaseModel):
 
 
 # ---------------------------------------------------------------------------
-# Order Warning (JSONB shape)
+# Order Warning (JSON shape)
 # ---------------------------------------------------------------------------
 
 class OrderWarning(BaseModel):
@@ -90,6 +105,22 @@ class OrderRead(BaseModel):
     customer_name: Optional[str] = None
 
 
+class OrderSummaryRead(BaseModel):
+    """Columns rendered by the dashboard orders table (no line items)."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    order_id: int
+    order_number: str
+    customer_id: Optional[int] = None
+    customer_company_name: str
+    order_date: datetime
+    status: str
+    total_amount: Decimal
+    has_warnings: bool = False
+    item_count: int = 0
+
+
 class OrderDetailRead(OrderRead):
     original_message: Optional[str] = None
     quote_text: Optional[str] = None
@@ -100,6 +131,7 @@ class OrderDetailRead(OrderRead):
     requires_human_review: bool = False
     reviewed_by: Optional[str] = None
     reviewed_at: Optional[datetime] = None
+    version: int = 1
 
 
 # ---------------------------------------------------------------------------
@@ -137,6 +169,60 @@ class UpdateOrderStatusRequest(BaseModel):
     reviewed_by: Optional[str] = None
 
 
+# Most orders one bulk status update touches, by id list or by filter
+BULK_STATUS_MAX_ORDERS = 1000
+
+
+class BulkOrderFilter(BaseModel):
+    status: Optional[str] = None
+    customer_id: Optional[int] = None
+    has_warnings: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def _not_empty(self) -> "BulkOrderFilter":
+        if self.status is None and self.customer_id is None and self.has_warnings is None:
+            raise ValueError("filter needs at least one of status, customer_id or has_warnings")
+        return self
+
+
+class BulkUpdateOrderStatusRequest(BaseModel):
+    """Select orders by ``order_ids`` or by ``filter`` (exactly one).
+
+    A filter matches at most BULK_STATUS_MAX_ORDERS orders per request,
+    lowest ids first; repeat the request while that many are updated.
+    """
+
+    status: str = Field(pattern=r"^(pending|processing|completed|review_needed|error|cancelled)$")
+    reviewed_by: Optional[str] = None
+    order_ids: Optional[list[int]] = Field(
+        default=None, min_length=1, max_length=BULK_STATUS_MAX_ORDERS
+    )
+    # With order_ids: only transition orders currently in this status.
+    from_status: Optional[str] = None
+    filter: Optional[BulkOrderFilter] = None
+
+    @model_validator(mode="after")
+    def _one_selector(self) -> "BulkUpdateOrderStatusRequest":
+        if (self.order_ids is None) == (self.filter is None):
+            raise ValueError("Provide exactly one of order_ids or filter")
+        return self
+
+
+class BulkStatusResult(BaseModel):
+    order_id: int
+    outcome: Literal["updated", "conflict", "not_found"]
+    status: Optional[str] = None
+    previous_status: Optional[str] = None
+    version: Optional[int] = None
+
+
+class BulkUpdateOrderStatusResponse(BaseModel):
+    updated: int
+    conflicts: int
+    not_found: int
+    results: list[BulkStatusResult]
+
+
 # ---------------------------------------------------------------------------
 # Analytics
 # ---------------------------------------------------------------------------
@@ -149,8 +235,47 @@ class AnalyticsSummary(BaseModel):
     error_count: int
 
 
+class TimeseriesPoint(BaseModel):
+    period_start: date
+    order_count: int
+    revenue: Decimal
+    orders_by_status: dict[str, int]
+
+
 class TopProduct(BaseModel):
     sku: str
     product_name: str
     total_qty: int
     total_revenue: Decimal
+
+
+class LlmUsageRollup(BaseModel):
+    """LLM calls, tokens and cost for one day or customer, per model."""
+
+    bucket_date: Optional[date] = None
+    customer_id: Optional[int] = None
+    model: str
+    request_count: int
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cache_creation_tokens: int
+    cost_usd: Decimal
+
+
+class LlmUsageRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    usage_id: int
+    order_id: Optional[int] = None
+    interaction_id: Optional[int] = None
+    customer_id: Optional[int] = None
+    operation: str
+    model: str
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cache_creation_tokens: int
+    latency_ms: int
+    cost_usd: Decimal
+    created_at: datetime
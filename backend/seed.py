@@ -1,5 +1,7 @@
 """Seed the database with sample customers and inventory.
 
+Run migrate_schema.py first so the tables exist.
+
 Usage:
     python seed.py
 """
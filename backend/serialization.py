@@ -0,0 +1,73 @@
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Iterable, Mapping
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import Column
+from sqlalchemy.orm import DeclarativeBase
+
+
+def _default(value: Any) -> Any:
+    # Match pydantic's JSON mode: Decimal as its exact string form, no float drift.
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as JSON bytes with orjson."""
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RowSerializer:
+    """Serialize DB rows straight to the JSON shape of a read schema.
+
+    Skips ORM hydration and pydantic validation for list endpoints whose
+    columns map one-to-one onto the schema. Schema fields without a
+    matching column are emitted with their default value.
+    """
+
+    def __init__(self, schema: type[BaseModel], model: type[DeclarativeBase]) -> None:
+        table_columns = model.__table__.columns
+        self.fields = list(schema.model_fields)
+        self.columns: list[Column] = [
+            table_columns[name] for name in self.fields if name in table_columns
+        ]
+        self.defaults = {
+            name: field.get_default(call_default_factory=True)
+            for name, field in schema.model_fields.items()
+            if name not in table_columns
+        }
+
+    def to_dicts(self, rows: Iterable[Mapping[str, Any]]) -> list[dict[str, Any]]:
+        defaults = self.defaults
+        if not defaults:
+            return [dict(row) for row in rows]
+        return [{**defaults, **row} for row in rows]
+
+    def dumps(self, rows: Iterable[Mapping[str, Any]]) -> bytes:
+        return dumps(self.to_dicts(rows))
+
+    def response(
+        self, rows: Iterable[Mapping[str, Any]], headers: Mapping[str, str] | None = None
+    ) -> Response:
+        return Response(
+            content=self.dumps(rows),
+            media_type="application/json",
+            headers=dict(headers) if headers else None,
+        )
+
+
+@lru_cache(maxsize=None)
+def row_serializer(schema: type[BaseModel], model: type[DeclarativeBase]) -> RowSerializer:
+    """Cached RowSerializer per (schema, model) pair."""
+    return RowSerializer(schema, model)
@@ -3,6 +3,7 @@ import json
 import logging
 import os
 import tempfile
+import time
 from pathlib import Path
 from typing import Any
 
@@ -11,6 +12,9 @@ import httpx
 import requests
 
 from config import settings
+from metrics import record_provider_error, record_usage, track_stage
+from services.llm_usage import LlmCall, record_llm_call_detached
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -34,8 +38,6 @@ Example output:
 Do NOT include any explanation, markdown fences, or extra keys.
 """
 
-WC_BASE_URL = "https://api.whitecircle.ai"
-
 
 # ---------------------------------------------------------------------------
 # Exceptions
@@ -57,6 +59,7 @@ class AIService:
     def __init__(self) -> None:
         self.anthropic_client = anthropic.Anthropic(
             api_key=settings.ANTHROPIC_API_KEY,
+            base_url=settings.ANTHROPIC_BASE_URL or None,
         )
 
     # ------------------------------------------------------------------
@@ -70,6 +73,10 @@ class AIService:
 
         file_url may be a local filesystem path OR an https:// URL.
         """
+        with track_stage("transcription"):
+            return await self._transcribe(file_url)
+
+    async def _transcribe(self, file_url: str) -> str:
         local_path: str | None = None
         tmp_path: str | None = None
 
@@ -97,6 +104,7 @@ class AIService:
                     return await self._transcribe_elevenlabs(local_path)
                 except Exception as exc:
                     elevenlabs_error = exc
+                    record_provider_error("elevenlabs", exc)
                     logger.error("ElevenLabs transcription failed: %s", exc)
             else:
                 logger.warning("ELEVENLABS_API_KEY not set — skipping ElevenLabs")
@@ -108,6 +116,7 @@ class AIService:
                     return await self._transcribe_whisper(local_path)
                 except Exception as exc:
                     openai_error = exc
+                    record_provider_error("openai", exc)
                     logger.error("OpenAI Whisper transcription failed: %s", exc)
             else:
                 logger.warning("OPENAI_API_KEY not set — skipping Whisper fallback")
@@ -135,9 +144,9 @@ class AIService:
         """Call ElevenLabs Speech-to-Text API."""
         logger.info("Transcribing via ElevenLabs: %s", local_path)
         async with httpx.AsyncClient() as client:
-            with open(local_path, "rb") as f:
+            with span("elevenlabs.speech_to_text", "client"), open(local_path, "rb") as f:
                 resp = await client.post(
-                    "https://api.elevenlabs.io/v1/speech-to-text",
+                    f"{settings.ELEVENLABS_BASE_URL}/v1/speech-to-text",
                     headers={"xi-api-key": settings.ELEVENLABS_API_KEY},
                     files={"file": (Path(local_path).name, f)},
                     data={"model_id": "scribe_v1"},
@@ -156,7 +165,7 @@ class AIService:
         import openai
 
         client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        with open(local_path, "rb") as f:
+        with open(local_path, "rb") as f, span("openai.audio.transcriptions", "client"):
             transcript = await client.audio.transcriptions.create(
                 model="whisper-1",
                 file=f,
@@ -171,16 +180,35 @@ class AIService:
     # Structured extraction via Anthropic Claude  (Skill 1)
     # ------------------------------------------------------------------
     async def extract_order_data(self, text: str) -> list[dict[str, Any]]:
-        """Send transcript text to Claude and get back structured order items."""
+        """Send transcript text to Claude and get back structured order items.
+
+        The call's token usage and cost are recorded before the reply is
+        parsed, without a customer: the only callers (order_orchestrator)
+        key customers and interactions by UUID, which llm_usage cannot
+        store. For the same reason these calls always use
+        LLM_EXTRACTION_MODEL and are not held to per-customer budgets.
+        """
         logger.info("extract_order_data called — using Anthropic Claude")
 
-        response = await asyncio.to_thread(
-            self.anthropic_client.messages.create,
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=1024,
-            temperature=0,
-            system=ORDER_EXTRACTION_SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": text}],
+        with track_stage("extraction"), span("anthropic.messages.create", "client"):
+            started = time.perf_counter()
+            try:
+                response = await asyncio.to_thread(
+                    self.anthropic_client.messages.create,
+                    model=settings.LLM_EXTRACTION_MODEL,
+                    max_tokens=1024,
+                    temperature=0,
+                    system=ORDER_EXTRACTION_SYSTEM_PROMPT,
+                    messages=[{"role": "user", "content": text}],
+                )
+            except Exception as e:
+                record_provider_error("anthropic", e)
+                raise
+        record_usage(response.model, response.usage)
+        await record_llm_call_detached(
+            LlmCall.from_response(response, started),
+            operation="transcript_extraction",
+            customer_id=None,
         )
 
         raw_text = response.content[0].text
@@ -206,7 +234,7 @@ class AIService:
 
         def _call() -> dict[str, Any]:
             resp = requests.post(
-                f"{WC_BASE_URL}/policies/verify",
+                f"{settings.WHITE_CIRCLE_BASE_URL}/policies/verify",
                 headers={
                     "Authorization": f"Bearer {settings.WHITE_CIRCLE_API_KEY}",
                     "Content-Type": "application/json",
@@ -219,6 +247,11 @@ class AIService:
             resp.raise_for_status()
             return resp.json()
 
-        result = await asyncio.to_thread(_call)
+        with track_stage("safety"), span("white_circle.verify", "client"):
+            try:
+                result = await asyncio.to_thread(_call)
+            except Exception as e:
+                record_provider_error("white_circle", e)
+                raise
         logger.info("White Circle decision: %s", result.get("decision"))
         return result
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    generation: int
+    computed_at: float
+
+
+class AnalyticsCache:
+    """In-process response cache for the analytics endpoints.
+
+    Entries are keyed by endpoint and parameters and are invalidated by
+    order writes (``invalidate()`` bumps a generation counter) rather than
+    by a short TTL. For ANALYTICS_CACHE_STALE_SECONDS after an entry went
+    stale (the invalidation that superseded it, or its TTL running out) it
+    is still served while one background task recomputes it; after that
+    it is recomputed in the foreground.
+    Concurrent misses for the same key share a single computation.
+
+    Invalidation is per worker. ANALYTICS_CACHE_TTL_SECONDS bounds how
+    long a worker can miss writes made by another. ``invalidated_at`` is
+    the monotonic time of the last invalidation; computations pass it to
+    the read router so they do not read a replica that may not have
+    replayed the write yet.
+    """
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+        # generation -> monotonic time of the invalidate() that started it;
+        # bumps older than the stale window are dropped.
+        self._invalidated_at: dict[int, float] = {}
+        self.invalidated_at = float("-inf")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.recomputes = 0
+        self.recompute_seconds_total = 0.0
+        self.recompute_seconds_max = 0.0
+
+    def invalidate(self) -> None:
+        """Mark every cached entry stale. Called after order and LLM usage writes."""
+        now = time.monotonic()
+        self._generation += 1
+        self._invalidated_at[self._generation] = now
+        self.invalidated_at = now
+        horizon = now - settings.ANALYTICS_CACHE_STALE_SECONDS
+        for generation, at in list(self._invalidated_at.items()):
+            if at >= horizon:
+                break
+            del self._invalidated_at[generation]
+
+    async def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        if not settings.ANALYTICS_CACHE_ENABLED:
+            return await compute()
+
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = now - entry.computed_at
+            fresh = (
+                entry.generation == self._generation
+                and age < settings.ANALYTICS_CACHE_TTL_SECONDS
+            )
+            if fresh:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            stale_since = self._stale_since(entry)
+            if (
+                stale_since is not None
+                and now - stale_since < settings.ANALYTICS_CACHE_STALE_SECONDS
+            ):
+                self.stale_hits += 1
+                self._revalidate(key, compute)
+                return entry.value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            inflight = self._revalidate(key, compute)
+        return await asyncio.shield(inflight)
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "recomputes": self.recomputes,
+            "recompute_seconds_total": self.recompute_seconds_total,
+            "recompute_seconds_max": self.recompute_seconds_max,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _stale_since(self, entry: _Entry) -> float | None:
+        """When *entry* stopped being fresh, or None if that is out of the stale window."""
+        if entry.generation == self._generation:
+            return entry.computed_at + settings.ANALYTICS_CACHE_TTL_SECONDS
+        # Superseded by the first invalidation after the one it was computed under
+        return self._invalidated_at.get(entry.generation + 1)
+
+    def _revalidate(
+        self, key: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._recompute(key, compute))
+            # Background revalidations may have no awaiter; retrieve the
+            # exception so failures are only logged once, by _recompute.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _recompute(
+        self, key: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        # Capture the generation first: a write that lands mid-computation
+        # leaves the new entry already stale.
+        generation = self._generation
+        started = time.perf_counter()
+        try:
+            value = await compute()
+        except Exception:
+            logger.exception("Analytics recompute failed for %s", key)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        elapsed = time.perf_counter() - started
+        self.recomputes += 1
+        self.recompute_seconds_total += elapsed
+        self.recompute_seconds_max = max(self.recompute_seconds_max, elapsed)
+
+        self._entries[key] = _Entry(
+            value=value, generation=generation, computed_at=time.monotonic()
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.ANALYTICS_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+        return value
+
+
+analytics_cache = AnalyticsCache()
@@ -0,0 +1,192 @@
+import logging
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Any, Iterable
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Order, ProductDemand, ProductDemandDaily
+
+logger = logging.getLogger(__name__)
+
+# Orders in this status do not count towards product demand.
+EXCLUDED_STATUS = "cancelled"
+
+
+def _aggregate_items(items: list[dict[str, Any]], sign: int) -> dict[str, dict[str, Any]]:
+    """Collapse an order's JSON items into one signed delta per SKU."""
+    per_sku: dict[str, dict[str, Any]] = defaultdict(
+        lambda: {"product_name": None, "qty": 0, "revenue": Decimal("0")}
+    )
+    for item in items or []:
+        sku = item.get("sku", "UNKNOWN")
+        entry = per_sku[sku]
+        entry["product_name"] = item.get("product_name", sku)
+        entry["qty"] += sign * int(item.get("quantity", 0))
+        entry["revenue"] += sign * Decimal(str(item.get("line_total", 0)))
+    return per_sku
+
+
+async def _upsert_demand(
+    session: AsyncSession, daily: dict[tuple[date, int, str], dict[str, Any]]
+) -> None:
+    """Add signed per-(day, customer, SKU) deltas to both demand rollups.
+
+    Keys must be unique per statement (ON CONFLICT cannot touch a row
+    twice), hence the dict.
+    """
+    if not daily:
+        return
+
+    per_sku: dict[str, dict[str, Any]] = defaultdict(
+        lambda: {"product_name": None, "qty": 0, "revenue": Decimal("0")}
+    )
+    for (_, _, sku), d in daily.items():
+        entry = per_sku[sku]
+        entry["product_name"] = d["product_name"]
+        entry["qty"] += d["qty"]
+        entry["revenue"] += d["revenue"]
+
+    totals = insert(ProductDemand).values([
+        {
+            "sku": sku,
+            "product_name": d["product_name"],
+            "total_qty": d["qty"],
+            "total_revenue": d["revenue"],
+        }
+        for sku, d in per_sku.items()
+    ])
+    await session.execute(
+        totals.on_conflict_do_update(
+            index_elements=[ProductDemand.sku],
+            set_={
+                "product_name": totals.excluded.product_name,
+                "total_qty": ProductDemand.total_qty + totals.excluded.total_qty,
+                "total_revenue": ProductDemand.total_revenue + totals.excluded.total_revenue,
+            },
+        )
+    )
+
+    rows = insert(ProductDemandDaily).values([
+        {
+            "bucket_date": bucket_date,
+            "customer_id": customer_id,
+            "sku": sku,
+            "product_name": d["product_name"],
+            "total_qty": d["qty"],
+            "total_revenue": d["revenue"],
+        }
+        for (bucket_date, customer_id, sku), d in daily.items()
+    ])
+    await session.execute(
+        rows.on_conflict_do_update(
+            index_elements=[
+                ProductDemandDaily.bucket_date,
+                ProductDemandDaily.customer_id,
+                ProductDemandDaily.sku,
+            ],
+            set_={
+                "product_name": rows.excluded.product_name,
+                "total_qty": ProductDemandDaily.total_qty + rows.excluded.total_qty,
+                "total_revenue": ProductDemandDaily.total_revenue + rows.excluded.total_revenue,
+            },
+        )
+    )
+
+
+def _collect(
+    daily: dict[tuple[date, int, str], dict[str, Any]], order: Order, sign: int
+) -> None:
+    bucket_date = order.order_date.date()
+    customer_id = order.customer_id or 0
+    for sku, d in _aggregate_items(order.items, sign).items():
+        entry = daily.setdefault(
+            (bucket_date, customer_id, sku),
+            {"product_name": None, "qty": 0, "revenue": Decimal("0")},
+        )
+        entry["product_name"] = d["product_name"]
+        entry["qty"] += d["qty"]
+        entry["revenue"] += d["revenue"]
+
+
+async def apply_order_demand(session: AsyncSession, order: Order, sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) an order's items from the demand rollups.
+
+    Runs in the caller's transaction so the rollups commit or roll back
+    together with the order write.
+    """
+    daily: dict[tuple[date, int, str], dict[str, Any]] = {}
+    _collect(daily, order, sign)
+    await _upsert_demand(session, daily)
+
+
+def _status_sign(previous_status: str, status: str) -> int:
+    if previous_status == status:
+        return 0
+    if status == EXCLUDED_STATUS:
+        return -1
+    if previous_status == EXCLUDED_STATUS:
+        return 1
+    return 0
+
+
+async def apply_status_change(
+    session: AsyncSession, order: Order, previous_status: str
+) -> None:
+    """Adjust the rollups when an order moves into or out of the excluded status."""
+    sign = _status_sign(previous_status, order.status)
+    if sign:
+        await apply_order_demand(session, order, sign=sign)
+
+
+async def apply_bulk_status_change(
+    session: AsyncSession, changes: Iterable[tuple[Order, str]]
+) -> None:
+    """``apply_status_change`` for many ``(order, previous_status)`` pairs at once."""
+    daily: dict[tuple[date, int, str], dict[str, Any]] = {}
+    for order, previous_status in changes:
+        sign = _status_sign(previous_status, order.status)
+        if sign:
+            _collect(daily, order, sign)
+    await _upsert_demand(session, daily)
+
+
+_BACKFILL_DAILY_SQL = text(
+    """
+    INSERT INTO product_demand_daily
+        (bucket_date, customer_id, sku, product_name, total_qty, total_revenue)
+    SELECT
+        CAST(o.order_date AS DATE),
+        COALESCE(o.customer_id, 0),
+        COALESCE(li->>'sku', 'UNKNOWN'),
+        MAX(COALESCE(li->>'product_name', li->>'sku', 'UNKNOWN')),
+        SUM(COALESCE(CAST(li->>'quantity' AS INTEGER), 0)),
+        SUM(COALESCE(CAST(li->>'line_total' AS NUMERIC), 0))
+    FROM orders_new o
+    CROSS JOIN LATERAL jsonb_array_elements(CAST(o.items AS jsonb)) AS li
+    WHERE o.status <> :excluded
+    GROUP BY 1, 2, 3
+    """
+)
+
+_BACKFILL_TOTALS_SQL = text(
+    """
+    INSERT INTO product_demand (sku, product_name, total_qty, total_revenue)
+    SELECT sku, MAX(product_name), SUM(total_qty), SUM(total_revenue)
+    FROM product_demand_daily
+    GROUP BY sku
+    """
+)
+
+
+async def rebuild_demand_rollups(session: AsyncSession) -> None:
+    """Recompute both demand rollups from ``orders_new.items`` (backfill)."""
+    await session.execute(delete(ProductDemandDaily))
+    await session.execute(delete(ProductDemand))
+    await session.execute(_BACKFILL_DAILY_SQL, {"excluded": EXCLUDED_STATUS})
+    await session.execute(_BACKFILL_TOTALS_SQL)
+    await session.commit()
+    logger.info("Product demand rollups rebuilt")
@@ -0,0 +1,86 @@
+import csv
+import io
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Iterable, Mapping
+
+from serialization import dumps
+
+# Per-line columns appended to each order row when items are flattened.
+LINE_COLUMNS = ["line_number", "sku", "product_name", "quantity", "unit_price", "line_total"]
+
+
+def flatten_order_items(rows: Iterable[Mapping[str, Any]]) -> list[dict[str, Any]]:
+    """Expand each order row into one row per line item (items column dropped).
+
+    Orders without items yield a single row with empty line columns so
+    they still appear in the export.
+    """
+    flat: list[dict[str, Any]] = []
+    for row in rows:
+        order = {k: v for k, v in row.items() if k != "items"}
+        items = row.get("items") or []
+        if not items:
+            flat.append({**order, **dict.fromkeys(LINE_COLUMNS)})
+            continue
+        for number, item in enumerate(items, start=1):
+            flat.append({
+                **order,
+                "line_number": number,
+                "sku": item.get("sku"),
+                "product_name": item.get("product_name"),
+                "quantity": item.get("quantity"),
+                "unit_price": item.get("unit_price"),
+                "line_total": item.get("line_total"),
+            })
+    return flat
+
+
+def encode_ndjson(rows: Iterable[Mapping[str, Any]]) -> bytes:
+    """One JSON object per line."""
+    return b"".join(dumps(dict(row)) + b"\n" for row in rows)
+
+
+def _csv_cell(value: Any) -> Any:
+    # Nested JSON (items, warnings) is embedded as a JSON string.
+    if isinstance(value, (list, dict)):
+        return dumps(value).decode()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if value is None:
+        return ""
+    return value
+
+
+def encode_csv(
+    rows: Iterable[Mapping[str, Any]], columns: list[str], header: bool
+) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_cell(row.get(col)) for col in columns])
+    return buf.getvalue().encode()
+
+
+async def stream_export(
+    partitions: AsyncIterator[list[Mapping[str, Any]]],
+    *,
+    fmt: str,
+    columns: list[str],
+    flatten_items: bool = False,
+) -> AsyncIterator[bytes]:
+    """Encode row partitions from a server-side cursor as NDJSON or CSV chunks."""
+    if flatten_items:
+        columns = [c for c in columns if c != "items"] + LINE_COLUMNS
+    header = True
+    async for partition in partitions:
+        rows = flatten_order_items(partition) if flatten_items else partition
+        if fmt == "csv":
+            yield encode_csv(rows, columns, header)
+            header = False
+        else:
+            yield encode_ndjson(rows)
+    if fmt == "csv" and header:
+        # Empty result: still emit the header row.
+        yield encode_csv([], columns, True)
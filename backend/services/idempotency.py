@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import text
+
+from config import settings
+from database import engine
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# How often a duplicate request served by another worker re-checks the row.
+_POLL_INTERVAL_SECONDS = 0.25
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when an Idempotency-Key is replayed with a different request body."""
+
+
+class IdempotencyInProgress(Exception):
+    """Raised when the original request is still running after the wait timeout."""
+
+
+# Claim the key: insert a fresh row, or take over one whose retention window
+# has passed or whose owner died mid-request (stale in_progress lock).
+_CLAIM_SQL = text(
+    """
+    INSERT INTO idempotency_keys
+        (idempotency_key, request_hash, status, locked_at, expires_at, created_at)
+    VALUES
+        (:key, :hash, 'in_progress', now(), now() + make_interval(secs => :retention), now())
+    ON CONFLICT (idempotency_key) DO UPDATE SET
+        request_hash = EXCLUDED.request_hash,
+        status = 'in_progress',
+        response = NULL,
+        locked_at = now(),
+        expires_at = EXCLUDED.expires_at,
+        created_at = now()
+    WHERE idempotency_keys.expires_at < now()
+       OR (idempotency_keys.status = 'in_progress'
+           AND idempotency_keys.locked_at < now() - make_interval(secs => :lock_timeout))
+    RETURNING idempotency_key
+    """
+)
+
+_LOAD_SQL = text(
+    """
+    SELECT request_hash, status, response
+    FROM idempotency_keys
+    WHERE idempotency_key = :key
+    """
+)
+
+_COMPLETE_SQL = text(
+    """
+    UPDATE idempotency_keys
+    SET status = 'completed', response = CAST(:response AS JSON)
+    WHERE idempotency_key = :key
+    """
+)
+
+_RELEASE_SQL = text(
+    "DELETE FROM idempotency_keys WHERE idempotency_key = :key AND status = 'in_progress'"
+)
+
+
+def request_fingerprint(payload: dict[str, Any]) -> str:
+    """Stable hash of a request body, used to detect key reuse."""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Runs a request at most once per Idempotency-Key.
+
+    The outcome of the first successful call is stored in
+    ``idempotency_keys`` and replayed for repeats within the retention
+    window. Concurrent duplicates in the same worker await the in-flight
+    call directly; duplicates in other workers poll the stored row until
+    the owner finishes. Failed calls release the key so a retry can run.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, tuple[str, asyncio.Future]] = {}
+
+    @traced("idempotency.run")
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        func: Callable[[], Awaitable[dict[str, Any]]],
+    ) -> tuple[dict[str, Any], bool]:
+        """Return ``(response, replayed)`` for the request identified by ``key``."""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            fut_hash, fut = inflight
+            if fut_hash != fingerprint:
+                raise IdempotencyKeyReused(key)
+            return await asyncio.shield(fut), True
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, fut)
+        try:
+            if await self._claim(key, fingerprint):
+                result, replayed = await self._execute(key, func), False
+            else:
+                result, replayed = await self._wait_for_owner(key, fingerprint, func)
+        except BaseException as exc:
+            fut.set_exception(exc)
+            # Mark retrieved so an unawaited future does not log a warning.
+            fut.exception()
+            raise
+        else:
+            fut.set_result(result)
+            return result, replayed
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _claim(self, key: str, fingerprint: str) -> bool:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                _CLAIM_SQL,
+                {
+                    "key": key,
+                    "hash": fingerprint,
+                    "retention": settings.IDEMPOTENCY_RETENTION_SECONDS,
+                    "lock_timeout": settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS,
+                },
+            )
+            return result.first() is not None
+
+    async def _execute(
+        self, key: str, func: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> dict[str, Any]:
+        try:
+            result = await func()
+        except BaseException:
+            async with engine.begin() as conn:
+                await conn.execute(_RELEASE_SQL, {"key": key})
+            raise
+
+        async with engine.begin() as conn:
+            await conn.execute(
+                _COMPLETE_SQL,
+                {"key": key, "response": json.dumps(result, default=str)},
+            )
+        return result
+
+    async def _wait_for_owner(
+        self,
+        key: str,
+        fingerprint: str,
+        func: Callable[[], Awaitable[dict[str, Any]]],
+    ) -> tuple[dict[str, Any], bool]:
+        deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS
+        while True:
+            async with engine.connect() as conn:
+                row = (await conn.execute(_LOAD_SQL, {"key": key})).first()
+
+            if row is None:
+                # The owner failed and released the key; run it ourselves.
+                if await self._claim(key, fingerprint):
+                    return await self._execute(key, func), False
+                continue
+            if row.request_hash != fingerprint:
+                raise IdempotencyKeyReused(key)
+            if row.status == "completed":
+                logger.info("Replaying stored response for Idempotency-Key %s", key)
+                return row.response, True
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgress(key)
+            await asyncio.sleep(_POLL_INTERVAL_SECONDS)
+
+
+idempotency_store = IdempotencyStore()
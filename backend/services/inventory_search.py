@@ -0,0 +1,247 @@
+import bisect
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import and_, case, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Inventory
+from schemas import InventoryRead
+from serialization import row_serializer
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# pg_trgm's default similarity threshold for the % operator.
+SIMILARITY_THRESHOLD = 0.3
+
+_serializer = row_serializer(InventoryRead, Inventory)
+_WORD_RE = re.compile(r"[0-9a-z]+")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def trigrams(value: str) -> set[str]:
+    """Trigram set as computed by pg_trgm (lower-cased, words padded)."""
+    grams: set[str] = set()
+    for word in _WORD_RE.findall(value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+@dataclass
+class SearchPage:
+    rows: list[dict[str, Any]]
+    next_key: tuple[float, str] | None
+
+
+@traced("inventory_search.search_inventory")
+async def search_inventory(
+    session: AsyncSession,
+    *,
+    q: str | None,
+    category: str | None,
+    low_stock: bool,
+    limit: int,
+    after: tuple[float, str] | None,
+) -> SearchPage:
+    """Rank inventory by match quality, then SKU, one keyset page at a time.
+
+    A row matches ``q`` when its SKU starts with it, its product name
+    contains it, or its product name is trigram-similar to it. SKU prefix
+    matches score 1.0; other matches score their name similarity.
+    """
+    if session.bind.dialect.name == "postgresql":
+        return await _search_postgres(session, q, category, low_stock, limit, after)
+    return await memory_index.search(session, q, category, low_stock, limit, after)
+
+
+async def _search_postgres(
+    session: AsyncSession,
+    q: str | None,
+    category: str | None,
+    low_stock: bool,
+    limit: int,
+    after: tuple[float, str] | None,
+) -> SearchPage:
+    if q:
+        escaped = _escape_like(q)
+        sku_prefix = Inventory.sku.ilike(f"{escaped}%", escape="\\")
+        score = func.greatest(
+            case((sku_prefix, 1.0), else_=0.0),
+            func.similarity(Inventory.product_name, q),
+        )
+        match = or_(
+            sku_prefix,
+            Inventory.product_name.ilike(f"%{escaped}%", escape="\\"),
+            Inventory.product_name.op("%")(q),
+        )
+    else:
+        score = literal(0.0)
+        match = None
+
+    stmt = select(*_serializer.columns, score.label("score"))
+    if match is not None:
+        stmt = stmt.where(match)
+    if category is not None:
+        stmt = stmt.where(Inventory.category == category)
+    if low_stock:
+        stmt = stmt.where(Inventory.quantity_available <= Inventory.reorder_point)
+    if after is not None:
+        after_score, after_sku = after
+        stmt = stmt.where(
+            or_(score < after_score, and_(score == after_score, Inventory.sku > after_sku))
+        )
+    stmt = stmt.order_by(score.desc(), Inventory.sku).limit(limit)
+
+    result = await session.execute(stmt)
+    rows = [dict(row) for row in result.mappings().all()]
+    next_key = None
+    if len(rows) == limit:
+        next_key = (float(rows[-1]["score"]), rows[-1]["sku"])
+    for row in rows:
+        del row["score"]
+    return SearchPage(rows=rows, next_key=next_key)
+
+
+@dataclass
+class _IndexedItem:
+    inventory_id: int
+    sku: str
+    sku_lower: str
+    name_lower: str
+    name_trigrams: set[str]
+    category: str | None
+
+
+class InMemoryInventoryIndex:
+    """Pure-Python stand-in for the trigram indexes on non-Postgres databases.
+
+    Holds the searchable text of every inventory row (sorted by SKU for
+    prefix lookups, with precomputed name trigrams) and is rebuilt when the
+    row count or latest update changes. Stock filters are applied against
+    the database for the ranked candidates, page by page.
+    """
+
+    def __init__(self) -> None:
+        self._signature: tuple | None = None
+        self._items: list[_IndexedItem] = []
+        self._sku_keys: list[str] = []
+
+    async def _refresh(self, session: AsyncSession) -> None:
+        sig_result = await session.execute(
+            select(
+                func.count(Inventory.inventory_id),
+                func.max(Inventory.inventory_id),
+                func.max(Inventory.updated_at),
+            )
+        )
+        signature = tuple(sig_result.one())
+        if signature == self._signature:
+            return
+
+        result = await session.execute(
+            select(
+                Inventory.inventory_id,
+                Inventory.sku,
+                Inventory.product_name,
+                Inventory.category,
+            )
+        )
+        items = [
+            _IndexedItem(
+                inventory_id=inventory_id,
+                sku=sku,
+                sku_lower=sku.lower(),
+                name_lower=name.lower(),
+                name_trigrams=trigrams(name),
+                category=category,
+            )
+            for inventory_id, sku, name, category in result.all()
+        ]
+        items.sort(key=lambda item: item.sku_lower)
+        self._items = items
+        self._sku_keys = [item.sku_lower for item in items]
+        self._signature = signature
+        logger.info("Rebuilt in-memory inventory index (%d items)", len(items))
+
+    def _rank(self, q: str | None, category: str | None) -> list[tuple[float, str, int]]:
+        items = self._items
+        if category is not None:
+            items = [item for item in items if item.category == category]
+        if not q:
+            return [(0.0, item.sku, item.inventory_id) for item in items]
+
+        q_lower = q.lower()
+        q_grams = trigrams(q)
+        prefix_ids: set[int] = set()
+        lo = bisect.bisect_left(self._sku_keys, q_lower)
+        hi = bisect.bisect_left(self._sku_keys, q_lower + "￿")
+        for item in self._items[lo:hi]:
+            prefix_ids.add(item.inventory_id)
+
+        ranked: list[tuple[float, str, int]] = []
+        for item in items:
+            sim = similarity(item.name_trigrams, q_grams)
+            if item.inventory_id in prefix_ids:
+                score = 1.0
+            elif q_lower in item.name_lower or sim >= SIMILARITY_THRESHOLD:
+                score = sim
+            else:
+                continue
+            ranked.append((score, item.sku, item.inventory_id))
+        return ranked
+
+    async def search(
+        self,
+        session: AsyncSession,
+        q: str | None,
+        category: str | None,
+        low_stock: bool,
+        limit: int,
+        after: tuple[float, str] | None,
+    ) -> SearchPage:
+        await self._refresh(session)
+        ranked = sorted(self._rank(q, category), key=lambda r: (-r[0], r[1]))
+        if after is not None:
+            after_score, after_sku = after
+            ranked = [
+                r for r in ranked
+                if r[0] < after_score or (r[0] == after_score and r[1] > after_sku)
+            ]
+
+        rows: list[dict[str, Any]] = []
+        last: tuple[float, str] | None = None
+        for start in range(0, len(ranked), limit):
+            batch = ranked[start:start + limit]
+            stmt = select(*_serializer.columns).where(
+                Inventory.inventory_id.in_([r[2] for r in batch])
+            )
+            if low_stock:
+                stmt = stmt.where(Inventory.quantity_available <= Inventory.reorder_point)
+            result = await session.execute(stmt)
+            by_id = {row["inventory_id"]: dict(row) for row in result.mappings().all()}
+            for score, sku, inventory_id in batch:
+                row = by_id.get(inventory_id)
+                if row is None:
+                    continue
+                rows.append(row)
+                last = (score, sku)
+                if len(rows) == limit:
+                    return SearchPage(rows=rows, next_key=last)
+        return SearchPage(rows=rows, next_key=None)
+
+
+memory_index = InMemoryInventoryIndex()
@@ -0,0 +1,233 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import async_session_factory
+from models import LlmUsage, LlmUsageDaily
+from services.analytics_cache import analytics_cache
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens: (input, output, cache read, cache write), matched
+# by model name prefix.
+MODEL_PRICING: dict[str, tuple[Decimal, Decimal, Decimal, Decimal]] = {
+    "claude-opus-4": (Decimal("15"), Decimal("75"), Decimal("1.50"), Decimal("18.75")),
+    "claude-sonnet-4": (Decimal("3"), Decimal("15"), Decimal("0.30"), Decimal("3.75")),
+    "claude-haiku-4-5": (Decimal("1"), Decimal("5"), Decimal("0.10"), Decimal("1.25")),
+    "claude-3-5-haiku": (Decimal("0.80"), Decimal("4"), Decimal("0.08"), Decimal("1")),
+}
+
+_MILLION = Decimal(1_000_000)
+_unpriced_models: set[str] = set()
+
+
+class BudgetExceeded(Exception):
+    """Raised when a daily LLM budget is spent and LLM_BUDGET_ACTION is "defer"."""
+
+    def __init__(self, scope: str, retry_after: float) -> None:
+        super().__init__(f"Daily LLM budget exhausted for {scope}")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+def _pricing(model: str) -> tuple[Decimal, Decimal, Decimal, Decimal] | None:
+    for prefix, prices in MODEL_PRICING.items():
+        if model.startswith(prefix):
+            return prices
+    if model not in _unpriced_models:
+        _unpriced_models.add(model)
+        logger.warning("No pricing for model %s; its calls are recorded at $0", model)
+    return None
+
+
+@dataclass
+class LlmCall:
+    """Usage of one Anthropic messages call."""
+
+    model: str
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cache_creation_tokens: int
+    latency_ms: int
+
+    @classmethod
+    def from_response(cls, response: Any, started: float) -> "LlmCall":
+        """Build from a response and the ``time.perf_counter()`` taken before the call."""
+        usage = response.usage
+        return cls(
+            model=response.model,
+            input_tokens=usage.input_tokens or 0,
+            output_tokens=usage.output_tokens or 0,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", None) or 0,
+            cache_creation_tokens=getattr(usage, "cache_creation_input_tokens", None) or 0,
+            latency_ms=round((time.perf_counter() - started) * 1000),
+        )
+
+    @property
+    def cost_usd(self) -> Decimal:
+        prices = _pricing(self.model)
+        if prices is None:
+            return Decimal("0")
+        tokens = (
+            self.input_tokens,
+            self.output_tokens,
+            self.cache_read_tokens,
+            self.cache_creation_tokens,
+        )
+        cost = sum(Decimal(n) * price for n, price in zip(tokens, prices)) / _MILLION
+        return cost.quantize(Decimal("0.000001"))
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+async def record_llm_call(
+    session: AsyncSession,
+    call: LlmCall,
+    *,
+    operation: str,
+    customer_id: int | None,
+    order_id: int | None = None,
+    interaction_id: int | None = None,
+) -> LlmUsage:
+    """Store one call and add it to the daily rollup, in the caller's transaction."""
+    cost = call.cost_usd
+    usage = LlmUsage(
+        order_id=order_id,
+        interaction_id=interaction_id,
+        customer_id=customer_id,
+        operation=operation,
+        model=call.model,
+        input_tokens=call.input_tokens,
+        output_tokens=call.output_tokens,
+        cache_read_tokens=call.cache_read_tokens,
+        cache_creation_tokens=call.cache_creation_tokens,
+        latency_ms=call.latency_ms,
+        cost_usd=cost,
+    )
+    session.add(usage)
+    stmt = insert(LlmUsageDaily).values(
+        bucket_date=date.today(),
+        customer_id=customer_id or 0,
+        model=call.model,
+        request_count=1,
+        input_tokens=call.input_tokens,
+        output_tokens=call.output_tokens,
+        cache_read_tokens=call.cache_read_tokens,
+        cache_creation_tokens=call.cache_creation_tokens,
+        cost_usd=cost,
+    )
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[
+                LlmUsageDaily.bucket_date,
+                LlmUsageDaily.customer_id,
+                LlmUsageDaily.model,
+            ],
+            set_={
+                column: getattr(LlmUsageDaily, column) + getattr(stmt.excluded, column)
+                for column in (
+                    "request_count",
+                    "input_tokens",
+                    "output_tokens",
+                    "cache_read_tokens",
+                    "cache_creation_tokens",
+                    "cost_usd",
+                )
+            },
+        )
+    )
+    return usage
+
+
+async def record_llm_call_detached(call: LlmCall, **kwargs: Any) -> int | None:
+    """``record_llm_call`` in its own transaction; returns the usage id.
+
+    Used as soon as a call returns, so its tokens are billed even if the
+    response cannot be parsed or the caller's transaction rolls back.
+    Accounting must not fail the call it accounts for, so errors are
+    logged and None is returned. The cached /analytics/llm-usage rollups
+    are invalidated once the row is committed.
+    """
+    try:
+        async with async_session_factory() as session:
+            usage = await record_llm_call(session, call, **kwargs)
+            await session.commit()
+        analytics_cache.invalidate()
+        return usage.usage_id
+    except Exception:
+        logger.exception("Failed to record LLM usage for %s", call.model)
+        return None
+
+
+async def link_llm_call(session: AsyncSession, usage_id: int | None, order_id: int) -> None:
+    """Attach a recorded call to the order it produced, in the order's transaction."""
+    if usage_id is not None:
+        await session.execute(
+            update(LlmUsage).where(LlmUsage.usage_id == usage_id).values(order_id=order_id)
+        )
+
+
+# ---------------------------------------------------------------------------
+# Budgets
+# ---------------------------------------------------------------------------
+
+def _customer_budget(customer_id: int | None) -> float:
+    if customer_id is not None and customer_id in settings.LLM_CUSTOMER_BUDGETS_USD:
+        return settings.LLM_CUSTOMER_BUDGETS_USD[customer_id]
+    return settings.LLM_CUSTOMER_DAILY_BUDGET_USD
+
+
+def _seconds_until_tomorrow() -> float:
+    now = datetime.now()
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (tomorrow - now).total_seconds()
+
+
+async def choose_model(session: AsyncSession, customer_id: int | None) -> str:
+    """Model for the next order extraction, given today's spend.
+
+    Returns LLM_EXTRACTION_MODEL while both the overall and the customer's
+    daily budget have room. Once either is spent, returns
+    LLM_FALLBACK_MODEL ("downgrade") or raises ``BudgetExceeded``
+    ("defer"). Does not query when no budget is configured.
+    """
+    overall_budget = settings.LLM_DAILY_BUDGET_USD
+    customer_budget = _customer_budget(customer_id)
+    if overall_budget <= 0 and customer_budget <= 0:
+        return settings.LLM_EXTRACTION_MODEL
+
+    customer_cost = case(
+        (LlmUsageDaily.customer_id == (customer_id or 0), LlmUsageDaily.cost_usd),
+        else_=0,
+    )
+    overall_spent, customer_spent = (
+        await session.execute(
+            select(
+                func.coalesce(func.sum(LlmUsageDaily.cost_usd), 0),
+                func.coalesce(func.sum(customer_cost), 0),
+            ).where(LlmUsageDaily.bucket_date == date.today())
+        )
+    ).one()
+
+    if 0 < customer_budget <= customer_spent:
+        scope = f"customer {customer_id}"
+    elif 0 < overall_budget <= overall_spent:
+        scope = "all customers"
+    else:
+        return settings.LLM_EXTRACTION_MODEL
+
+    if settings.LLM_BUDGET_ACTION == "defer":
+        raise BudgetExceeded(scope, _seconds_until_tomorrow())
+    logger.info("Daily LLM budget spent for %s; using %s", scope, settings.LLM_FALLBACK_MODEL)
+    return settings.LLM_FALLBACK_MODEL
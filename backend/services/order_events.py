@@ -0,0 +1,272 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Row, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import engine
+from models import Order
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "order_events"
+
+# Events published in a session wait here until it commits (memory backend).
+_PENDING_KEY = "pending_order_events"
+_RECONNECT_DELAY_SECONDS = 1.0
+
+# NOTIFY is transactional: the event is delivered when the caller's
+# transaction commits and dropped if it rolls back.
+_NOTIFY_SQL = text(
+    """
+    SELECT pg_notify(
+        :channel,
+        CAST(CAST(:payload AS jsonb) || jsonb_build_object('id', nextval('order_event_id_seq')) AS text)
+    )
+    """
+)
+
+
+class OrderEvent:
+    """A delivered event, encoded once as an SSE frame for every subscriber."""
+
+    __slots__ = ("id", "customer_id", "frame")
+
+    def __init__(self, payload: dict[str, Any]) -> None:
+        self.id: int = payload["id"]
+        self.customer_id: int | None = payload.get("customer_id")
+        self.frame = (
+            f"id: {self.id}\nevent: {payload['type']}\ndata: ".encode()
+            + dumps(payload)
+            + b"\n\n"
+        )
+
+
+class Subscription:
+    """One stream client: a bounded buffer of events matching its filter.
+
+    A client that falls ``max_buffer`` events behind is marked overflowed
+    instead of growing the buffer; the stream then ends so the client can
+    reconnect and resume from the replay buffer.
+    """
+
+    __slots__ = ("customer_id", "reset", "overflowed", "_max_buffer", "_buffer", "_wakeup")
+
+    def __init__(self, customer_id: int | None, max_buffer: int) -> None:
+        self.customer_id = customer_id
+        self.reset = False
+        self.overflowed = False
+        self._max_buffer = max_buffer
+        self._buffer: deque[OrderEvent] = deque()
+        self._wakeup = asyncio.Event()
+
+    def offer(self, event: OrderEvent) -> None:
+        if self.overflowed:
+            return
+        if len(self._buffer) >= self._max_buffer:
+            self.overflowed = True
+        else:
+            self._buffer.append(event)
+        self._wakeup.set()
+
+    def request_reset(self) -> None:
+        self.reset = True
+        self._wakeup.set()
+
+    async def next(self) -> OrderEvent | None:
+        """Next buffered event, or None once the client must resync (reset/overflow)."""
+        while not self._buffer:
+            if self.overflowed or self.reset:
+                return None
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        return self._buffer.popleft()
+
+
+class OrderEventBus:
+    """Fans order events out to /orders/stream subscribers.
+
+    With the memory backend, events are delivered in-process when the
+    publishing session commits (single node). With the postgres backend
+    they go through NOTIFY and every node delivers what its LISTEN
+    connection receives. Subscribers are indexed by customer filter, so an
+    event only touches the clients that want it. The last
+    ORDER_EVENTS_REPLAY_SIZE events are kept for resume-from-event-id.
+    """
+
+    def __init__(self) -> None:
+        # Memory-backend ids start at the current time in microseconds, so
+        # ids from before a restart are never reissued: a client resuming
+        # with one gets a reset instead of another run's backlog.
+        self._ids = itertools.count(time.time_ns() // 1000)
+        self._history: deque[OrderEvent] = deque(maxlen=settings.ORDER_EVENTS_REPLAY_SIZE)
+        self._all: set[Subscription] = set()
+        self._by_customer: dict[int, set[Subscription]] = {}
+        self._listener: asyncio.Task | None = None
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    async def publish(
+        self,
+        session: AsyncSession,
+        event_type: str,
+        order: Order | Row,
+        previous_status: str | None = None,
+    ) -> None:
+        """Queue an event for ``order`` (an Order or a RETURNING row).
+
+        It is delivered when ``session`` commits.
+        """
+        payload = {
+            "type": event_type,
+            "order_id": order.order_id,
+            "order_number": order.order_number,
+            "customer_id": order.customer_id,
+            "status": order.status,
+            "previous_status": previous_status,
+            "total_amount": str(order.total_amount),
+            "has_warnings": order.has_warnings,
+            "occurred_at": datetime.now().isoformat(),
+        }
+        if settings.ORDER_EVENTS_BACKEND == "postgres":
+            await session.execute(
+                _NOTIFY_SQL, {"channel": CHANNEL, "payload": json.dumps(payload)}
+            )
+        else:
+            session.info.setdefault(_PENDING_KEY, []).append(payload)
+
+    def deliver(self, payload: dict[str, Any]) -> OrderEvent:
+        """Record an event and hand it to every matching subscriber."""
+        if "id" not in payload:
+            payload["id"] = next(self._ids)
+        event = OrderEvent(payload)
+        self._history.append(event)
+        for sub in self._all:
+            sub.offer(event)
+        if event.customer_id is not None:
+            for sub in self._by_customer.get(event.customer_id, ()):
+                sub.offer(event)
+        return event
+
+    # ------------------------------------------------------------------
+    # Subscribing
+    # ------------------------------------------------------------------
+    def subscribe(
+        self, customer_id: int | None = None, last_event_id: int | None = None
+    ) -> Subscription:
+        """Register a client, replaying events after ``last_event_id`` if still buffered.
+
+        If that event has left the replay buffer the subscription starts
+        with ``reset`` set and the client should refetch current state.
+        """
+        sub = Subscription(customer_id, settings.ORDER_EVENTS_CLIENT_BUFFER)
+        if last_event_id is not None:
+            replay = self._events_after(last_event_id)
+            if replay is None:
+                sub.reset = True
+            else:
+                for event in replay:
+                    if customer_id is None or event.customer_id == customer_id:
+                        sub.offer(event)
+        if customer_id is None:
+            self._all.add(sub)
+        else:
+            self._by_customer.setdefault(customer_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        if sub.customer_id is None:
+            self._all.discard(sub)
+            return
+        subs = self._by_customer.get(sub.customer_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._by_customer[sub.customer_id]
+
+    def _events_after(self, last_event_id: int) -> list[OrderEvent] | None:
+        # Events are kept in delivery order; ids from the Postgres sequence
+        # are not guaranteed to be monotonic in commit order.
+        for pos in range(len(self._history) - 1, -1, -1):
+            if self._history[pos].id == last_event_id:
+                return list(itertools.islice(self._history, pos + 1, None))
+        return None
+
+    # ------------------------------------------------------------------
+    # Postgres LISTEN
+    # ------------------------------------------------------------------
+    async def start(self) -> None:
+        if settings.ORDER_EVENTS_BACKEND == "postgres" and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self) -> None:
+        reconnecting = False
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    driver = raw.driver_connection
+                    lost = asyncio.Event()
+                    driver.add_termination_listener(lambda _: lost.set())
+                    await driver.add_listener(CHANNEL, self._on_notify)
+                    logger.info("Listening for order events on channel %r", CHANNEL)
+                    if reconnecting:
+                        # Events sent while we were disconnected are gone.
+                        self._reset_subscribers()
+                    try:
+                        await lost.wait()
+                    finally:
+                        if not driver.is_closed():
+                            await driver.remove_listener(CHANNEL, self._on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Order event listener failed; reconnecting")
+            reconnecting = True
+            await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            self.deliver(json.loads(payload))
+        except Exception:
+            logger.exception("Dropping malformed order event: %s", payload)
+
+    def _reset_subscribers(self) -> None:
+        for sub in self._all:
+            sub.request_reset()
+        for subs in self._by_customer.values():
+            for sub in subs:
+                sub.request_reset()
+
+
+order_events = OrderEventBus()
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session: Session) -> None:
+    for payload in session.info.pop(_PENDING_KEY, ()):
+        order_events.deliver(payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,66 @@
+import logging
+from decimal import Decimal
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Order, OrderLine
+
+logger = logging.getLogger(__name__)
+
+
+async def write_order_lines(session: AsyncSession, order: Order) -> None:
+    """Bulk-insert ``order.items`` into ``order_lines`` in the caller's transaction.
+
+    The order must already be flushed so that ``order_id`` is assigned.
+    """
+    if not order.items:
+        return
+    await session.execute(
+        insert(OrderLine),
+        [
+            {
+                "order_id": order.order_id,
+                "line_number": number,
+                "sku": item.get("sku", "UNKNOWN"),
+                "product_name": item.get("product_name", item.get("sku", "UNKNOWN")),
+                "quantity": int(item.get("quantity", 0)),
+                "unit_price": Decimal(str(item.get("unit_price", 0))),
+                "line_total": Decimal(str(item.get("line_total", 0))),
+                "customer_id": order.customer_id,
+                "order_date": order.order_date,
+            }
+            for number, item in enumerate(order.items, start=1)
+        ],
+    )
+
+
+_BACKFILL_SQL = text(
+    """
+    INSERT INTO order_lines
+        (order_id, line_number, sku, product_name, quantity,
+         unit_price, line_total, customer_id, order_date)
+    SELECT
+        o.order_id,
+        li.ordinality,
+        COALESCE(li.value->>'sku', 'UNKNOWN'),
+        COALESCE(li.value->>'product_name', li.value->>'sku', 'UNKNOWN'),
+        COALESCE(CAST(li.value->>'quantity' AS INTEGER), 0),
+        COALESCE(CAST(li.value->>'unit_price' AS NUMERIC), 0),
+        COALESCE(CAST(li.value->>'line_total' AS NUMERIC), 0),
+        o.customer_id,
+        o.order_date
+    FROM orders_new o
+    CROSS JOIN LATERAL jsonb_array_elements(CAST(o.items AS jsonb)) WITH ORDINALITY AS li(value, ordinality)
+    WHERE NOT EXISTS (
+        SELECT 1 FROM order_lines ol WHERE ol.order_id = o.order_id
+    )
+    """
+)
+
+
+async def backfill_order_lines(session: AsyncSession) -> None:
+    """Populate ``order_lines`` for orders that do not have lines yet."""
+    result = await session.execute(_BACKFILL_SQL)
+    await session.commit()
+    logger.info("Backfilled %d order lines", result.rowcount)
@@ -1,16 +1,24 @@
 import asyncio
 import json
 import logging
+import time
 from datetime import datetime
 from decimal import Decimal
 from typing import Any
 
 import anthropic
-from sqlalchemy import func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
-from models import Customer, Inventory, Order
+from metrics import record_provider_error, record_usage, track_stage
+from models import Inventory, Order
+from queries import CUSTOMER_BY_ID, INVENTORY_CATALOG, ORDER_COUNT
+from services.demand_rollup import apply_order_demand
+from services.llm_usage import LlmCall, choose_model, link_llm_call, record_llm_call_detached
+from services.order_events import order_events
+from services.order_lines import write_order_lines
+from services.order_rollup import apply_order_created
+from tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -45,14 +53,78 @@ Return ONLY the JSON array.
 """
 
 
+def resolve_items(
+    extracted_items: list[dict[str, Any]], inv_map: dict[str, Inventory]
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], Decimal]:
+    """Match extracted items to the catalog, price them and collect warnings.
+
+    Returns (order items, warnings, subtotal).
+    """
+    order_items: list[dict[str, Any]] = []
+    warnings: list[dict[str, Any]] = []
+    subtotal = Decimal("0")
+
+    for raw in extracted_items:
+        sku = raw.get("sku", "UNKNOWN")
+        quantity = int(raw.get("quantity", 1))
+        product_name = raw.get("product_name", sku)
+
+        inv = inv_map.get(sku)
+        if inv is None:
+            warnings.append({
+                "type": "unknown_sku",
+                "message": f"Product '{product_name}' (SKU: {sku}) not found in catalog",
+                "severity": "high",
+            })
+            continue
+
+        unit_price = inv.unit_price
+        line_total = unit_price * quantity
+
+        # Check stock availability
+        if quantity > inv.quantity_available:
+            warnings.append({
+                "type": "low_stock",
+                "message": f"{inv.product_name}: requested {quantity}, only {inv.quantity_available} available",
+                "severity": "medium",
+            })
+
+        # Check unusual volume
+        if quantity > 1000:
+            warnings.append({
+                "type": "high_quantity",
+                "message": f"{inv.product_name}: unusually large quantity ({quantity} units)",
+                "severity": "medium",
+            })
+
+        order_items.append({
+            "sku": sku,
+            "product_name": inv.product_name,
+            "quantity": quantity,
+            "unit_price": float(unit_price),
+            "line_total": float(line_total),
+        })
+        subtotal += line_total
+
+    if not order_items:
+        warnings.append({
+            "type": "no_items",
+            "message": "No valid items could be extracted from the message",
+            "severity": "high",
+        })
+    return order_items, warnings, subtotal
+
+
 class OrderProcessor:
     """Processes incoming order messages: Claude parsing + DB operations."""
 
     def __init__(self) -> None:
         self.anthropic_client = anthropic.Anthropic(
             api_key=settings.ANTHROPIC_API_KEY,
+            base_url=settings.ANTHROPIC_BASE_URL or None,
         )
 
+    @traced("order_processor.process_order")
     async def process_order(
         self,
         *,
@@ -63,17 +135,16 @@ class OrderProcessor:
     ) -> dict[str, Any]:
         """End-to-end: parse message -> resolve inventory -> create order -> return result."""
 
-        # 1. Look up customer
-        result = await session.execute(
-            select(Customer).where(Customer.customer_id == customer_id)
-        )
-        customer = result.scalar_one_or_none()
-        if customer is None:
-            raise ValueError(f"Customer {customer_id} not found")
+        with track_stage("catalog_load"):
+            # 1. Look up customer
+            result = await session.execute(CUSTOMER_BY_ID, {"customer_id": customer_id})
+            customer = result.scalar_one_or_none()
+            if customer is None:
+                raise ValueError(f"Customer {customer_id} not found")
 
-        # 2. Load inventory catalog for Claude context
-        inv_result = await session.execute(select(Inventory))
-        inventory_items = list(inv_result.scalars().all())
+            # 2. Load inventory catalog for Claude context
+            inv_result = await session.execute(INVENTORY_CATALOG)
+            inventory_items = list(inv_result.scalars().all())
 
         inventory_list = "\n".join(
             f"{item.sku} | {item.product_name} | ${item.unit_price}"
@@ -83,108 +154,74 @@ class OrderProcessor:
         # 3. Call Claude to parse the message
         prompt = ORDER_EXTRACTION_PROMPT.format(inventory_list=inventory_list)
 
-        extracted_items = await asyncio.to_thread(
-            self._call_claude, prompt, original_message
-        )
+        with track_stage("extraction"):
+            model = await choose_model(session, customer_id)
+            raw_text, llm_call = await asyncio.to_thread(
+                self._call_claude, model, prompt, original_message
+            )
+            # Billed tokens are recorded before parsing, outside the order
+            # transaction; the row is linked to the order once it exists.
+            usage_id = await record_llm_call_detached(
+                llm_call, operation="order_extraction", customer_id=customer_id
+            )
+            extracted_items = self._parse_items(raw_text)
 
         # 4. Resolve items against inventory and compute prices
-        inv_map: dict[str, Inventory] = {item.sku: item for item in inventory_items}
-
-        order_items: list[dict[str, Any]] = []
-        warnings: list[dict[str, Any]] = []
-        subtotal = Decimal("0")
-
-        for raw in extracted_items:
-            sku = raw.get("sku", "UNKNOWN")
-            quantity = int(raw.get("quantity", 1))
-            product_name = raw.get("product_name", sku)
-
-            inv = inv_map.get(sku)
-            if inv is None:
-                warnings.append({
-                    "type": "unknown_sku",
-                    "message": f"Product '{product_name}' (SKU: {sku}) not found in catalog",
-                    "severity": "high",
-                })
-                continue
-
-            unit_price = inv.unit_price
-            line_total = unit_price * quantity
-
-            # Check stock availability
-            if quantity > inv.quantity_available:
-                warnings.append({
-                    "type": "low_stock",
-                    "message": f"{inv.product_name}: requested {quantity}, only {inv.quantity_available} available",
-                    "severity": "medium",
-                })
-
-            # Check unusual volume
-            if quantity > 1000:
-                warnings.append({
-                    "type": "high_quantity",
-                    "message": f"{inv.product_name}: unusually large quantity ({quantity} units)",
-                    "severity": "medium",
-                })
-
-            order_items.append({
-                "sku": sku,
-                "product_name": inv.product_name,
-                "quantity": quantity,
-                "unit_price": float(unit_price),
-                "line_total": float(line_total),
-            })
-            subtotal += line_total
-
-        if not order_items:
-            warnings.append({
-                "type": "no_items",
-                "message": "No valid items could be extracted from the message",
-                "severity": "high",
-            })
-
-        # 5. Generate order number
-        count_result = await session.execute(
-            text("SELECT COUNT(*) FROM orders_new")
-        )
-        count = count_result.scalar() or 0
-        order_number = f"ORD-{datetime.now().strftime('%Y%m%d')}{count + 1:02d}"
-
-        # 6. Determine status
-        has_warnings = len(warnings) > 0
-        requires_review = any(w["severity"] == "high" for w in warnings)
-        status = "review_needed" if requires_review else "pending"
-
-        # 7. Create order
-        order = Order(
-            order_number=order_number,
-            customer_id=customer_id,
-            customer_company_name=customer.company_name,
-            status=status,
-            items=order_items,
-            subtotal=subtotal,
-            total_amount=subtotal,
-            order_source=source_type,
-            original_message=original_message,
-            ai_confidence_score=Decimal("95.00") if not has_warnings else Decimal("70.00"),
-            has_warnings=has_warnings,
-            warnings=warnings if warnings else None,
-            requires_human_review=requires_review,
-        )
-        session.add(order)
-        await session.flush()
-
-        # 8. Update inventory reservations
-        for item in order_items:
-            inv = inv_map.get(item["sku"])
-            if inv:
-                inv.quantity_reserved = inv.quantity_reserved + item["quantity"]
-
-        # 9. Update customer stats
-        customer.order_count = customer.order_count + 1
-        customer.total_lifetime_value = customer.total_lifetime_value + subtotal
-
-        await session.commit()
+        with track_stage("resolution"):
+            inv_map: dict[str, Inventory] = {item.sku: item for item in inventory_items}
+            order_items, warnings, subtotal = resolve_items(extracted_items, inv_map)
+
+        with track_stage("db_write"):
+            # 5. Generate order number
+            count_result = await session.execute(ORDER_COUNT)
+            count = count_result.scalar() or 0
+            order_number = f"ORD-{datetime.now().strftime('%Y%m%d')}{count + 1:02d}"
+
+            # 6. Determine status
+            has_warnings = len(warnings) > 0
+            requires_review = any(w["severity"] == "high" for w in warnings)
+            status = "review_needed" if requires_review else "pending"
+
+            # 7. Create order
+            order = Order(
+                order_number=order_number,
+                customer_id=customer_id,
+                customer_company_name=customer.company_name,
+                status=status,
+                items=order_items,
+                subtotal=subtotal,
+                total_amount=subtotal,
+                order_source=source_type,
+                original_message=original_message,
+                ai_confidence_score=Decimal("95.00") if not has_warnings else Decimal("70.00"),
+                has_warnings=has_warnings,
+                warnings=warnings if warnings else None,
+                requires_human_review=requires_review,
+            )
+            session.add(order)
+            await session.flush()
+            await write_order_lines(session, order)
+            await link_llm_call(session, usage_id, order.order_id)
+
+            # 8. Update inventory reservations
+            for item in order_items:
+                inv = inv_map.get(item["sku"])
+                if inv:
+                    inv.quantity_reserved = inv.quantity_reserved + item["quantity"]
+
+            # 9. Update customer stats
+            customer.order_count = customer.order_count + 1
+            customer.total_lifetime_value = customer.total_lifetime_value + subtotal
+
+            # 10. Update analytics rollups
+            await apply_order_demand(session, order)
+            await apply_order_created(session, order)
+
+            # 11. Publish to the change feed (delivered on commit)
+            await order_events.publish(session, "order.created", order)
+
+        with track_stage("commit"):
+            await session.commit()
 
         logger.info(
             "Order %s created for %s: %d items, $%.2f, status=%s",
@@ -211,17 +248,35 @@ class OrderProcessor:
             "order_date": order.order_date.isoformat() if order.order_date else datetime.now().isoformat(),
         }
 
-    def _call_claude(self, system_prompt: str, user_message: str) -> list[dict[str, Any]]:
-        """Synchronous Claude call (run in thread)."""
-        response = self.anthropic_client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=1024,
-            temperature=0,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_message}],
-        )
-
-        raw_text = response.content[0].text
+    def _call_claude(
+        self, model: str, system_prompt: str, user_message: str
+    ) -> tuple[str, LlmCall]:
+        """Synchronous Claude call (run in thread). Returns the reply text and the call's usage."""
+        with span("anthropic.messages.create", "client") as call_span:
+            started = time.perf_counter()
+            try:
+                response = self.anthropic_client.messages.create(
+                    model=model,
+                    max_tokens=1024,
+                    temperature=0,
+                    system=system_prompt,
+                    messages=[{"role": "user", "content": user_message}],
+                )
+            except Exception as e:
+                record_provider_error("anthropic", e)
+                raise
+            llm_call = LlmCall.from_response(response, started)
+            if call_span is not None:
+                call_span.attrs.update(
+                    model=llm_call.model,
+                    input_tokens=llm_call.input_tokens,
+                    output_tokens=llm_call.output_tokens,
+                )
+        record_usage(response.model, response.usage)
+        return (response.content[0].text if response.content else ""), llm_call
+
+    @staticmethod
+    def _parse_items(raw_text: str) -> list[dict[str, Any]]:
         # Strip markdown fences if Claude adds them despite instructions
         cleaned = raw_text.strip()
         if cleaned.startswith("```"):
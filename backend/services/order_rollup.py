@@ -0,0 +1,104 @@
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Order, OrderStatsDaily
+
+logger = logging.getLogger(__name__)
+
+
+async def _upsert(
+    session: AsyncSession, deltas: dict[tuple[date, int, str], tuple[int, Decimal]]
+) -> None:
+    """Add signed (order_count, revenue) deltas per (day, customer, status) bucket."""
+    deltas = {key: d for key, d in deltas.items() if d != (0, 0)}
+    if not deltas:
+        return
+    stmt = insert(OrderStatsDaily).values([
+        {
+            "bucket_date": bucket_date,
+            "customer_id": customer_id,
+            "status": status,
+            "order_count": count,
+            "revenue": revenue,
+        }
+        for (bucket_date, customer_id, status), (count, revenue) in deltas.items()
+    ])
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[
+                OrderStatsDaily.bucket_date,
+                OrderStatsDaily.customer_id,
+                OrderStatsDaily.status,
+            ],
+            set_={
+                "order_count": OrderStatsDaily.order_count + stmt.excluded.order_count,
+                "revenue": OrderStatsDaily.revenue + stmt.excluded.revenue,
+            },
+        )
+    )
+
+
+def _add(
+    deltas: dict[tuple[date, int, str], tuple[int, Decimal]],
+    order: Order,
+    status: str,
+    sign: int,
+) -> None:
+    key = (order.order_date.date(), order.customer_id or 0, status)
+    count, revenue = deltas.get(key, (0, Decimal("0")))
+    deltas[key] = (count + sign, revenue + sign * order.total_amount)
+
+
+async def apply_order_created(session: AsyncSession, order: Order) -> None:
+    """Count a newly created order in its day/customer/status bucket.
+
+    Runs in the caller's transaction.
+    """
+    deltas: dict[tuple[date, int, str], tuple[int, Decimal]] = {}
+    _add(deltas, order, order.status, 1)
+    await _upsert(session, deltas)
+
+
+async def apply_order_status_change(
+    session: AsyncSession, order: Order, previous_status: str
+) -> None:
+    """Move an order from its previous status bucket to its current one."""
+    await apply_bulk_order_status_change(session, [(order, previous_status)])
+
+
+async def apply_bulk_order_status_change(
+    session: AsyncSession, changes: Iterable[tuple[Order, str]]
+) -> None:
+    """Move many ``(order, previous_status)`` pairs between status buckets in one upsert."""
+    deltas: dict[tuple[date, int, str], tuple[int, Decimal]] = {}
+    for order, previous_status in changes:
+        if previous_status == order.status:
+            continue
+        _add(deltas, order, previous_status, -1)
+        _add(deltas, order, order.status, 1)
+    await _upsert(session, deltas)
+
+
+_BACKFILL_SQL = text(
+    """
+    INSERT INTO order_stats_daily (bucket_date, customer_id, status, order_count, revenue)
+    SELECT CAST(order_date AS DATE), COALESCE(customer_id, 0), status,
+           COUNT(*), COALESCE(SUM(total_amount), 0)
+    FROM orders_new
+    GROUP BY 1, 2, 3
+    """
+)
+
+
+async def rebuild_order_rollups(session: AsyncSession) -> None:
+    """Recompute ``order_stats_daily`` from ``orders_new`` (backfill)."""
+    await session.execute(delete(OrderStatsDaily))
+    await session.execute(_BACKFILL_SQL)
+    await session.commit()
+    logger.info("Order stats rollup rebuilt")
@@ -0,0 +1,251 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Iterable
+
+from sqlalchemy import Row, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Order
+from queries import ORDER_STATE, ORDER_STATUSES, any_of, order_transition
+from schemas import BULK_STATUS_MAX_ORDERS, BulkOrderFilter
+from services.demand_rollup import apply_bulk_status_change
+from services.order_events import order_events
+from services.order_rollup import apply_bulk_order_status_change
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+CANCELLED = "cancelled"
+
+# Status -> statuses it may move to. Enforced inside the UPDATE itself.
+ALLOWED_TRANSITIONS: dict[str, frozenset[str]] = {
+    "pending": frozenset({"processing", "review_needed", "completed", "error", "cancelled"}),
+    "processing": frozenset({"pending", "review_needed", "completed", "error", "cancelled"}),
+    "review_needed": frozenset({"pending", "processing", "completed", "cancelled"}),
+    "error": frozenset({"pending", "review_needed", "cancelled"}),
+    "completed": frozenset(),
+    "cancelled": frozenset({"pending", "review_needed"}),
+}
+
+
+def allowed_sources(status: str) -> list[str]:
+    """Statuses an order may be in to move to ``status``."""
+    return [src for src, targets in ALLOWED_TRANSITIONS.items() if status in targets]
+
+
+class OrderNotFound(Exception):
+    """Raised when a transition targets an order that does not exist."""
+
+
+class TransitionConflict(Exception):
+    """Raised when the order's version or status does not allow the transition."""
+
+    def __init__(self, reason: str, status: str, version: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.version = version
+
+
+# Signed per-SKU change to quantity_reserved, applied in one statement.
+_ADJUST_RESERVATIONS_SQL = text(
+    """
+    UPDATE inventory_new AS i
+    SET quantity_reserved = GREATEST(i.quantity_reserved + r.qty, 0),
+        updated_at = now()
+    FROM unnest(CAST(:skus AS VARCHAR[]), CAST(:qtys AS INTEGER[])) AS r(sku, qty)
+    WHERE i.sku = r.sku
+    """
+)
+
+
+async def adjust_reservations(
+    session: AsyncSession, orders: Iterable[Order], sign: int
+) -> None:
+    """Reserve (sign=1) or release (sign=-1) the stock held by ``orders``."""
+    per_sku: dict[str, int] = defaultdict(int)
+    for order in orders:
+        for item in order.items or []:
+            if item.get("sku"):
+                per_sku[item["sku"]] += sign * int(item.get("quantity", 0))
+    if not per_sku:
+        return
+    await session.execute(
+        _ADJUST_RESERVATIONS_SQL,
+        {"skus": list(per_sku), "qtys": list(per_sku.values())},
+    )
+
+
+async def apply_reservation_change(
+    session: AsyncSession, changes: list[tuple[Order, str]]
+) -> None:
+    """Release stock for orders entering ``cancelled``; re-reserve for orders leaving it."""
+    cancelled = [o for o, prev in changes if o.status == CANCELLED and prev != CANCELLED]
+    restored = [o for o, prev in changes if prev == CANCELLED and o.status != CANCELLED]
+    await adjust_reservations(session, cancelled, -1)
+    await adjust_reservations(session, restored, 1)
+
+
+async def _after_transition(session: AsyncSession, updated: list[Row]) -> None:
+    changes = [(row, row.previous_status) for row in updated]
+    await apply_bulk_status_change(session, changes)
+    await apply_bulk_order_status_change(session, changes)
+    await apply_reservation_change(session, changes)
+    for row in updated:
+        await order_events.publish(session, "order.status_changed", row, row.previous_status)
+
+
+def _transition_values(status: str, reviewed_by: str | None) -> dict[str, Any]:
+    now = datetime.now()
+    values: dict[str, Any] = {
+        "status": status,
+        "updated_at": now,
+        "version": Order.version + 1,
+    }
+    if reviewed_by:
+        values.update(reviewed_by=reviewed_by, reviewed_at=now)
+    return values
+
+
+@traced("order_status.transition_order")
+async def transition_order(
+    session: AsyncSession,
+    order_id: int,
+    *,
+    status: str,
+    reviewed_by: str | None,
+    expected_version: int | None = None,
+) -> Row:
+    """Move one order to ``status`` in a single ``UPDATE ... RETURNING``.
+
+    The statement only matches if the order is in a status allowed to move
+    to ``status`` and, when given, still at ``expected_version``, so two
+    concurrent reviewers cannot overwrite each other. Returns the updated
+    row (every column plus ``previous_status``); the caller commits. On no
+    match, one extra read tells ``OrderNotFound`` from ``TransitionConflict``.
+    """
+    stmt = order_transition(bool(reviewed_by), expected_version is not None)
+    params: dict[str, Any] = {
+        "target_id": order_id,
+        "sources": allowed_sources(status),
+        "new_status": status,
+        "now": datetime.now(),
+    }
+    if reviewed_by:
+        params["reviewer"] = reviewed_by
+    if expected_version is not None:
+        params["expected_version"] = expected_version
+    row = (await session.execute(stmt, params)).first()
+    if row is not None:
+        await _after_transition(session, [row])
+        return row
+
+    current = (await session.execute(ORDER_STATE, {"order_id": order_id})).first()
+    if current is None:
+        raise OrderNotFound(order_id)
+    if expected_version is not None and current.version != expected_version:
+        raise TransitionConflict(
+            "Order was modified by another request", current.status, current.version
+        )
+    raise TransitionConflict(
+        f"Cannot change status from {current.status} to {status}",
+        current.status,
+        current.version,
+    )
+
+
+@traced("order_status.bulk_update_status")
+async def bulk_update_status(
+    session: AsyncSession,
+    *,
+    status: str,
+    reviewed_by: str | None,
+    order_ids: list[int] | None = None,
+    from_status: str | None = None,
+    order_filter: BulkOrderFilter | None = None,
+) -> list[dict[str, Any]]:
+    """Move the selected orders to ``status`` with one ``UPDATE ... RETURNING``.
+
+    Orders are locked in id order, then updated; the pre-update status is
+    read from the locking subquery. Only orders whose status may move to
+    ``status`` (ALLOWED_TRANSITIONS) are touched. Rollups, stock
+    reservations and change events are applied for all updated orders in
+    the same transaction; the caller commits. Returns one result per
+    order: ``updated``, or for requested ids that were not updated,
+    ``conflict`` (transition not allowed, or not in ``from_status``) or
+    ``not_found``. A filter updates at most BULK_STATUS_MAX_ORDERS orders,
+    lowest ids first.
+    """
+    criteria = [any_of(Order.status, allowed_sources(status))]
+    if order_ids is not None:
+        criteria.append(any_of(Order.order_id, order_ids))
+        if from_status is not None:
+            criteria.append(Order.status == from_status)
+    elif order_filter is not None:
+        if order_filter.status is not None:
+            criteria.append(Order.status == order_filter.status)
+        if order_filter.customer_id is not None:
+            criteria.append(Order.customer_id == order_filter.customer_id)
+        if order_filter.has_warnings is not None:
+            criteria.append(Order.has_warnings == order_filter.has_warnings)
+
+    locked = (
+        select(Order.order_id, Order.status.label("previous_status"))
+        .where(*criteria)
+        .order_by(Order.order_id)
+        .limit(BULK_STATUS_MAX_ORDERS)
+        .with_for_update()
+        .subquery("prev")
+    )
+    stmt = (
+        update(Order)
+        .where(Order.order_id == locked.c.order_id)
+        .values(**_transition_values(status, reviewed_by))
+        .returning(
+            Order.order_id,
+            Order.order_number,
+            Order.customer_id,
+            Order.order_date,
+            Order.status,
+            Order.total_amount,
+            Order.has_warnings,
+            Order.items,
+            Order.version,
+            locked.c.previous_status,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    updated = sorted((await session.execute(stmt)).all(), key=lambda row: row.order_id)
+    await _after_transition(session, updated)
+
+    results = {
+        row.order_id: {
+            "order_id": row.order_id,
+            "outcome": "updated",
+            "status": row.status,
+            "previous_status": row.previous_status,
+            "version": row.version,
+        }
+        for row in updated
+    }
+    if order_ids is None:
+        return list(results.values())
+
+    missing = [oid for oid in dict.fromkeys(order_ids) if oid not in results]
+    if missing:
+        current = await session.execute(ORDER_STATUSES, {"order_ids": missing})
+        for order_id, current_status in current.all():
+            results[order_id] = {
+                "order_id": order_id,
+                "outcome": "conflict",
+                "status": current_status,
+                "previous_status": None,
+            }
+    logger.info(
+        "Bulk status -> %s: %d updated of %d requested", status, len(updated), len(order_ids)
+    )
+    return [
+        results.get(oid, {"order_id": oid, "outcome": "not_found"})
+        for oid in dict.fromkeys(order_ids)
+    ]
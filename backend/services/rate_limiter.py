@@ -0,0 +1,239 @@
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from config import settings
+from database import engine
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Most in-process buckets. When the table is full, buckets that have refilled
+# completely (indistinguishable from new ones) are dropped; if none has, new
+# keys are refused until one does, so evicting never resets a throttled
+# bucket.
+_MAX_MEMORY_BUCKETS = 10_000
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a bucket does not hold enough tokens for a request."""
+
+    def __init__(self, bucket_key: str, retry_after: float) -> None:
+        super().__init__(f"Rate limit exceeded for {bucket_key}")
+        self.bucket_key = bucket_key
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class BucketPolicy:
+    capacity: float
+    refill_rate: float  # tokens per second
+
+
+@dataclass
+class _Bucket:
+    tokens: float
+    updated_at: float
+    policy: BucketPolicy
+
+    def full_at(self) -> float:
+        """Monotonic time at which the bucket is back to capacity."""
+        if self.policy.refill_rate <= 0:
+            return float("inf")
+        return self.updated_at + (self.policy.capacity - self.tokens) / self.policy.refill_rate
+
+
+# The Postgres backend checks and debits all of a request's buckets in one
+# transaction: create missing rows, lock them in key order (so concurrent
+# requests cannot deadlock), read the refilled balances and, only if every
+# bucket has room, debit them all.
+_PG_ENSURE_SQL = text(
+    """
+    INSERT INTO rate_limit_buckets (bucket_key, tokens, updated_at)
+    VALUES (:key, :capacity, clock_timestamp())
+    ON CONFLICT (bucket_key) DO NOTHING
+    """
+)
+
+_PG_LOCK_SQL = text(
+    """
+    SELECT bucket_key, tokens,
+           GREATEST(EXTRACT(EPOCH FROM clock_timestamp() - updated_at), 0)
+    FROM rate_limit_buckets
+    WHERE bucket_key = ANY(:keys)
+    ORDER BY bucket_key
+    FOR UPDATE
+    """
+)
+
+_PG_DEBIT_SQL = text(
+    """
+    UPDATE rate_limit_buckets SET
+        tokens = LEAST(
+            :capacity,
+            tokens + GREATEST(EXTRACT(EPOCH FROM clock_timestamp() - updated_at), 0) * :rate
+        ) - :cost,
+        updated_at = clock_timestamp()
+    WHERE bucket_key = :key
+    """
+)
+
+
+class TokenBucketLimiter:
+    """Weighted token-bucket limiter for LLM-backed endpoints.
+
+    Every request debits one bucket per key (e.g. customer and caller).
+    All buckets are checked before any is debited, so a request rejected
+    by one bucket (say, an abusive caller's) spends nothing from the others
+    (the customer's bucket shared with its other callers).
+    A cost larger than a bucket's capacity is clamped to the capacity, so
+    a very large document drains the bucket instead of never fitting.
+
+    backend="memory" keeps buckets in-process (one set per worker);
+    backend="postgres" shares them across workers via ``rate_limit_buckets``.
+    """
+
+    def __init__(self, backend: str = "memory") -> None:
+        if backend not in ("memory", "postgres"):
+            raise ValueError(f"Unknown rate limit backend: {backend}")
+        self.backend = backend
+        self._buckets: dict[str, _Bucket] = {}
+        # Earliest time a full table can have a refilled bucket to drop
+        self._next_prune = float("-inf")
+        self.allowed: Counter[str] = Counter()
+        self.throttled: Counter[str] = Counter()
+
+    @staticmethod
+    def cost_for_message(message: str) -> float:
+        """Weight a request by size: one unit plus one per CHARS_PER_UNIT characters."""
+        return 1.0 + len(message) // max(settings.RATE_LIMIT_CHARS_PER_UNIT, 1)
+
+    @traced("rate_limiter.acquire")
+    async def acquire(self, buckets: list[tuple[str, BucketPolicy]], cost: float) -> None:
+        """Debit ``cost`` from every bucket, or from none and raise RateLimitExceeded."""
+        takes = [(key, policy, min(cost, policy.capacity)) for key, policy in buckets]
+        if self.backend == "postgres":
+            await self._take_postgres(takes)
+        else:
+            self._take_memory(takes)
+        for key, _, _ in takes:
+            self.allowed[key.split(":", 1)[0]] += 1
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Allowed / throttled counts per bucket kind, for load-test fairness checks."""
+        kinds = set(self.allowed) | set(self.throttled)
+        return {
+            kind: {"allowed": self.allowed[kind], "throttled": self.throttled[kind]}
+            for kind in sorted(kinds)
+        }
+
+    # ------------------------------------------------------------------
+    # Backends
+    # ------------------------------------------------------------------
+    def _take_memory(self, takes: list[tuple[str, BucketPolicy, float]]) -> None:
+        # No awaits: the check and the debits form one critical section.
+        now = time.monotonic()
+        buckets: list[_Bucket] = []
+        balances: list[float] = []
+        for key, policy, _ in takes:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._make_room(key, now)
+                bucket = _Bucket(tokens=policy.capacity, updated_at=now, policy=policy)
+                self._buckets[key] = bucket
+            buckets.append(bucket)
+            balances.append(min(
+                policy.capacity,
+                bucket.tokens + (now - bucket.updated_at) * policy.refill_rate,
+            ))
+
+        self._check(takes, balances)
+        for bucket, balance, (_, _, take) in zip(buckets, balances, takes):
+            bucket.tokens = balance - take
+            bucket.updated_at = now
+
+    async def _take_postgres(self, takes: list[tuple[str, BucketPolicy, float]]) -> None:
+        ordered = sorted(takes, key=lambda t: t[0])
+        async with engine.begin() as conn:
+            await conn.execute(
+                _PG_ENSURE_SQL,
+                [{"key": key, "capacity": policy.capacity} for key, policy, _ in ordered],
+            )
+            result = await conn.execute(_PG_LOCK_SQL, {"keys": [key for key, _, _ in ordered]})
+            state = {key: (float(tokens), float(idle)) for key, tokens, idle in result.all()}
+            balances = [
+                min(policy.capacity, state[key][0] + state[key][1] * policy.refill_rate)
+                for key, policy, _ in ordered
+            ]
+            self._check(ordered, balances)  # raising rolls back the new rows too
+            await conn.execute(
+                _PG_DEBIT_SQL,
+                [
+                    {"key": key, "capacity": policy.capacity, "rate": policy.refill_rate, "cost": take}
+                    for key, policy, take in ordered
+                ],
+            )
+
+    def _check(self, takes: list[tuple[str, BucketPolicy, float]], balances: list[float]) -> None:
+        """Reject on the bucket that will take longest to cover its cost, if any is short."""
+        short = [
+            (key, policy, tokens, take)
+            for (key, policy, take), tokens in zip(takes, balances)
+            if tokens < take
+        ]
+        if short:
+            self._reject(*max(short, key=lambda s: self._retry_after(s[1], s[2], s[3])))
+
+    def _reject(self, key: str, policy: BucketPolicy, tokens: float, cost: float) -> None:
+        self.throttled[key.split(":", 1)[0]] += 1
+        retry_after = self._retry_after(policy, tokens, cost)
+        logger.warning(
+            "Rate limit hit for %s (cost %.0f, %.1f tokens left, retry in %.1fs)",
+            key,
+            cost,
+            tokens,
+            retry_after,
+        )
+        raise RateLimitExceeded(key, retry_after)
+
+    @staticmethod
+    def _retry_after(policy: BucketPolicy, tokens: float, cost: float) -> float:
+        return (cost - tokens) / policy.refill_rate if policy.refill_rate > 0 else 3600.0
+
+    def _make_room(self, key: str, now: float) -> None:
+        if len(self._buckets) < _MAX_MEMORY_BUCKETS:
+            return
+        if now >= self._next_prune:
+            self._prune(now)
+        if len(self._buckets) >= _MAX_MEMORY_BUCKETS:
+            self.throttled[key.split(":", 1)[0]] += 1
+            retry_after = max(self._next_prune - now, 1.0)
+            logger.warning(
+                "Rate limit table full (%d buckets); refusing %s for %.1fs",
+                len(self._buckets),
+                key,
+                retry_after,
+            )
+            raise RateLimitExceeded(key, retry_after)
+
+    def _prune(self, now: float) -> None:
+        # Only refilled buckets carry no state; the rest must be kept.
+        refilled = [k for k, b in self._buckets.items() if b.full_at() <= now]
+        for k in refilled:
+            del self._buckets[k]
+        self._next_prune = min((b.full_at() for b in self._buckets.values()), default=now)
+
+
+CUSTOMER_POLICY = BucketPolicy(
+    capacity=settings.RATE_LIMIT_CUSTOMER_CAPACITY,
+    refill_rate=settings.RATE_LIMIT_CUSTOMER_REFILL_RATE,
+)
+CALLER_POLICY = BucketPolicy(
+    capacity=settings.RATE_LIMIT_CALLER_CAPACITY,
+    refill_rate=settings.RATE_LIMIT_CALLER_REFILL_RATE,
+)
+
+rate_limiter = TokenBucketLimiter(backend=settings.RATE_LIMIT_BACKEND)
@@ -0,0 +1,263 @@
+import logging
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models import Inventory
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Daily demand per inventory item, read from the demand rollup (which already
+# excludes cancelled orders). ``day`` is the offset from :start.
+_DEMAND_HISTORY_SQL = text(
+    """
+    SELECT i.inventory_id,
+           d.bucket_date - CAST(:start AS DATE) AS day,
+           SUM(d.total_qty) AS qty
+    FROM product_demand_daily d
+    JOIN inventory_new i ON i.sku = d.sku
+    WHERE d.bucket_date >= CAST(:start AS DATE)
+      AND d.bucket_date < CAST(:end AS DATE)
+    GROUP BY i.inventory_id, d.bucket_date
+    """
+)
+
+
+@dataclass
+class StockArrays:
+    """Catalog columns the planner needs, one array slot per SKU."""
+
+    inventory_id: np.ndarray
+    sku: list[str]
+    product_name: list[str]
+    available: np.ndarray
+    reorder_point: np.ndarray
+    reorder_quantity: np.ndarray
+    lead_time_days: np.ndarray
+
+
+@dataclass
+class DemandHistory:
+    """Sparse daily demand: parallel (sku index, day offset, quantity) arrays.
+
+    Days run from 0 (oldest) to ``days - 1`` (yesterday). Days with no
+    entry for a SKU had zero demand.
+    """
+
+    sku_index: np.ndarray
+    day: np.ndarray
+    qty: np.ndarray
+    days: int
+
+
+@dataclass
+class ReorderPlan:
+    stock: StockArrays
+    as_of: date
+    daily_consumption: np.ndarray
+    demand_std: np.ndarray
+    reorder_level: np.ndarray
+    days_of_cover: np.ndarray
+    days_until_reorder: np.ndarray
+    recommended_quantity: np.ndarray
+
+    def select(self, horizon_days: int | None = None, limit: int | None = None) -> np.ndarray:
+        """Indices of SKUs due for reorder within ``horizon_days``, most urgent first."""
+        idx = np.arange(len(self.stock.sku))
+        if horizon_days is not None:
+            idx = idx[self.days_until_reorder <= horizon_days]
+        order = np.lexsort((self.days_of_cover[idx], self.days_until_reorder[idx]))
+        idx = idx[order]
+        return idx[:limit] if limit is not None else idx
+
+    def to_rows(self, indices: np.ndarray) -> list[dict[str, Any]]:
+        """Materialize the selected SKUs as response rows."""
+        stock = self.stock
+        rows = []
+        for i in indices.tolist():
+            cover = self.days_of_cover[i]
+            until = self.days_until_reorder[i]
+            if until == 0:
+                plan_status = "reorder_now"
+            elif np.isfinite(until):
+                plan_status = "scheduled"
+            else:
+                plan_status = "no_demand"
+            rows.append({
+                "inventory_id": int(stock.inventory_id[i]),
+                "sku": stock.sku[i],
+                "product_name": stock.product_name[i],
+                "quantity_available": int(stock.available[i]),
+                "lead_time_days": int(stock.lead_time_days[i]),
+                "daily_consumption": round(float(self.daily_consumption[i]), 3),
+                "days_of_cover": round(float(cover), 1) if np.isfinite(cover) else None,
+                "stockout_date": (
+                    self.as_of + timedelta(days=int(cover)) if np.isfinite(cover) else None
+                ),
+                "reorder_level": int(np.ceil(round(float(self.reorder_level[i]), 6))),
+                "reorder_date": (
+                    self.as_of + timedelta(days=int(until)) if np.isfinite(until) else None
+                ),
+                "recommended_quantity": int(self.recommended_quantity[i]),
+                "status": plan_status,
+            })
+        return rows
+
+
+# ---------------------------------------------------------------------------
+# Vectorized computation
+# ---------------------------------------------------------------------------
+
+def consumption_stats(
+    history: DemandHistory, n_skus: int, halflife_days: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Exponentially weighted daily consumption rate and its standard deviation.
+
+    A day's weight halves every ``halflife_days`` going back in time, so
+    recent demand dominates while the full history still contributes. The
+    weighted sums are taken over the sparse entries with ``np.bincount``;
+    zero-demand days only enter through the shared total weight.
+    """
+    ages = np.arange(history.days - 1, -1, -1, dtype=np.float64)
+    day_weights = np.exp2(-ages / halflife_days)
+    total_weight = day_weights.sum()
+
+    w = day_weights[history.day]
+    wq = w * history.qty
+    rate = np.bincount(history.sku_index, weights=wq, minlength=n_skus) / total_weight
+    second = np.bincount(history.sku_index, weights=wq * history.qty, minlength=n_skus)
+    variance = np.maximum(second / total_weight - rate * rate, 0.0)
+    return rate, np.sqrt(variance)
+
+
+def compute_plan(
+    stock: StockArrays,
+    history: DemandHistory,
+    as_of: date,
+    *,
+    halflife_days: float,
+    safety_z: float,
+    review_days: int,
+    plan_horizon_days: int,
+) -> ReorderPlan:
+    """Reorder plan for the whole catalog in one pass over NumPy arrays.
+
+    Per SKU: the reorder level is the larger of the configured reorder
+    point and lead-time demand plus safety stock; the reorder date is when
+    projected stock reaches that level; the quantity tops stock up to cover
+    the lead time plus ``review_days`` (never less than the configured
+    reorder quantity). Stockout and reorder dates more than
+    ``plan_horizon_days`` out are left unset (infinite), like those of SKUs
+    with no demand: a near-zero rate would otherwise project them centuries
+    ahead, past the range of ``date``.
+    """
+    rate, std = consumption_stats(history, len(stock.sku), halflife_days)
+    lead = stock.lead_time_days.astype(np.float64)
+    available = stock.available.astype(np.float64)
+
+    safety_stock = safety_z * std * np.sqrt(lead)
+    reorder_level = np.maximum(stock.reorder_point, rate * lead + safety_stock)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        has_demand = rate > 0
+        days_of_cover = np.where(has_demand, np.maximum(available, 0.0) / rate, np.inf)
+        days_until_reorder = np.where(
+            available <= reorder_level,
+            0.0,
+            np.where(has_demand, np.floor((available - reorder_level) / rate), np.inf),
+        )
+    days_of_cover[days_of_cover > plan_horizon_days] = np.inf
+    days_until_reorder[days_until_reorder > plan_horizon_days] = np.inf
+
+    target = rate * (lead + review_days) + safety_stock
+    projected = np.minimum(available, reorder_level)
+    # Round first so float noise (e.g. 440.0000001) does not add a unit.
+    shortfall = np.ceil(np.round(target - projected, 6))
+    recommended = np.maximum(stock.reorder_quantity, shortfall)
+
+    return ReorderPlan(
+        stock=stock,
+        as_of=as_of,
+        daily_consumption=rate,
+        demand_std=std,
+        reorder_level=reorder_level,
+        days_of_cover=days_of_cover,
+        days_until_reorder=days_until_reorder,
+        recommended_quantity=recommended.astype(np.int64),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+async def load_stock(session: AsyncSession) -> StockArrays:
+    result = await session.execute(
+        select(
+            Inventory.inventory_id,
+            Inventory.sku,
+            Inventory.product_name,
+            Inventory.quantity_available,
+            Inventory.reorder_point,
+            Inventory.reorder_quantity,
+            Inventory.lead_time_days,
+        ).order_by(Inventory.inventory_id)
+    )
+    rows = result.all()
+    columns = list(zip(*rows)) if rows else [()] * 7
+    return StockArrays(
+        inventory_id=np.array(columns[0], dtype=np.int64),
+        sku=list(columns[1]),
+        product_name=list(columns[2]),
+        available=np.array(columns[3], dtype=np.int64),
+        reorder_point=np.array(columns[4], dtype=np.int64),
+        reorder_quantity=np.array(columns[5], dtype=np.int64),
+        lead_time_days=np.array(columns[6], dtype=np.int64),
+    )
+
+
+async def load_demand_history(
+    session: AsyncSession, stock: StockArrays, as_of: date, days: int
+) -> DemandHistory:
+    start = as_of - timedelta(days=days)
+    result = await session.execute(_DEMAND_HISTORY_SQL, {"start": start, "end": as_of})
+    rows = result.all()
+    n = len(rows)
+    ids, offsets, qtys = zip(*rows) if rows else ((), (), ())
+    inventory_ids = np.fromiter(ids, dtype=np.int64, count=n)
+    return DemandHistory(
+        sku_index=np.searchsorted(stock.inventory_id, inventory_ids),
+        day=np.fromiter(offsets, dtype=np.int64, count=n),
+        qty=np.fromiter(qtys, dtype=np.float64, count=n),
+        days=days,
+    )
+
+
+@traced("reorder_planner.build_reorder_plan")
+async def build_reorder_plan(session: AsyncSession, as_of: date | None = None) -> ReorderPlan:
+    """Load the catalog and demand history and plan reorders as of ``as_of``."""
+    as_of = as_of or date.today()
+    stock = await load_stock(session)
+    history = await load_demand_history(
+        session, stock, as_of, settings.REORDER_HISTORY_DAYS
+    )
+    plan = compute_plan(
+        stock,
+        history,
+        as_of,
+        halflife_days=settings.REORDER_DEMAND_HALFLIFE_DAYS,
+        safety_z=settings.REORDER_SAFETY_Z,
+        review_days=settings.REORDER_REVIEW_DAYS,
+        plan_horizon_days=settings.REORDER_PLAN_HORIZON_DAYS,
+    )
+    logger.info(
+        "Reorder plan: %d SKUs, %d demand entries, %d due now",
+        len(stock.sku), len(history.qty), int((plan.days_until_reorder == 0).sum()),
+    )
+    return plan
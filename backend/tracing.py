@@ -0,0 +1,342 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_SQL_TEXT_LIMIT = 1000
+_export_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation; children are the operations it started."""
+
+    __slots__ = ("span_id", "name", "kind", "attrs", "start_ns", "end_ns", "error", "children")
+
+    def __init__(self, span_id: int, name: str, kind: str, attrs: dict[str, Any]) -> None:
+        self.span_id = span_id
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.error: str | None = None
+        self.children: list[Span] = []
+
+    def finish(self, error: BaseException | None = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self, origin_ns: int) -> dict[str, Any]:
+        end_ns = self.end_ns or time.time_ns()
+        node: dict[str, Any] = {
+            "name": self.name,
+            "kind": self.kind,
+            "offset_ms": round((self.start_ns - origin_ns) / 1e6, 3),
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+        }
+        if self.attrs:
+            node["attributes"] = self.attrs
+        if self.error:
+            node["error"] = self.error
+        if self.children:
+            node["children"] = [child.to_dict(origin_ns) for child in self.children]
+        return node
+
+
+class Trace:
+    """All spans recorded while serving one request."""
+
+    __slots__ = ("trace_id", "root", "span_count", "dropped", "_next_id")
+
+    def __init__(self, name: str, attrs: dict[str, Any]) -> None:
+        self.trace_id = os.urandom(16).hex()
+        self._next_id = 1
+        self.span_count = 1
+        self.dropped = 0
+        self.root = Span(self._new_id(), name, "server", attrs)
+
+    def _new_id(self) -> int:
+        span_id = self._next_id
+        self._next_id += 1
+        return span_id
+
+    def child(self, parent: Span, name: str, kind: str, attrs: dict[str, Any]) -> Span | None:
+        if self.span_count >= settings.TRACE_MAX_SPANS:
+            self.dropped += 1
+            return None
+        self.span_count += 1
+        new = Span(self._new_id(), name, kind, attrs)
+        parent.children.append(new)
+        return new
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.root.end_ns or time.time_ns()
+        return (end_ns - self.root.start_ns) / 1e6
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "status": self.root.attrs.get("http.status_code"),
+            "started_at": self.root.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "span_count": self.span_count,
+            "dropped_spans": self.dropped,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**self.summary(), "root": self.root.to_dict(self.root.start_ns)}
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attrs: Any) -> Iterator[Span | None]:
+    """Record the ``with`` block as a child of the current span.
+
+    Outside a traced request (or once the trace is full) this does nothing
+    beyond two context variable lookups.
+    """
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    if trace is None or parent is None:
+        yield None
+        return
+    current = trace.child(parent, name, kind, attrs)
+    if current is None:
+        yield None
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    else:
+        current.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: str) -> Callable:
+    """Decorator recording each call of an async function as a span."""
+
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+# ---------------------------------------------------------------------------
+# SQL statements
+# ---------------------------------------------------------------------------
+
+def instrument_engine(engine: Engine, role: str) -> None:
+    """Record every statement executed on ``engine`` as a ``sql`` span.
+
+    SQLAlchemy runs these hooks in the greenlet of the awaiting coroutine,
+    which shares its context, so spans attach to the caller's current span.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        trace = _current_trace.get()
+        parent = _current_span.get()
+        if trace is None or parent is None:
+            return
+        sql_span = trace.child(parent, "sql", "client", {
+            "db.system": engine.dialect.name,
+            "db.role": role,
+            "db.statement": statement[:_SQL_TEXT_LIMIT],
+        })
+        if sql_span is not None:
+            conn.info.setdefault("trace_spans", []).append(sql_span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        spans = conn.info.get("trace_spans")
+        if spans:
+            sql_span = spans.pop()
+            sql_span.attrs["db.rowcount"] = cursor.rowcount
+            sql_span.finish()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context: Any) -> None:
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            spans.pop().finish(exception_context.original_exception)
+
+
+# ---------------------------------------------------------------------------
+# Slow-request capture
+# ---------------------------------------------------------------------------
+
+class SlowTraceBuffer:
+    """The last TRACE_BUFFER_SIZE requests slower than TRACE_SLOW_REQUEST_MS."""
+
+    def __init__(self) -> None:
+        self._traces: deque[Trace] = deque(maxlen=settings.TRACE_BUFFER_SIZE)
+
+    def add(self, trace: Trace) -> None:
+        self._traces.append(trace)
+
+    def list(self) -> list[dict[str, Any]]:
+        return [trace.summary() for trace in reversed(self._traces)]
+
+    def get(self, trace_id: str) -> dict[str, Any] | None:
+        for trace in self._traces:
+            if trace.trace_id == trace_id:
+                return trace.to_dict()
+        return None
+
+
+slow_traces = SlowTraceBuffer()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+_OTLP_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+def to_otlp(trace: Trace) -> dict[str, Any]:
+    """The trace as an OTLP/JSON ``ExportTraceServiceRequest``."""
+    spans: list[dict[str, Any]] = []
+
+    def visit(node: Span, parent_id: str) -> None:
+        span_id = f"{node.span_id:016x}"
+        record: dict[str, Any] = {
+            "traceId": trace.trace_id,
+            "spanId": span_id,
+            "name": node.name,
+            "kind": _OTLP_KINDS.get(node.kind, 1),
+            "startTimeUnixNano": str(node.start_ns),
+            "endTimeUnixNano": str(node.end_ns or node.start_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in node.attrs.items()
+            ],
+            "status": {"code": 2, "message": node.error} if node.error else {"code": 1},
+        }
+        if parent_id:
+            record["parentSpanId"] = parent_id
+        spans.append(record)
+        for child in node.children:
+            visit(child, span_id)
+
+    visit(trace.root, "")
+    return {
+        "resourceSpans": [{
+            "resource": {
+                "attributes": [{"key": "service.name", "value": {"stringValue": "orderflow-api"}}]
+            },
+            "scopeSpans": [{"scope": {"name": "orderflow.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+def _export(trace: Trace) -> None:
+    line = json.dumps(to_otlp(trace), separators=(",", ":"), default=str)
+    with _export_lock, open(settings.TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+class TracingMiddleware:
+    """Open a root span per HTTP request; keep the slow ones.
+
+    The root span is named after the matched route template. Requests
+    slower than TRACE_SLOW_REQUEST_MS go to ``slow_traces`` and, when
+    TRACE_EXPORT_PATH is set, are appended to it as OTLP/JSON lines.
+    Event streams are never captured (they are long-lived by design).
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}", {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        })
+        streaming = False
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                trace.root.attrs["http.status_code"] = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming = True
+            await send(message)
+
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(trace.root)
+        error: BaseException | None = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            trace.root.finish(error)
+            route = scope.get("route")
+            if getattr(route, "path", None):
+                trace.root.name = f"{scope['method']} {route.path}"
+                trace.root.attrs["http.route"] = route.path
+            if not streaming and trace.duration_ms >= settings.TRACE_SLOW_REQUEST_MS:
+                self._capture(trace)
+
+    def _capture(self, trace: Trace) -> None:
+        slow_traces.add(trace)
+        logger.warning(
+            "Slow request %s: %.0f ms, %d spans (trace %s)",
+            trace.root.name, trace.duration_ms, trace.span_count, trace.trace_id,
+        )
+        if settings.TRACE_EXPORT_PATH:
+            task = asyncio.get_running_loop().run_in_executor(None, _export, trace)
+            task.add_done_callback(_log_export_failure)
+
+
+def _log_export_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Trace export failed: %s", future.exception())
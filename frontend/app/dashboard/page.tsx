@@ -10,9 +10,21 @@ import { DashboardViewToggle } from "@/components/dashboard-view-toggle"
 import { ClientSelector } from "@/components/client-selector"
 import { EmployeeAnalytics } from "@/components/employee-analytics"
 import { ClientAnalytics } from "@/components/client-analytics"
-import type { Order, Client } from "@/lib/data"
-import { computeEmployeeStats, computeClientStats } from "@/lib/dashboard-utils"
-import { fetchOrders, fetchCustomers } from "@/lib/api"
+import type {
+  AnalyticsSummary,
+  Client,
+  Order,
+  ProductDemand,
+  TimeseriesPoint,
+} from "@/lib/data"
+import { clientStatsFromSummary, employeeStatsFromSummary } from "@/lib/dashboard-utils"
+import {
+  fetchAnalyticsSummary,
+  fetchAnalyticsTimeseries,
+  fetchCustomers,
+  fetchOrders,
+  fetchTopProducts,
+} from "@/lib/api"
 import { Heart, Loader2 } from "lucide-react"
 
 type ViewMode = "employee" | "client"
@@ -23,6 +35,12 @@ export default function DashboardPage() {
   const [clients, setClients] = useState<Client[]>([])
   const [selectedClient, setSelectedClient] = useState<string>("")
   const [allOrders, setAllOrders] = useState<Order[]>([])
+  const [summary, setSummary] = useState<AnalyticsSummary | null>(null)
+  const [topProducts, setTopProducts] = useState<ProductDemand[]>([])
+  const [clientSummary, setClientSummary] = useState<AnalyticsSummary | null>(null)
+  const [clientSpending, setClientSpending] = useState<TimeseriesPoint[]>([])
+  // Bumped after an order changes so the analytics below are refetched
+  const [analyticsVersion, setAnalyticsVersion] = useState(0)
   const [loading, setLoading] = useState(true)
 
   // Fetch customers and orders on mount
@@ -47,15 +65,57 @@ export default function DashboardPage() {
     load()
   }, [])
 
+  // Stats and charts are aggregated by the backend, not from allOrders
+  useEffect(() => {
+    let cancelled = false
+    Promise.all([fetchAnalyticsSummary(), fetchTopProducts(8)])
+      .then(([summaryData, productsData]) => {
+        if (cancelled) return
+        setSummary(summaryData)
+        setTopProducts(productsData)
+      })
+      .catch((err) => console.error("Failed to load analytics:", err))
+    return () => {
+      cancelled = true
+    }
+  }, [analyticsVersion])
+
+  const selectedCustomerId = useMemo(
+    () => clients.find((c) => c.name === selectedClient)?.customerId,
+    [clients, selectedClient]
+  )
+
+  useEffect(() => {
+    if (viewMode !== "client" || selectedCustomerId === undefined) return
+    let cancelled = false
+    setClientSummary(null)
+    Promise.all([
+      fetchAnalyticsSummary(selectedCustomerId),
+      fetchAnalyticsTimeseries({ granularity: "day", customerId: selectedCustomerId }),
+    ])
+      .then(([summaryData, spendingData]) => {
+        if (cancelled) return
+        setClientSummary(summaryData)
+        setClientSpending(spendingData)
+      })
+      .catch((err) => console.error("Failed to load client analytics:", err))
+    return () => {
+      cancelled = true
+    }
+  }, [viewMode, selectedCustomerId, analyticsVersion])
+
   const clientOrders = useMemo(
     () => allOrders.filter((o) => o.customer === selectedClient),
     [allOrders, selectedClient]
   )
 
-  const employeeStats = useMemo(() => computeEmployeeStats(allOrders), [allOrders])
+  const employeeStats = useMemo(
+    () => (summary ? employeeStatsFromSummary(summary) : []),
+    [summary]
+  )
   const clientStats = useMemo(
-    () => computeClientStats(clientOrders),
-    [clientOrders]
+    () => (clientSummary ? clientStatsFromSummary(clientSummary) : []),
+    [clientSummary]
   )
 
   if (loading) {
@@ -141,7 +201,9 @@ export default function DashboardPage() {
                 exit={{ opacity: 0, y: -20 }}
                 transition={{ duration: 0.3 }}
               >
-                <EmployeeAnalytics orders={allOrders} />
+                {summary && (
+                  <EmployeeAnalytics summary={summary} topProducts={topProducts} />
+                )}
               </motion.div>
             ) : (
               <motion.div
@@ -151,7 +213,9 @@ export default function DashboardPage() {
                 exit={{ opacity: 0, y: -20 }}
                 transition={{ duration: 0.3 }}
               >
-                <ClientAnalytics orders={clientOrders} />
+                {clientSummary && (
+                  <ClientAnalytics summary={clientSummary} spending={clientSpending} />
+                )}
               </motion.div>
             )}
           </AnimatePresence>
@@ -181,6 +245,7 @@ export default function DashboardPage() {
               try {
                 const ordersData = await fetchOrders()
                 setAllOrders(ordersData)
+                setAnalyticsVersion((v) => v + 1)
               } catch (err) {
                 console.error("Failed to refresh orders:", err)
               }
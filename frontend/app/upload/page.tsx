@@ -57,6 +57,7 @@ export default function UploadPage() {
   const [liveTranscript, setLiveTranscript] = useState("")
   const [mediaRecorder, setMediaRecorder] = useState<MediaRecorder | null>(null)
   const [recordedAudioBlob, setRecordedAudioBlob] = useState<Blob | null>(null)
+  const pendingSubmission = useRef<{ payload: string; key: string } | null>(null)
 
   // ElevenLabs Scribe setup
   const scribe = useScribe({
@@ -73,6 +74,14 @@ export default function UploadPage() {
     const customer = clients.find((c) => c.name === selectedCustomer)
     if (!customer) return
 
+    // Reuse the key for retries/double-submits of the same payload so the
+    // backend replays the first result instead of creating a second order.
+    const payload = `${customer.customerId}:${sourceType}:${message}`
+    if (pendingSubmission.current?.payload !== payload) {
+      pendingSubmission.current = { payload, key: crypto.randomUUID() }
+    }
+    const idempotencyKey = pendingSubmission.current.key
+
     setProcessing(true)
     const steps = [
       "Sending to AI...",
@@ -93,7 +102,9 @@ export default function UploadPage() {
         customerId: customer.customerId,
         sourceType,
         originalMessage: message,
+        idempotencyKey,
       })
+      pendingSubmission.current = null
 
       // Animate remaining steps
       for (let i = 1; i < steps.length; i++) {
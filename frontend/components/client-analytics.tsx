@@ -24,9 +24,9 @@ import {
   CardTitle,
   CardContent,
 } from "@/components/ui/card"
-import type { Order } from "@/lib/data"
+import type { AnalyticsSummary, TimeseriesPoint } from "@/lib/data"
 import { formatCurrency } from "@/lib/data"
-import { countOrdersByStatus } from "@/lib/dashboard-utils"
+import { statusBreakdown } from "@/lib/dashboard-utils"
 
 const pieChartConfig: ChartConfig = {
   completed: { label: "Completed", color: "hsl(160 60% 45%)" },
@@ -43,32 +43,29 @@ const areaChartConfig: ChartConfig = {
 }
 
 interface ClientAnalyticsProps {
-  orders: Order[]
+  summary: AnalyticsSummary
+  spending: TimeseriesPoint[]
 }
 
-export function ClientAnalytics({ orders: clientOrders }: ClientAnalyticsProps) {
+export function ClientAnalytics({ summary, spending }: ClientAnalyticsProps) {
   const statusData = useMemo(
-    () => countOrdersByStatus(clientOrders),
-    [clientOrders]
-  )
-  const totalOrders = useMemo(
-    () => statusData.reduce((sum, d) => sum + d.count, 0),
-    [statusData]
+    () => statusBreakdown(summary.ordersByStatus),
+    [summary]
   )
+  const totalOrders = summary.totalOrders
 
-  const spendingData = useMemo(() => {
-    const sorted = [...clientOrders].sort(
-      (a, b) => new Date(a.date).getTime() - new Date(b.date).getTime()
-    )
-    return sorted.map((o) => ({
-      date: new Date(o.date).toLocaleDateString("en-US", {
-        month: "short",
-        day: "numeric",
-      }),
-      amount: o.amount,
-      id: o.id,
-    }))
-  }, [clientOrders])
+  // Daily points from the order stats rollup, already sorted by period.
+  const spendingData = useMemo(
+    () =>
+      spending.map((p) => ({
+        date: new Date(`${p.periodStart}T00:00:00`).toLocaleDateString("en-US", {
+          month: "short",
+          day: "numeric",
+        }),
+        amount: p.revenue,
+      })),
+    [spending]
+  )
 
   return (
     <div className="grid gap-6 lg:grid-cols-2">
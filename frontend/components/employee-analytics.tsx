@@ -24,8 +24,8 @@ import {
   CardTitle,
   CardContent,
 } from "@/components/ui/card"
-import type { Order } from "@/lib/data"
-import { aggregateProductDemand, countOrdersByStatus } from "@/lib/dashboard-utils"
+import type { AnalyticsSummary, ProductDemand } from "@/lib/data"
+import { statusBreakdown } from "@/lib/dashboard-utils"
 
 const barChartConfig: ChartConfig = {
   qty: {
@@ -42,16 +42,16 @@ const pieChartConfig: ChartConfig = {
 }
 
 interface EmployeeAnalyticsProps {
-  orders: Order[]
+  summary: AnalyticsSummary
+  topProducts: ProductDemand[]
 }
 
-export function EmployeeAnalytics({ orders }: EmployeeAnalyticsProps) {
-  const productData = useMemo(() => aggregateProductDemand(orders).slice(0, 8), [orders])
-  const statusData = useMemo(() => countOrdersByStatus(orders), [orders])
-  const totalOrders = useMemo(
-    () => statusData.reduce((sum, d) => sum + d.count, 0),
-    [statusData]
+export function EmployeeAnalytics({ summary, topProducts: productData }: EmployeeAnalyticsProps) {
+  const statusData = useMemo(
+    () => statusBreakdown(summary.ordersByStatus),
+    [summary]
   )
+  const totalOrders = summary.totalOrders
 
   return (
     <div className="grid gap-6 lg:grid-cols-2">
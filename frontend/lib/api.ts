@@ -1,4 +1,12 @@
-import type { Order, OrderItem, OrderStatus, Client } from "./data"
+import type {
+  AnalyticsSummary,
+  Client,
+  Order,
+  OrderItem,
+  OrderStatus,
+  ProductDemand,
+  TimeseriesPoint,
+} from "./data"
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"
 
@@ -69,6 +77,26 @@ interface BackendTopProduct {
   total_revenue: string | number
 }
 
+interface BackendTimeseriesPoint {
+  period_start: string
+  order_count: number
+  revenue: string | number
+  orders_by_status: Record<string, number>
+}
+
+export interface OrderChangeEvent {
+  id: number
+  type: "order.created" | "order.status_changed"
+  order_id: number
+  order_number: string
+  customer_id: number | null
+  status: string
+  previous_status: string | null
+  total_amount: string
+  has_warnings: boolean
+  occurred_at: string
+}
+
 interface ProcessOrderResponse {
   order_id: number
   order_number: string
@@ -172,6 +200,39 @@ function mapCustomer(bc: BackendCustomer): Client {
   }
 }
 
+function mapSummary(bs: BackendAnalyticsSummary): AnalyticsSummary {
+  // Several backend statuses share a display status, so counts are summed.
+  const ordersByStatus: Partial<Record<OrderStatus, number>> = {}
+  for (const [status, count] of Object.entries(bs.orders_by_status)) {
+    const mapped = mapStatus(status)
+    ordersByStatus[mapped] = (ordersByStatus[mapped] ?? 0) + count
+  }
+  return {
+    totalOrders: bs.total_orders,
+    totalRevenue: Number(bs.total_revenue),
+    avgOrderValue: Number(bs.avg_order_value),
+    ordersByStatus,
+    errorCount: bs.error_count,
+  }
+}
+
+function mapTopProduct(bp: BackendTopProduct): ProductDemand {
+  return {
+    sku: bp.sku,
+    product: bp.product_name,
+    qty: bp.total_qty,
+    revenue: Number(bp.total_revenue),
+  }
+}
+
+function mapTimeseriesPoint(bp: BackendTimeseriesPoint): TimeseriesPoint {
+  return {
+    periodStart: bp.period_start,
+    orderCount: bp.order_count,
+    revenue: Number(bp.revenue),
+  }
+}
+
 // ---------------------------------------------------------------------------
 // API functions
 // ---------------------------------------------------------------------------
@@ -208,10 +269,14 @@ export async function processOrder(params: {
   customerId: number
   sourceType: "voice_message" | "text_file"
   originalMessage: string
+  idempotencyKey?: string
 }): Promise<ProcessOrderResponse> {
+  const headers: Record<string, string> = { "Content-Type": "application/json" }
+  if (params.idempotencyKey) headers["Idempotency-Key"] = params.idempotencyKey
+
   const res = await fetch(`${API_BASE}/orders/process`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers,
     body: JSON.stringify({
       customer_id: params.customerId,
       source_type: params.sourceType,
@@ -225,20 +290,39 @@ export async function processOrder(params: {
   return res.json()
 }
 
-export async function fetchAnalyticsSummary(customerId?: number): Promise<BackendAnalyticsSummary> {
+export async function fetchAnalyticsSummary(customerId?: number): Promise<AnalyticsSummary> {
   const url = new URL(`${API_BASE}/analytics/summary`)
   if (customerId) url.searchParams.set("customer_id", String(customerId))
   const res = await fetch(url.toString())
   if (!res.ok) throw new Error(`Failed to fetch analytics: ${res.status}`)
-  return res.json()
+  const data: BackendAnalyticsSummary = await res.json()
+  return mapSummary(data)
 }
 
-export async function fetchTopProducts(limit = 8): Promise<BackendTopProduct[]> {
+export async function fetchTopProducts(limit = 8): Promise<ProductDemand[]> {
   const url = new URL(`${API_BASE}/analytics/top-products`)
   url.searchParams.set("limit", String(limit))
   const res = await fetch(url.toString())
   if (!res.ok) throw new Error(`Failed to fetch top products: ${res.status}`)
-  return res.json()
+  const data: BackendTopProduct[] = await res.json()
+  return data.map(mapTopProduct)
+}
+
+export async function fetchAnalyticsTimeseries(params?: {
+  granularity?: "day" | "week" | "month"
+  customerId?: number
+  startDate?: string
+  endDate?: string
+}): Promise<TimeseriesPoint[]> {
+  const url = new URL(`${API_BASE}/analytics/timeseries`)
+  if (params?.granularity) url.searchParams.set("granularity", params.granularity)
+  if (params?.customerId) url.searchParams.set("customer_id", String(params.customerId))
+  if (params?.startDate) url.searchParams.set("start_date", params.startDate)
+  if (params?.endDate) url.searchParams.set("end_date", params.endDate)
+  const res = await fetch(url.toString())
+  if (!res.ok) throw new Error(`Failed to fetch timeseries: ${res.status}`)
+  const data: BackendTimeseriesPoint[] = await res.json()
+  return data.map(mapTimeseriesPoint)
 }
 
 export async function updateOrderStatus(
@@ -253,3 +337,25 @@ export async function updateOrderStatus(
   })
   if (!res.ok) throw new Error(`Failed to update order: ${res.status}`)
 }
+
+/**
+ * Subscribe to order creation and status changes over SSE. `onResync` fires
+ * when events were missed and the caller should refetch. Returns a cleanup
+ * function that closes the stream.
+ */
+export function subscribeOrderEvents(params: {
+  customerId?: number
+  onEvent: (event: OrderChangeEvent) => void
+  onResync?: () => void
+}): () => void {
+  const url = new URL(`${API_BASE}/orders/stream`)
+  if (params.customerId) url.searchParams.set("customer_id", String(params.customerId))
+  const source = new EventSource(url.toString())
+  const handle = (e: MessageEvent) => params.onEvent(JSON.parse(e.data))
+  source.addEventListener("order.created", handle)
+  source.addEventListener("order.status_changed", handle)
+  // Lagging clients are closed with "overflow"; EventSource reconnects with
+  // Last-Event-ID and the server replays the backlog, or sends "reset".
+  source.addEventListener("reset", () => params.onResync?.())
+  return () => source.close()
+}
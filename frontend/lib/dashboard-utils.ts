@@ -1,4 +1,4 @@
-import type { Order, OrderStatus } from "./data"
+import type { AnalyticsSummary, OrderStatus } from "./data"
 import { formatCurrency } from "./data"
 import {
   BarChart3,
@@ -19,11 +19,8 @@ export interface StatItem {
   extraIcon: React.ComponentType<{ className?: string }> | null
 }
 
-export function computeEmployeeStats(orders: Order[]): StatItem[] {
-  const totalOrders = orders.length
-  const totalRevenue = orders.reduce((sum, o) => sum + o.amount, 0)
-  const avgOrderValue = totalOrders > 0 ? totalRevenue / totalOrders : 0
-  const errorCount = orders.filter((o) => o.status === "error").length
+export function employeeStatsFromSummary(summary: AnalyticsSummary): StatItem[] {
+  const { totalOrders, totalRevenue, avgOrderValue, errorCount } = summary
 
   return [
     {
@@ -61,15 +58,13 @@ export function computeEmployeeStats(orders: Order[]): StatItem[] {
   ]
 }
 
-export function computeClientStats(orders: Order[]): StatItem[] {
-  const count = orders.length
-  const totalSpent = orders.reduce((sum, o) => sum + o.amount, 0)
-  const avgSize = count > 0 ? totalSpent / count : 0
+export function clientStatsFromSummary(summary: AnalyticsSummary): StatItem[] {
+  const count = summary.totalOrders
+  const totalSpent = summary.totalRevenue
+  const avgSize = summary.avgOrderValue
   const completedRate =
     count > 0
-      ? Math.round(
-          (orders.filter((o) => o.status === "completed").length / count) * 100
-        )
+      ? Math.round(((summary.ordersByStatus.completed ?? 0) / count) * 100)
       : 0
 
   return [
@@ -108,30 +103,8 @@ export function computeClientStats(orders: Order[]): StatItem[] {
   ]
 }
 
-export function aggregateProductDemand(
-  orders: Order[]
-): { product: string; qty: number; revenue: number }[] {
-  const productMap = new Map<
-    string,
-    { product: string; qty: number; revenue: number }
-  >()
-  for (const order of orders) {
-    for (const item of order.parsedItems ?? []) {
-      const existing = productMap.get(item.sku) ?? {
-        product: item.product,
-        qty: 0,
-        revenue: 0,
-      }
-      existing.qty += item.qty
-      existing.revenue += item.total
-      productMap.set(item.sku, existing)
-    }
-  }
-  return Array.from(productMap.values()).sort((a, b) => b.qty - a.qty)
-}
-
-export function countOrdersByStatus(
-  orders: Order[]
+export function statusBreakdown(
+  ordersByStatus: Partial<Record<OrderStatus, number>>
 ): { status: string; count: number; fill: string }[] {
   const statusColors: Record<OrderStatus, string> = {
     completed: "var(--color-completed)",
@@ -140,41 +113,11 @@ export function countOrdersByStatus(
     error: "var(--color-error)",
   }
 
-  const counts = new Map<OrderStatus, number>()
-  for (const order of orders) {
-    counts.set(order.status, (counts.get(order.status) ?? 0) + 1)
-  }
-
-  return Array.from(counts.entries()).map(([status, count]) => ({
-    status: status.charAt(0).toUpperCase() + status.slice(1),
-    count,
-    fill: statusColors[status],
-  }))
-}
-
-export function groupOrdersByMonth(
-  orders: Order[]
-): { month: string; revenue: number; count: number }[] {
-  const monthMap = new Map<string, { revenue: number; count: number }>()
-
-  for (const order of orders) {
-    const date = new Date(order.date)
-    const monthKey = date.toLocaleDateString("en-US", {
-      month: "short",
-      year: "2-digit",
-    })
-    const existing = monthMap.get(monthKey) ?? { revenue: 0, count: 0 }
-    existing.revenue += order.amount
-    existing.count += 1
-    monthMap.set(monthKey, existing)
-  }
-
-  const sorted = Array.from(monthMap.entries())
-    .map(([month, data]) => ({ month, ...data }))
-    .sort((a, b) => {
-      const parseDate = (m: string) => new Date(`1 ${m}`)
-      return parseDate(a.month).getTime() - parseDate(b.month).getTime()
+  return (Object.entries(ordersByStatus) as [OrderStatus, number][]).map(
+    ([status, count]) => ({
+      status: status.charAt(0).toUpperCase() + status.slice(1),
+      count,
+      fill: statusColors[status],
     })
-
-  return sorted
+  )
 }
@@ -37,6 +37,27 @@ export interface Client {
   industry: string
 }
 
+export interface AnalyticsSummary {
+  totalOrders: number
+  totalRevenue: number
+  avgOrderValue: number
+  ordersByStatus: Partial<Record<OrderStatus, number>>
+  errorCount: number
+}
+
+export interface ProductDemand {
+  sku: string
+  product: string
+  qty: number
+  revenue: number
+}
+
+export interface TimeseriesPoint {
+  periodStart: string
+  orderCount: number
+  revenue: number
+}
+
 export const clients: Client[] = [
   { id: "acme-manufacturing", customerId: 1, name: "Acme Manufacturing", email: "orders@acme-mfg.com", phone: "+1 (415) 555-0142", industry: "Manufacturing" },
   { id: "buildco", customerId: 2, name: "BuildCo", email: "procurement@buildco.io", phone: "+1 (415) 555-0198", industry: "Construction" },